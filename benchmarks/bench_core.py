@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for the PocketFlow orchestration engine.
+
+Measures engine overhead only: every node does trivial work, so the numbers reflect
+pocketflow/__init__.py rather than user code.
+
+Usage:
+    python benchmarks/bench_core.py [--quick] [--output results.json]
+    python benchmarks/bench_core.py --compare benchmarks/baseline.json [--tolerance 0.25]
+    python benchmarks/bench_core.py --save-baseline benchmarks/baseline.json --runs 5
+
+Metric names end with their unit. Metrics ending in `_per_sec` are better when higher;
+all others (`_us`, `_bytes`) are better when lower.
+"""
+
+import argparse
+import asyncio
+import copy
+import gc
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+import warnings
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import Node, Flow, BatchFlow, AsyncParallelBatchNode
+
+class Noop(Node):
+    pass
+
+class Counter(Node):
+    """Loops back to itself until shared['n'] reaches shared['limit']."""
+    def post(self, shared, prep_res, exec_res):
+        shared["n"] += 1
+        return "again" if shared["n"] < shared["limit"] else "done"
+
+class Double(AsyncParallelBatchNode):
+    async def prep_async(self, shared):
+        return range(shared["items"])
+
+    async def exec_async(self, item):
+        await asyncio.sleep(0)
+        return item * 2
+
+class Params(BatchFlow):
+    def prep(self, shared):
+        return [{"i": i} for i in range(shared["batch"])]
+
+def best_of(fn, repeat):
+    """Run fn `repeat` times and return the fastest wall time in seconds."""
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def linear_flow(length):
+    start = Noop()
+    curr = start
+    for _ in range(length - 1):
+        curr = curr >> Noop()
+    return Flow(start=start)
+
+def looping_flow():
+    node = Counter()
+    node - "again" >> node
+    node - "done" >> Noop()
+    return Flow(start=node)
+
+def bench_transitions(steps, repeat):
+    results = {}
+    for compiled in (False, True):
+        suffix = "_compiled" if compiled else ""
+        flow = linear_flow(steps)
+        if compiled:
+            flow.compile()
+        t = best_of(lambda: flow.run({}), repeat)
+        results[f"linear{suffix}_transitions_per_sec"] = steps / t
+
+        flow = looping_flow()
+        if compiled:
+            flow.compile()
+        t = best_of(lambda: flow.run({"n": 0, "limit": steps}), repeat)
+        results[f"loop{suffix}_transitions_per_sec"] = steps / t
+    return results
+
+def bench_nesting(batch, repeat):
+    """Flow -> BatchFlow -> Flow -> Noop, compared to running the leaf node directly."""
+    inner = Flow(start=Noop())
+    outer = Flow(start=Params(start=inner))
+    t_nested = best_of(lambda: outer.run({"batch": batch}), repeat)
+    leaf = Noop()
+    t_direct = best_of(lambda: [leaf._run({}) for _ in range(batch)], repeat)
+    return {"nested_overhead_per_item_us": (t_nested - t_direct) / batch * 1e6}
+
+def bench_parallel_scaling(sizes, repeat):
+    results = {}
+    for size in sizes:
+        node = Double()
+        t = best_of(lambda: asyncio.run(node.run_async({"items": size})), repeat)
+        results[f"parallel_batch_{size}_items_per_sec"] = size / t
+    return results
+
+def bench_memory_per_item(size, max_concurrency=None):
+    node = Double(max_concurrency=max_concurrency)
+    gc.collect()
+    tracemalloc.start()
+    asyncio.run(node.run_async({"items": size}))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    label = "unbounded" if max_concurrency is None else f"bounded_{max_concurrency}"
+    return {f"parallel_batch_{label}_peak_per_item_bytes": peak / size}
+
+def bench_copy(steps, repeat):
+    node = Noop()
+    node >> Noop()
+    t = best_of(lambda: [copy.copy(node) for _ in range(steps)], repeat)
+    return {"copy_per_step_us": t / steps * 1e6}
+
+def median_of(results):
+    """Combine several run_all() results into one, taking the median of each metric."""
+    merged = dict(results[0], runs=len(results))
+    merged["metrics"] = {name: statistics.median(r["metrics"][name] for r in results) for name in results[0]["metrics"]}
+    return merged
+
+def run_all(quick=False):
+    steps = 2_000 if quick else 20_000
+    repeat = 3 if quick else 5
+    sizes = [10, 1_000, 10_000] if quick else [10, 1_000, 10_000, 100_000]
+    memory_items = 2_000 if quick else 20_000
+    results = {}
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        results.update(bench_transitions(steps, repeat))
+        results.update(bench_nesting(steps // 10, repeat))
+        results.update(bench_parallel_scaling(sizes, max(1, repeat // 2)))
+        results.update(bench_memory_per_item(memory_items))
+        results.update(bench_memory_per_item(memory_items, max_concurrency=64))
+        results.update(bench_copy(steps, repeat))
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "quick": quick,
+        "metrics": results,
+    }
+
+def compare(current, baseline, tolerance):
+    """Return a list of human-readable regressions beyond `tolerance` (a fraction)."""
+    regressions = []
+    for name, base in baseline["metrics"].items():
+        value = current["metrics"].get(name)
+        if value is None or base == 0:
+            continue
+        change = (value - base) / base
+        worse = -change if name.endswith("_per_sec") else change
+        if worse > tolerance:
+            regressions.append(f"{name}: {base:.3g} -> {value:.3g} ({worse:+.0%} worse)")
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark PocketFlow orchestration overhead")
+    parser.add_argument("--quick", action="store_true", help="Smaller sizes for a fast smoke run")
+    parser.add_argument("--output", help="Write results JSON to this path")
+    parser.add_argument("--compare", help="Baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed regression as a fraction (default 0.25)")
+    parser.add_argument("--save-baseline", help="Write results as the new baseline to this path")
+    parser.add_argument("--runs", type=int, default=1, help="Repeat the whole suite and report the median of each metric")
+    args = parser.parse_args()
+
+    results = median_of([run_all(quick=args.quick) for _ in range(max(1, args.runs))])
+    text = json.dumps(results, indent=2, sort_keys=True)
+    print(text)
+    for path in filter(None, [args.output, args.save_baseline]):
+        Path(path).write_text(text + "\n")
+
+    if args.compare:
+        regressions = compare(results, json.loads(Path(args.compare).read_text()), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        sys.exit(1 if regressions else 0)
@@ -1,3 +1,4 @@
+import asyncio
 import json
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.staticfiles import StaticFiles
@@ -21,19 +22,41 @@ async def websocket_endpoint(websocket: WebSocket):
         "conversation_history": []
     }
     
+    # One reader owns the socket: messages sent while a flow runs wait in the inbox for the next turn
+    inbox = asyncio.Queue()
+    reader = asyncio.create_task(read_messages(websocket, inbox))
     try:
-        while True:
-            data = await websocket.receive_text()
+        while (data := await inbox.get()) is not None:
             message = json.loads(data)
             
             # Update only the current message, keep conversation history
             shared_store["user_message"] = message.get("content", "")
             
             flow = create_streaming_chat_flow()
-            await flow.run_async(shared_store)
+            flow_task = asyncio.create_task(flow.run_async(shared_store))
+            await asyncio.wait({flow_task, reader}, return_when=asyncio.FIRST_COMPLETED)
+            
+            if not flow_task.done():
+                # Client left mid-answer: stop the flow so it doesn't keep streaming tokens
+                flow_task.cancel()
+                await asyncio.gather(flow_task, return_exceptions=True)
+                break
+            await flow_task
             
     except WebSocketDisconnect:
         pass
+    finally:
+        reader.cancel()
+        await asyncio.gather(reader, return_exceptions=True)
+
+async def read_messages(websocket: WebSocket, inbox: asyncio.Queue):
+    """Queue every text message from the client; None marks the disconnect."""
+    try:
+        while (event := await websocket.receive())["type"] != "websocket.disconnect":
+            if event.get("text") is not None:
+                await inbox.put(event["text"])
+    finally:
+        inbox.put_nowait(None)
 
 if __name__ == "__main__":
     import uvicorn
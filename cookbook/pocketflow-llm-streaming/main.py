@@ -1,10 +1,24 @@
-import time
+import asyncio
 import threading
-from pocketflow import Node, Flow
-from utils import fake_stream_llm, stream_llm
+from pocketflow import AsyncFlow
+from pocketflow.stream import AsyncStreamNode, StreamPipeline
+from utils import fake_stream_llm_async, stream_llm_async
 
-class StreamNode(Node):
-    def prep(self, shared):
+class StreamNode(AsyncStreamNode):
+    async def prep_async(self, shared):
+        # Async generator of text chunks; nothing is requested until it is iterated
+        return stream_llm_async(shared["prompt"])
+
+    async def exec_async(self, chunks):
+        # Yield text as it arrives; downstream stages receive each chunk right away
+        async for text in chunks:
+            yield text
+
+    async def post_async(self, shared, prep_res, exec_res):
+        shared["response"] = "".join(exec_res)
+
+class PrintNode(AsyncStreamNode):
+    async def prep_async(self, shared):
         # Create interrupt event
         interrupt_event = threading.Event()
 
@@ -12,38 +26,19 @@ class StreamNode(Node):
         def wait_for_interrupt():
             input("Press ENTER at any time to interrupt streaming...\n")
             interrupt_event.set()
-        listener_thread = threading.Thread(target=wait_for_interrupt)
-        listener_thread.start()
-        
-        # Get prompt from shared store
-        prompt = shared["prompt"]
-        # Get chunks from LLM function
-        chunks = stream_llm(prompt)
-        return chunks, interrupt_event, listener_thread
-
-    def exec(self, prep_res):
-        chunks, interrupt_event, listener_thread = prep_res
-        for chunk in chunks:
+        threading.Thread(target=wait_for_interrupt, daemon=True).start()
+        return interrupt_event
+
+    async def exec_async(self, interrupt_event):
+        # Print each chunk as soon as the LLM stage produces it
+        async for chunk in self.input:
             if interrupt_event.is_set():
-                print("User interrupted streaming.")
-                break
-            
-            if hasattr(chunk.choices[0].delta, 'content') and chunk.choices[0].delta.content is not None:
-                chunk_content = chunk.choices[0].delta.content
-                print(chunk_content, end="", flush=True)
-                time.sleep(0.1)  # simulate latency
-        return interrupt_event, listener_thread
-
-    def post(self, shared, prep_res, exec_res):
-        interrupt_event, listener_thread = exec_res
-        # Join the interrupt listener so it doesn't linger
-        interrupt_event.set()
-        listener_thread.join()
-        return "default"
-
-# Usage:
-node = StreamNode()
-flow = Flow(start=node)
+                print("\nUser interrupted streaming.")
+                break  # leaving stops the LLM stage too
+            print(chunk, end="", flush=True)
+
+# Usage: the LLM stage and the print stage run together, connected by a bounded channel
+flow = AsyncFlow(start=StreamPipeline(StreamNode(), PrintNode(), buffer=16))
 
 shared = {"prompt": "What's the meaning of life?"}
-flow.run(shared)
+asyncio.run(flow.run_async(shared))
@@ -1,4 +1,5 @@
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
+import asyncio
 import os
 
 def stream_llm(prompt):
@@ -15,6 +16,30 @@ def stream_llm(prompt):
     )
     return response
 
+async def stream_llm_async(prompt):
+    """Yield the response text chunk by chunk without blocking the event loop."""
+    client = AsyncOpenAI(api_key=os.environ.get("OPENAI_API_KEY", "your-api-key"))
+    response = await client.chat.completions.create(
+        model="gpt-4o",
+        messages=[
+            {"role": "user", "content": prompt}
+        ],
+        temperature=0.7,
+        stream=True
+    )
+    try:
+        async for chunk in response:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    finally:
+        await response.close()  # also runs when the consumer stops early
+
+async def fake_stream_llm_async(prompt, delay=0.1):
+    """Async version of fake_stream_llm that yields text chunks with simulated latency."""
+    for chunk in fake_stream_llm(prompt):
+        await asyncio.sleep(delay)
+        yield chunk.choices[0].delta.content
+
 def fake_stream_llm(prompt, predefined_text="This is a fake response. Today is a sunny day. The sun is shining. The birds are singing. The flowers are blooming. The bees are buzzing. The wind is blowing. The clouds are drifting. The sky is blue. The grass is green. The trees are tall. The water is clear. The fish are swimming. The sun is shining. The birds are singing. The flowers are blooming. The bees are buzzing. The wind is blowing. The clouds are drifting. The sky is blue. The grass is green. The trees are tall. The water is clear. The fish are swimming."):
     """
     Returns a list of simple objects that mimic the structure needed
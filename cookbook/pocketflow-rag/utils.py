@@ -2,8 +2,17 @@ import os
 import numpy as np
 from openai import OpenAI
 
+_client = None
+
+def get_client():
+    # Create the client once so every call reuses its pooled keep-alive connections
+    global _client
+    if _client is None:
+        _client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY", "your-api-key"))
+    return _client
+
 def call_llm(prompt):    
-    client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY", "your-api-key"))
+    client = get_client()
     r = client.chat.completions.create(
         model="gpt-4o",
         messages=[{"role": "user", "content": prompt}]
@@ -11,7 +20,7 @@ def call_llm(prompt):
     return r.choices[0].message.content
 
 def get_embedding(text):
-    client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY", "your-api-key"))
+    client = get_client()
     
     response = client.embeddings.create(
         model="text-embedding-ada-002",
@@ -3,6 +3,7 @@
 import os
 import sys
 from flow import create_search_answer_flow
+from utils.call_llm import enable_cache
 
 def main():
     """
@@ -14,6 +15,9 @@ def main():
         print("Please set it with: export OPENAI_API_KEY='your-api-key'")
         return 1
     
+    # Reuse answers to prompts seen in earlier runs (set LLM_CACHE_PATH to move the cache file)
+    cache = enable_cache()
+    
     # Get user input
     if len(sys.argv) > 1:
         # Use command line argument
@@ -56,6 +60,8 @@ def main():
             print(f"\nFinal Answer:\n{shared['final_answer']}")
         else:
             print("\nNo final answer was generated")
+        
+        print(f"\nLLM cache: {cache.hits} hits, {cache.misses} misses")
             
     except KeyboardInterrupt:
         print("\nOperation cancelled by user")
@@ -2,6 +2,19 @@ import yaml
 from pocketflow import Node
 from utils.call_llm import call_llm
 from utils.search_web import search_web
+from utils.context_budget import ContextBudget
+
+# Token budgets for search results in prompts, so the prompt stops growing with every search loop
+DECIDE_CONTEXT = ContextBudget(max_tokens=1000)
+ANSWER_CONTEXT = ContextBudget(max_tokens=6000)
+
+def format_searches(searches, budget, result_chars=None):
+    """Search history as prompt text. Repeated searches are dropped, and the oldest are cut first when over budget."""
+    segments = [
+        {"text": f"Query: {s['query']}\nResults:\n{str(s['results'])[:result_chars]}", "priority": i}
+        for i, s in enumerate(searches, 1)
+    ]
+    return "\n\n".join(budget.fit(segments))
 
 class DecideNode(Node):
     """
@@ -19,10 +32,7 @@ class DecideNode(Node):
         # Format previous search context
         search_context = ""
         if previous_searches:
-            search_context = "\n\nPrevious search results:\n"
-            for i, search in enumerate(previous_searches, 1):
-                search_context += f"Search {i}: {search['query']}\n"
-                search_context += f"Results: {search['results'][:200]}...\n\n"
+            search_context = "\n\nPrevious search results:\n" + format_searches(previous_searches, DECIDE_CONTEXT, 200) + "\n"
         
         prompt = f"""
 You are an AI assistant that needs to decide whether to search for more information or answer a question directly.
@@ -50,31 +60,32 @@ reasoning: Brief explanation of your decision
 search_query: What to search for (only if action is search)
 ```"""
         
-        response = call_llm(prompt)
-        
-        # Parse YAML response
-        try:
-            yaml_content = response.split("```yaml")[1].split("```")[0].strip()
-            result = yaml.safe_load(yaml_content)
-            
-            # Validate response
-            assert isinstance(result, dict), "Response must be a dictionary"
-            assert "action" in result, "Response must contain 'action' field"
-            assert "reasoning" in result, "Response must contain 'reasoning' field"
-            assert result["action"] in ["search", "answer"], "Action must be 'search' or 'answer'"
-            
-            if result["action"] == "search":
-                assert "search_query" in result, "Search query required when action is 'search'"
-            
-            return result
-            
-        except Exception as e:
-            # Fallback: if parsing fails, default to search
-            return {
-                "action": "search",
-                "reasoning": f"Failed to parse decision: {str(e)}",
-                "search_query": user_prompt
-            }
+        # A retry recomputes and overwrites the cached response, so a bad answer is not replayed later
+        response = call_llm(prompt, use_cache=True if self.cur_retry == 0 else "refresh")
+        
+        # Parse YAML response (a parse error makes the node retry)
+        yaml_content = response.split("```yaml")[1].split("```")[0].strip()
+        result = yaml.safe_load(yaml_content)
+        
+        # Validate response
+        assert isinstance(result, dict), "Response must be a dictionary"
+        assert "action" in result, "Response must contain 'action' field"
+        assert "reasoning" in result, "Response must contain 'reasoning' field"
+        assert result["action"] in ["search", "answer"], "Action must be 'search' or 'answer'"
+        
+        if result["action"] == "search":
+            assert "search_query" in result, "Search query required when action is 'search'"
+        
+        return result
+
+    def exec_fallback(self, inputs, exc):
+        # Fallback: if parsing fails on every attempt, default to search
+        user_prompt, _ = inputs
+        return {
+            "action": "search",
+            "reasoning": f"Failed to parse decision: {str(exc)}",
+            "search_query": user_prompt
+        }
 
     def post(self, shared, prep_res, exec_res):
         shared["last_decision"] = exec_res
@@ -126,10 +137,7 @@ class AnswerNode(Node):
         # Format search context
         search_context = ""
         if search_history:
-            search_context = "\n\nSearch Results:\n"
-            for i, search in enumerate(search_history, 1):
-                search_context += f"Search {i} - Query: {search['query']}\n"
-                search_context += f"Results:\n{search['results']}\n\n"
+            search_context = "\n\nSearch Results:\n" + format_searches(search_history, ANSWER_CONTEXT) + "\n"
         
         prompt = f"""
 You are a helpful AI assistant. Answer the user's question based on the provided context and your knowledge.
@@ -141,7 +149,7 @@ Please provide a comprehensive and helpful answer to the user's question. If you
 
 Answer:"""
         
-        response = call_llm(prompt)
+        response = call_llm(prompt, use_cache=True if self.cur_retry == 0 else "refresh")
         return response
 
     def post(self, shared, prep_res, exec_res):
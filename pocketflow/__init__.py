@@ -1,11 +1,13 @@
-import asyncio, warnings, copy, time
+import asyncio, warnings, copy, time, contextvars, functools, itertools, random, threading, sys
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 
 class BaseNode:
+    actions,_wiring=None,0
     def __init__(self): self.params,self.successors={},{}
     def set_params(self,params): self.params=params
     def next(self,node,action="default"):
         if action in self.successors: warnings.warn(f"Overwriting successor for action '{action}'")
-        self.successors[action]=node; return node
+        self.successors[action]=node; BaseNode._wiring+=1; return node
     def prep(self,shared): pass
     def exec(self,prep_res): pass
     def post(self,shared,prep_res,exec_res): pass
@@ -23,78 +25,503 @@ class _ConditionalTransition:
     def __init__(self,src,action): self.src,self.action=src,action
     def __rshift__(self,tgt): return self.src.next(tgt,self.action)
 
+def _retry_after(exc):
+    ra=getattr(exc,"retry_after",None)
+    if ra is None: h=getattr(getattr(exc,"response",None),"headers",None) or {}; ra=h.get("retry-after",h.get("Retry-After"))
+    try: return float(ra) if ra is not None else None
+    except (TypeError,ValueError): return None
+
+class DeadlineExceeded(TimeoutError): pass
+
+_deadline=contextvars.ContextVar("pocketflow_deadline",default=None)
+def time_left(): d=_deadline.get(); return None if d is None else d-time.monotonic()
+
+class _DeadlineScope:
+    def __init__(self,timeout): self.timeout=timeout
+    def __enter__(self):
+        if self.timeout is not None: d,n=_deadline.get(),time.monotonic()+self.timeout; self.token=_deadline.set(n if d is None else min(d,n))
+    def __exit__(self,*exc):
+        if self.timeout is not None: _deadline.reset(self.token)
+
+_retry_budget=contextvars.ContextVar("pocketflow_retry_budget",default=None)
+
+class _BudgetScope:
+    def __init__(self,budget): self.budget=budget
+    def __enter__(self):
+        if self.budget is not None: self.token=_retry_budget.set(RetryBudget(self.budget) if isinstance(self.budget,int) else self.budget)
+    def __exit__(self,*exc):
+        if self.budget is not None: _retry_budget.reset(self.token)
+
+_hook_state=contextvars.ContextVar("pocketflow_hooks",default=None)
+
+class Hooks:
+    def on_flow_start(self,flow,path,params,t): pass
+    def on_flow_end(self,flow,path,action,t_start,t_end,error): pass
+    def on_node_start(self,node,path,t): pass
+    def on_node_end(self,node,path,action,t_start,t_end,retries,error): pass
+    def on_retry(self,node,path,attempt,exc,delay): pass
+    def on_fallback(self,node,path,attempt,exc): pass
+
+def _emit(name,node,*args):
+    if (hs:=_hook_state.get()) is None: return
+    path=hs[1]+(type(node).__name__,)
+    for h in hs[0]:
+        if (f:=getattr(h,name,None)): f(node,path,*args)
+
+def _run_sync(curr,shared): return curr._run(shared)
+
+class _HookScope:
+    def __init__(self,flow,hs,params): self.flow,self.params=flow,params; self.hooks=(hs[0] if hs else ())+tuple(flow.hooks); self.path=(hs[1] if hs else ())+(type(flow).__name__,)
+    def emit(self,name,*args):
+        for h in self.hooks:
+            if (f:=getattr(h,name,None)): f(*args)
+    def start(self): self.token=_hook_state.set((self.hooks,self.path)); self.t=time.perf_counter(); self.emit("on_flow_start",self.flow,self.path,self.params,self.t)
+    def end(self,action,error): _hook_state.reset(self.token); self.emit("on_flow_end",self.flow,self.path,action,self.t,time.perf_counter(),error)
+    def node_end(self,curr,path,action,t,error): self.emit("on_node_end",curr,path,action,t,time.perf_counter(),getattr(curr,"cur_retry",None),error)
+    def run(self,curr,shared):
+        path=self.path+(type(curr).__name__,); t=time.perf_counter(); self.emit("on_node_start",curr,path,t)
+        try: a=_run_sync(curr,shared)
+        except BaseException as e: self.node_end(curr,path,None,t,e); raise
+        self.node_end(curr,path,a,t,None); return a
+    async def run_async(self,curr,shared):
+        path=self.path+(type(curr).__name__,); t=time.perf_counter(); self.emit("on_node_start",curr,path,t)
+        try: a=await self.flow._run_node_async(curr,shared)
+        except BaseException as e: self.node_end(curr,path,None,t,e); raise
+        self.node_end(curr,path,a,t,None); return a
+    def orch(self,shared,walk=None):
+        self.start()
+        try: a=(walk or self.flow._orch)(shared,self.params,self.run)
+        except BaseException as e: self.end(None,e); raise
+        self.end(a,None); return a
+    async def orch_async(self,shared,walk=None):
+        self.start()
+        try: a=await (walk or self.flow._orch_async)(shared,self.params,self.run_async)
+        except BaseException as e: self.end(None,e); raise
+        self.end(a,None); return a
+
+class RetryBudget:
+    def __init__(self,retries,per=None): self.capacity=self.tokens=retries; self.rate=retries/per if per else 0; self.stamp=time.monotonic(); self.lock=threading.Lock()
+    def acquire(self):
+        with self.lock:
+            now=time.monotonic(); self.tokens=min(self.capacity,self.tokens+(now-self.stamp)*self.rate); self.stamp=now
+            if self.tokens<1: return False
+            self.tokens-=1; return True
+
+class RetryPolicy:
+    def __init__(self,base=None,factor=2,max_wait=60,jitter=True,max_elapsed=None,retry_on=(Exception,),give_up_on=(),honor_retry_after=True,budget=None):
+        self.base,self.factor,self.max_wait,self.jitter,self.max_elapsed=base,factor,max_wait,jitter,max_elapsed
+        self.retry_on,self.give_up_on,self.honor_retry_after,self.budget=retry_on,give_up_on,honor_retry_after,budget
+    def delay(self,exc,attempt,elapsed,wait):
+        if not isinstance(exc,self.retry_on) or isinstance(exc,self.give_up_on): return None
+        d=min(self.max_wait,(wait if self.base is None else self.base)*self.factor**attempt)
+        if self.jitter: d=random.uniform(0,d)
+        ra=_retry_after(exc) if self.honor_retry_after else None
+        if ra is not None: d=max(d,ra)
+        if self.max_elapsed is not None and elapsed+d>self.max_elapsed: return None
+        if self.budget is not None and not self.budget.acquire(): return None
+        return d
+
 class Node(BaseNode):
+    retry_policy=cache=None
     def __init__(self,max_retries=1,wait=0): super().__init__(); self.max_retries,self.wait=max_retries,wait
     def exec_fallback(self,prep_res,exc): raise exc
+    def _retry_delay(self,exc,attempt,t0):
+        d=self.wait if self.retry_policy is None else self.retry_policy.delay(exc,attempt,time.monotonic()-t0,self.wait)
+        if d is None or ((tl:=time_left()) is not None and tl<d): return None
+        return None if (b:=_retry_budget.get()) is not None and not b.acquire() else d
+    def _exec_attempt(self,prep_res,fn=None):
+        fn=fn or self.exec
+        return fn(prep_res) if self.cache is None else self.cache.get_or_compute(self.cache.key(self,prep_res),lambda: fn(prep_res))
     def _exec(self,prep_res):
-        for self.cur_retry in range(self.max_retries):
-            try: return self.exec(prep_res)
-            except Exception as e:
-                if self.cur_retry==self.max_retries-1: return self.exec_fallback(prep_res,e)
-                if self.wait>0: time.sleep(self.wait)
+        self.cur_retry=0
+        try: return self.exec(prep_res) if self.cache is None else self._exec_attempt(prep_res)
+        except Exception as e: return self._retry(self._exec_attempt,prep_res,self.exec_fallback,e)
+    def _retry_loop(self,fn,arg,fallback):
+        self.cur_retry=0
+        try: return fn(arg)
+        except Exception as e: return self._retry(fn,arg,fallback,e)
+    def _retry(self,fn,arg,fallback,e):
+        t0=time.monotonic()
+        while True:
+            i=self.cur_retry
+            if i>=self.max_retries-1 or (d:=self._retry_delay(e,i,t0)) is None: _emit("on_fallback",self,i,e); return fallback(arg,e)
+            _emit("on_retry",self,i,e,d)
+            if d>0: time.sleep(d)
+            self.cur_retry=i+1
+            try: return fn(arg)
+            except Exception as x: e=x
 
 class BatchNode(Node):
     def _exec(self,items): return [super(BatchNode,self)._exec(i) for i in (items or [])]
 
+def _exec_chunk(node,chunk): node=copy.copy(node); return [Node._exec(node,i) for i in chunk]
+
+class ThreadPoolBatchNode(BatchNode):
+    executor_cls=ThreadPoolExecutor
+    def __init__(self,max_retries=1,wait=0,max_workers=None,chunk_size=1,executor=None):
+        super().__init__(max_retries,wait)
+        if not isinstance(chunk_size,int) or chunk_size<1: raise ValueError(f"chunk_size must be a positive integer, got {chunk_size!r}")
+        self.max_workers,self.chunk_size,self._pool=max_workers,chunk_size,[executor]
+    @property
+    def executor(self): return self._pool[0]
+    def __copy__(self): n=object.__new__(type(self)); n.__dict__.update(self.__dict__); return n
+    def __getstate__(self): s={**self.__dict__,"_pool":[None]}; s.pop("cache",None); return s
+    def shutdown(self,wait=True):
+        if (ex:=self._pool[0]) is not None: ex.shutdown(wait,cancel_futures=True); self._pool[0]=None
+    def _exec(self,items):
+        items,n=list(items or []),self.chunk_size
+        if (ex:=self._pool[0]) is None: ex=self._pool[0]=self.executor_cls(self.max_workers)
+        node=copy.copy(self); node.successors={}
+        submit=(lambda *a: ex.submit(contextvars.copy_context().run,*a)) if isinstance(ex,ThreadPoolExecutor) else ex.submit
+        fs=[submit(_exec_chunk,node,items[i:i+n]) for i in range(0,len(items),n)]
+        try: return [r for f in fs for r in f.result()]
+        except BaseException:
+            for f in fs: f.cancel()
+            raise
+
+class ProcessPoolBatchNode(ThreadPoolBatchNode): executor_cls=ProcessPoolExecutor
+
+class VectorizedBatchNode(BatchNode):
+    array_output=False
+    def __init__(self,max_retries=1,wait=0,batch_size=32,max_batch_bytes=None): super().__init__(max_retries,wait); self.batch_size,self.max_batch_bytes=batch_size,max_batch_bytes
+    def exec_batch(self,items): return [self.exec(i) for i in items]
+    def item_size(self,item): return len(item.encode()) if isinstance(item,str) else len(item) if isinstance(item,(bytes,bytearray)) else sys.getsizeof(item)
+    def _batches(self,items):
+        b,size=[],0
+        for i in items:
+            n=self.item_size(i) if self.max_batch_bytes else 0
+            if b and ((self.batch_size and len(b)>=self.batch_size) or (self.max_batch_bytes and size+n>self.max_batch_bytes)): yield b; b,size=[],0
+            b.append(i); size+=n
+        if b: yield b
+    def _checked(self,batch,res):
+        if len(res)!=len(batch): raise ValueError(f"exec_batch returned {len(res)} results for {len(batch)} items")
+        return res
+    def _join(self,parts):
+        if not self.array_output: return [r for p in parts for r in p]
+        import numpy as np
+        return np.concatenate([np.asarray(p) for p in parts]) if parts else np.empty((0,))
+    def _exec_batch(self,batch): return self._retry_loop(lambda b: self._checked(b,self._exec_attempt(b,self.exec_batch)),batch,self._split)
+    def _split(self,batch,exc):
+        if len(batch)==1: return [self.exec_fallback(batch[0],exc)]
+        h=len(batch)//2; return list(self._exec_batch(batch[:h]))+list(self._exec_batch(batch[h:]))
+    def _exec(self,items): return self._join([self._exec_batch(b) for b in self._batches(items or [])])
+
+class StreamingBatchNode(BatchNode):
+    def post_item(self,shared,item,exec_res): pass
+    def _run(self,shared):
+        p=self.prep(shared)
+        for i in (p or []): self.post_item(shared,i,super(BatchNode,self)._exec(i))
+        return self.post(shared,p,None)
+
+def _reach(start,edges):
+    out,seen,stack=[],set(),[start]
+    while stack:
+        n=stack.pop()
+        if id(n) in seen: continue
+        seen.add(id(n)); out.append(n); stack.extend(reversed(edges(n)))
+    return out
+
 class Flow(BaseNode):
+    _plan,hooks,retry_budget=None,(),None
     def __init__(self,start=None): super().__init__(); self.start_node=start
-    def start(self,start): self.start_node=start; return start
+    def start(self,start): self.start_node=start; self._plan=None; return start
     def get_next_node(self,curr,action):
         nxt=curr.successors.get(action or "default")
         if not nxt and curr.successors: warnings.warn(f"Flow ends: '{action}' not found in {list(curr.successors)}")
         return nxt
-    def _orch(self,shared,params=None):
+    def compile(self):
+        nodes,idx,stack=[],{},[self.start_node]
+        while stack:
+            n=stack.pop()
+            if n is None or id(n) in idx: continue
+            idx[id(n)]=len(nodes); nodes.append(n); stack.extend(reversed(list(n.successors.values())))
+            if isinstance(n,Flow): n.compile()
+        self._plan=(nodes,[{a:idx[id(s)] for a,s in n.successors.items() if s is not None} for n in nodes],BaseNode._wiring); return self
+    def add_hook(self,hook): self.hooks=self.hooks+(hook,); return self
+    def validate(self,strict=False):
+        issues=[]; self._validate(issues,(type(self).__name__,),set())
+        if strict and issues: raise ValueError("Invalid flow:\n"+"\n".join(m for _,m in issues))
+        return issues
+    def _validate(self,issues,path,seen):
+        if id(self) in seen: return
+        seen.add(id(self)); name=lambda n: "/".join(path+(type(n).__name__,))
+        if self.start_node is None: issues.append(("empty",f"{'/'.join(path)} has no start node")); return
+        acts=lambda n: None if n.actions is None else ["default" if a is None else a for a in n.actions]
+        edges=lambda n: [s for a,s in n.successors.items() if s is not None and (n.actions is None or a in acts(n))]
+        nodes,wired=_reach(self.start_node,edges),_reach(self.start_node,lambda n: [s for s in n.successors.values() if s is not None])
+        live={id(n) for n in nodes}
+        for n in wired:
+            if id(n) not in live: issues.append(("unreachable",f"{name(n)} is only reachable through actions its predecessors never return"))
+        for n in nodes:
+            if n.actions is not None and n.successors:
+                for a in acts(n):
+                    if a not in n.successors: issues.append(("missing_successor",f"{name(n)} can return '{a}' but has no successor for it"))
+                for a in n.successors:
+                    if a not in acts(n): issues.append(("unused_action",f"{name(n)} has a successor for '{a}' but never returns it"))
+            if isinstance(self,AsyncFlow) and not isinstance(n,AsyncNode) and not (self.offload_sync if getattr(n,"offload",None) is None else n.offload):
+                issues.append(("sync_in_async",f"{name(n)} is a sync node in an async flow and will block the event loop; set offload=True to run it in a thread"))
+            if not isinstance(self,AsyncFlow) and isinstance(n,AsyncNode): issues.append(("async_in_sync",f"{name(n)} is async but runs in a sync flow; use an AsyncFlow"))
+            if not isinstance(n,AsyncNode):
+                for b in getattr(n,"branches",()):
+                    if isinstance(b,AsyncNode): issues.append(("async_in_sync",f"{name(n)}/{type(b).__name__} is async but runs in a sync ParallelNode; use an AsyncParallelNode"))
+            for sub in ([n] if isinstance(n,Flow) else [])+[b for b in getattr(n,"branches",()) if isinstance(b,Flow)]: sub._validate(issues,path+(type(sub).__name__,),seen)
+        done,changed={id(n) for n in nodes if n.actions is None or not edges(n) or any(a not in n.successors for a in acts(n))},True
+        while changed:
+            changed=False
+            for n in nodes:
+                if id(n) not in done and any(id(s) in done for s in edges(n)): done.add(id(n)); changed=True
+        stuck=[name(n) for n in nodes if id(n) not in done]
+        if stuck: issues.append(("no_exit",f"Cycle without an exit: {', '.join(stuck)} can never reach a node that ends the flow"))
+    def _orch(self,shared,params=None,run=None):
+        if run is None:
+            if (hs:=_hook_state.get()) is not None or self.hooks: return _HookScope(self,hs,params).orch(shared)
+            run=_run_sync
+        if self._plan: return self._orch_compiled(shared,params,run)
         curr,p,last_action =copy.copy(self.start_node),(params or {**self.params}),None
-        while curr: curr.set_params(p); last_action=curr._run(shared); curr=copy.copy(self.get_next_node(curr,last_action))
+        while curr: curr.set_params(p); last_action=run(curr,shared); curr=copy.copy(self.get_next_node(curr,last_action))
         return last_action
-    def _run(self,shared): p=self.prep(shared); o=self._orch(shared); return self.post(shared,p,o)
+    def _orch_compiled(self,shared,params,run):
+        if self._plan[2]!=BaseNode._wiring: self.compile()
+        (nodes,table,_),p,last_action=self._plan,(params or {**self.params}),None; insts,i=[None]*len(nodes),(0 if nodes else None)
+        while i is not None:
+            if (curr:=insts[i]) is None: curr=copy.copy(nodes[i]); insts[i]=False
+            elif curr is False: curr=insts[i]=copy.copy(nodes[i])
+            else: curr.__dict__=nodes[i].__dict__.copy()
+            curr.set_params(p); last_action=run(curr,shared)
+            if (i:=table[i].get(last_action or "default")) is None and curr.successors: warnings.warn(f"Flow ends: '{last_action}' not found in {list(curr.successors)}")
+        return last_action
+    def _run(self,shared):
+        with _BudgetScope(self.retry_budget): p=self.prep(shared); o=self._orch(shared); return self.post(shared,p,o)
     def post(self,shared,prep_res,exec_res): return exec_res
 
 class BatchFlow(Flow):
     def _run(self,shared):
-        pr=self.prep(shared) or []
-        for bp in pr: self._orch(shared,{**self.params,**bp})
-        return self.post(shared,pr,None)
+        with _BudgetScope(self.retry_budget):
+            pr=self.prep(shared) or []
+            for bp in pr: self._orch(shared,{**self.params,**bp})
+            return self.post(shared,pr,None)
 
 class AsyncNode(Node):
+    timeout=rate_limit=None
     async def prep_async(self,shared): pass
     async def exec_async(self,prep_res): pass
     async def exec_fallback_async(self,prep_res,exc): raise exc
     async def post_async(self,shared,prep_res,exec_res): pass
-    async def _exec(self,prep_res): 
-        for i in range(self.max_retries):
-            try: return await self.exec_async(prep_res)
-            except Exception as e:
-                if i==self.max_retries-1: return await self.exec_fallback_async(prep_res,e)
-                if self.wait>0: await asyncio.sleep(self.wait)
+    async def _exec(self,prep_res):
+        self.cur_retry=0
+        try: return await (self._exec_call(prep_res) if self.cache is None and self.rate_limit is None and self.timeout is None and _deadline.get() is None else self._guarded_exec(prep_res,self._exec_call))
+        except Exception as e: return await self._retry_async(self._exec_attempt,prep_res,self.exec_fallback_async,e)
+    async def _retry_loop_async(self,fn,arg,fallback):
+        self.cur_retry=0
+        try: return await fn(arg)
+        except Exception as e: return await self._retry_async(fn,arg,fallback,e)
+    async def _retry_async(self,fn,arg,fallback,exc):
+        t0,i=time.monotonic(),0  # concurrent items share self, so the loop uses i; cur_retry is for hooks and exec_async
+        while True:
+            if i>=self.max_retries-1 or (d:=self._retry_delay(exc,i,t0)) is None: _emit("on_fallback",self,i,exc); return await fallback(arg,exc)
+            _emit("on_retry",self,i,exc,d)
+            if d>0: await asyncio.sleep(d)
+            i+=1; self.cur_retry=i
+            try: return await fn(arg)
+            except Exception as e: exc=e
+    def rate_cost(self,prep_res): return 0
+    async def _timed_exec(self,prep_res,fn):
+        t,tl=self.timeout,time_left()
+        if tl is not None: t=max(0,tl) if t is None else min(t,max(0,tl))
+        return await (fn(prep_res) if t is None else asyncio.wait_for(fn(prep_res),t))
+    def _exec_call(self,prep_res): return self.exec_async(prep_res)
+    async def _limited_exec(self,prep_res,fn):
+        if self.rate_limit is None: return await self._timed_exec(prep_res,fn)
+        async with self.rate_limit.slot(self.rate_cost(prep_res),self.params.get("tenant")): return await self._timed_exec(prep_res,fn)
+    def _exec_attempt(self,prep_res,fn=None):
+        fn=fn or self._exec_call
+        if self.cache is None and self.rate_limit is None and self.timeout is None and _deadline.get() is None: return fn(prep_res)
+        return self._guarded_exec(prep_res,fn)
+    async def _guarded_exec(self,prep_res,fn):
+        call=lambda: self._limited_exec(prep_res,fn)
+        return await (call() if self.cache is None else self.cache.aget_or_compute(self.cache.key(self,prep_res),call))
+    async def on_cancel_async(self,shared): pass
     async def run_async(self,shared): 
         if self.successors: warnings.warn("Node won't run successors. Use AsyncFlow.")  
-        return await self._run_async(shared)
+        return await _run_cancellable(self,shared)
     async def _run_async(self,shared): p=await self.prep_async(shared); e=await self._exec(p); return await self.post_async(shared,p,e)
     def _run(self,shared): raise RuntimeError("Use run_async.")
 
+async def _run_cancellable(node,shared):
+    try: return await node._run_async(shared)
+    except asyncio.CancelledError: await node.on_cancel_async(shared); raise
+
 class AsyncBatchNode(AsyncNode,BatchNode):
     async def _exec(self,items): return [await super(AsyncBatchNode,self)._exec(i) for i in items]
 
+async def _aiter(items):
+    if hasattr(items,"__aiter__"):
+        async for x in items: yield x
+    else:
+        for x in items: yield x
+
+async def _gather(*aws):
+    ts=[asyncio.ensure_future(a) for a in aws]
+    try: return await asyncio.gather(*ts)
+    except BaseException:
+        for t in ts: t.cancel()
+        await asyncio.gather(*ts,return_exceptions=True); raise
+
+async def _spawn_each(one,items,collect):
+    res,pending,err,i={},set(),[],0
+    async def run(i,x):
+        r=await one(i,x)
+        if collect: res[i]=r
+    def done(t):
+        pending.discard(t)
+        if not t.cancelled() and t.exception() is not None: err.append(t.exception())
+    try:
+        async for x in items:
+            if err: break
+            t=asyncio.ensure_future(run(i,x)); pending.add(t); t.add_done_callback(done); i+=1
+        while pending and not err: await asyncio.wait(set(pending),return_when=asyncio.FIRST_EXCEPTION)
+        if err: raise err[0]
+    finally:
+        for t in list(pending): t.cancel()
+        if pending: await asyncio.gather(*pending,return_exceptions=True)
+    return [res[i] for i in range(len(res))] if collect else None
+
+def _check_limit(limit):
+    if limit is not None and limit<=0: raise ValueError(f"max_concurrency must be positive or None, got {limit}")
+    return limit
+
+async def _bounded_gather(fn,items,limit,on_done=None,collect=True):
+    _check_limit(limit)
+    async def one(i,x):
+        r=await fn(x)
+        if on_done: await on_done(x,r)
+        return r
+    if limit is None and hasattr(items,"__aiter__"): return await _spawn_each(one,items,collect)
+    if limit is None: rs=await _gather(*(one(i,x) for i,x in enumerate(items))); return rs if collect else None
+    if hasattr(items,"__aiter__"):
+        ait,lock,c=items.__aiter__(),asyncio.Lock(),itertools.count()
+        async def pull():
+            async with lock:
+                try: return next(c),await ait.__anext__()
+                except StopAsyncIteration: return None
+    else:
+        it=enumerate(items)
+        async def pull(): return next(it,None)
+    res={}
+    async def worker():
+        while (n:=await pull()) is not None:
+            r=await one(*n)
+            if collect: res[n[0]]=r
+    await _gather(*(worker() for _ in range(limit)))
+    return [res[i] for i in range(len(res))] if collect else None
+
 class AsyncParallelBatchNode(AsyncNode,BatchNode):
-    async def _exec(self,items): return await asyncio.gather(*(super(AsyncParallelBatchNode,self)._exec(i) for i in items))
+    def __init__(self,max_retries=1,wait=0,max_concurrency=None): super().__init__(max_retries,wait); self.max_concurrency=_check_limit(max_concurrency)
+    async def post_item_async(self,shared,item,exec_res): pass
+    async def _exec(self,items,on_done=None): return await _bounded_gather(super(AsyncParallelBatchNode,self)._exec,items or [],self.max_concurrency,on_done)
+    async def _run_async(self,shared):
+        p=await self.prep_async(shared)
+        async def done(i,r): await self.post_item_async(shared,i,r)
+        return await self.post_async(shared,p,await self._exec(p,done if type(self).post_item_async is not AsyncParallelBatchNode.post_item_async else None))
+
+class AsyncVectorizedBatchNode(AsyncNode,VectorizedBatchNode):
+    def __init__(self,max_retries=1,wait=0,batch_size=32,max_batch_bytes=None,max_concurrency=1): super().__init__(max_retries,wait,batch_size,max_batch_bytes); self.max_concurrency=_check_limit(max_concurrency)
+    async def exec_batch_async(self,items): return [await self.exec_async(i) for i in items]
+    async def _exec_batch(self,batch):
+        async def call(b): return self._checked(b,await self._exec_attempt(b,self.exec_batch_async))
+        return await self._retry_loop_async(call,batch,self._split)
+    async def _split(self,batch,exc):
+        if len(batch)==1: return [await self.exec_fallback_async(batch[0],exc)]
+        h=len(batch)//2; return list(await self._exec_batch(batch[:h]))+list(await self._exec_batch(batch[h:]))
+    async def _exec(self,items): return self._join(await _bounded_gather(self._exec_batch,self._batches(items or []),self.max_concurrency))
+
+class AsyncStreamingBatchNode(AsyncNode,BatchNode):
+    def __init__(self,max_retries=1,wait=0,max_concurrency=1): super().__init__(max_retries,wait); self.max_concurrency=_check_limit(max_concurrency)
+    async def post_item_async(self,shared,item,exec_res): pass
+    async def _run_async(self,shared):
+        p=await self.prep_async(shared)
+        async def one(i): await self.post_item_async(shared,i,await super(AsyncStreamingBatchNode,self)._exec(i))
+        await _bounded_gather(one,p or [],self.max_concurrency,collect=False)
+        return await self.post_async(shared,p,None)
 
 class AsyncFlow(Flow,AsyncNode):
-    async def _orch_async(self,shared,params=None):
+    offload_sync,executor,lag_threshold=False,None,None
+    async def _run_node_async(self,curr,shared):
+        if (d:=_deadline.get()) is not None and d<=time.monotonic(): raise DeadlineExceeded(f"Deadline exceeded before {type(curr).__name__}")
+        if isinstance(curr,AsyncNode):
+            try: return await curr._run_async(shared)
+            except asyncio.CancelledError: await curr.on_cancel_async(shared); raise
+        o=getattr(curr,"offload",None)
+        if self.offload_sync if o is None else o:
+            return await asyncio.get_running_loop().run_in_executor(self.executor,functools.partial(contextvars.copy_context().run,curr._run,shared))
+        t=time.perf_counter(); r=curr._run(shared); dt=time.perf_counter()-t
+        if self.lag_threshold is not None and dt>self.lag_threshold: warnings.warn(f"Sync node {type(curr).__name__} blocked the event loop for {dt:.3f}s; set offload=True on it or offload_sync=True on the flow")
+        return r
+    async def _orch_async(self,shared,params=None,run=None):
+        if run is None:
+            if (hs:=_hook_state.get()) is not None or self.hooks: return await _HookScope(self,hs,params).orch_async(shared)
+            run=self._run_node_async
+        if self._plan: return await self._orch_compiled_async(shared,params,run)
         curr,p,last_action =copy.copy(self.start_node),(params or {**self.params}),None
-        while curr: curr.set_params(p); last_action=await curr._run_async(shared) if isinstance(curr,AsyncNode) else curr._run(shared); curr=copy.copy(self.get_next_node(curr,last_action))
+        while curr: curr.set_params(p); last_action=await run(curr,shared); curr=copy.copy(self.get_next_node(curr,last_action))
+        return last_action
+    async def _orch_compiled_async(self,shared,params,run):
+        if self._plan[2]!=BaseNode._wiring: self.compile()
+        (nodes,table,_),p,last_action=self._plan,(params or {**self.params}),None; insts,i=[None]*len(nodes),(0 if nodes else None)
+        while i is not None:
+            if (curr:=insts[i]) is None: curr=copy.copy(nodes[i]); insts[i]=False
+            elif curr is False: curr=insts[i]=copy.copy(nodes[i])
+            else: curr.__dict__=nodes[i].__dict__.copy()
+            curr.set_params(p); last_action=await run(curr,shared)
+            if (i:=table[i].get(last_action or "default")) is None and curr.successors: warnings.warn(f"Flow ends: '{last_action}' not found in {list(curr.successors)}")
         return last_action
-    async def _run_async(self,shared): p=await self.prep_async(shared); o=await self._orch_async(shared); return await self.post_async(shared,p,o)
+    async def _run_async(self,shared):
+        with _DeadlineScope(self.timeout),_BudgetScope(self.retry_budget): p=await self.prep_async(shared); o=await self._orch_async(shared); return await self.post_async(shared,p,o)
     async def post_async(self,shared,prep_res,exec_res): return exec_res
 
 class AsyncBatchFlow(AsyncFlow,BatchFlow):
     async def _run_async(self,shared):
-        pr=await self.prep_async(shared) or []
-        for bp in pr: await self._orch_async(shared,{**self.params,**bp})
-        return await self.post_async(shared,pr,None)
+        with _DeadlineScope(self.timeout),_BudgetScope(self.retry_budget):
+            pr=await self.prep_async(shared) or []
+            async for bp in _aiter(pr): await self._orch_async(shared,{**self.params,**bp})
+            return await self.post_async(shared,pr,None)
 
 class AsyncParallelBatchFlow(AsyncFlow,BatchFlow):
+    def __init__(self,start=None,max_concurrency=None): super().__init__(start); self.max_concurrency=_check_limit(max_concurrency)
     async def _run_async(self,shared): 
-        pr=await self.prep_async(shared) or []
-        await asyncio.gather(*(self._orch_async(shared,{**self.params,**bp}) for bp in pr))
-        return await self.post_async(shared,pr,None)
\ No newline at end of file
+        with _DeadlineScope(self.timeout),_BudgetScope(self.retry_budget):
+            pr=await self.prep_async(shared) or []
+            await _bounded_gather(lambda bp: self._orch_async(shared,{**self.params,**bp}),pr,self.max_concurrency,collect=False)
+            return await self.post_async(shared,pr,None)
+
+def _same(a,b):
+    try: return a is b or bool(a==b)
+    except Exception: return False
+
+class ParallelNode(BaseNode):
+    def __init__(self,*branches,max_workers=None): super().__init__(); self.branches,self.max_workers=[(AsyncFlow if isinstance(b,AsyncNode) else Flow)(start=b) if b.successors and not isinstance(b,Flow) else b for b in branches],max_workers
+    def merge(self,shared,branch_stores):
+        out,deleted=dict(),set()
+        for local in branch_stores:
+            for k,v in local.items():
+                if k in shared and shared[k] is v: continue
+                if k in out and not _same(out[k],v): raise ValueError(f"Parallel branches wrote conflicting values for '{k}'")
+                out[k]=v
+            deleted.update(shared.keys()-local.keys())
+        for k in deleted: shared.pop(k,None)
+        shared.update(out)
+    def _branch(self,b,shared): local,c=dict(shared),copy.copy(b); c.set_params({**self.params}); return c._run(local),local
+    def _run(self,shared):
+        p=self.prep(shared)
+        with ThreadPoolExecutor(self.max_workers or len(self.branches) or 1) as ex: rs=[f.result() for f in [ex.submit(contextvars.copy_context().run,self._branch,b,shared) for b in self.branches]]
+        self.merge(shared,[l for _,l in rs]); return self.post(shared,p,[a for a,_ in rs])
+
+class AsyncParallelNode(ParallelNode,AsyncNode):
+    async def _branch_async(self,b,shared):
+        local,c=dict(shared),copy.copy(b); c.set_params({**self.params})
+        if isinstance(c,AsyncNode): return await _run_cancellable(c,local),local
+        return await asyncio.get_running_loop().run_in_executor(None,functools.partial(contextvars.copy_context().run,c._run,local)),local
+    async def _run_async(self,shared):
+        p=await self.prep_async(shared); rs=await _gather(*(self._branch_async(b,shared) for b in self.branches))
+        self.merge(shared,[l for _,l in rs]); return await self.post_async(shared,p,[a for a,_ in rs])
+    def _run(self,shared): raise RuntimeError("Use run_async.")
@@ -0,0 +1,125 @@
+import asyncio, hashlib, json, pickle, sqlite3, threading, time
+from collections import OrderedDict
+
+_MISSING=object()
+
+def _encode(o):
+    if isinstance(o,(set,frozenset)): return {"__set__":sorted(stable_hash(x) for x in o)}
+    if isinstance(o,(bytes,bytearray)): return {"__bytes__":hashlib.sha256(o).hexdigest()}
+    return {"__pickle__":hashlib.sha256(pickle.dumps(o,4)).hexdigest()}
+
+def _tag(o):
+    # JSON has no tuples or non-string keys; tag them so (1,2) and [1,2], {1:..} and {"1":..} hash differently
+    if isinstance(o,tuple): return {"__tuple__":[_tag(x) for x in o]}
+    if isinstance(o,list): return [_tag(x) for x in o]
+    if isinstance(o,dict):
+        if all(isinstance(k,str) for k in o): return {k:_tag(v) for k,v in o.items()}
+        return {"__dict__":sorted([stable_hash(k),_tag(v)] for k,v in o.items())}
+    return o
+
+def stable_hash(*parts):
+    """Hex digest of JSON-like data that is stable across processes; other objects are hashed by their pickle."""
+    try: data=json.dumps([_tag(p) for p in parts],sort_keys=True,default=_encode,separators=(",",":")).encode()
+    except (TypeError,ValueError): data=pickle.dumps(parts,4)
+    return hashlib.sha256(data).hexdigest()
+
+class SqliteStore:
+    """On-disk tier: pickled values in one sqlite table, evicted by TTL and least-recent access."""
+    def __init__(self,path,max_rows=None):
+        self.max_rows,self.lock=max_rows,threading.Lock()
+        self.db=sqlite3.connect(path,check_same_thread=False)
+        self.db.execute("CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value BLOB, expires REAL, accessed REAL)")
+    def get(self,key):
+        """(value, expires) for a live key, or _MISSING."""
+        with self.lock:
+            row=self.db.execute("SELECT value, expires FROM cache WHERE key=?",(key,)).fetchone()
+            if row is None: return _MISSING
+            if row[1] is not None and row[1]<time.time(): self.db.execute("DELETE FROM cache WHERE key=?",(key,)); self.db.commit(); return _MISSING
+            self.db.execute("UPDATE cache SET accessed=? WHERE key=?",(time.time(),key)); self.db.commit()
+        return pickle.loads(row[0]),row[1]
+    def set(self,key,blob,expires):
+        with self.lock:
+            self.db.execute("INSERT OR REPLACE INTO cache VALUES (?,?,?,?)",(key,blob,expires,time.time()))
+            if self.max_rows: self.db.execute("DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY accessed DESC LIMIT -1 OFFSET ?)",(self.max_rows,))
+            self.db.commit()
+    def clear(self):
+        with self.lock: self.db.execute("DELETE FROM cache"); self.db.commit()
+
+class _Call:
+    def __init__(self): self.event,self.value,self.error=threading.Event(),None,None
+
+class ExecCache:
+    """
+    Memoizes Node.exec results. Assign to `node.cache` (or as a class attribute).
+
+    Entries are keyed by the node class, its params and prep_res. The memory tier is an LRU bounded by
+    `max_entries` and `max_bytes` (pickled size); `path` adds a sqlite tier that survives restarts.
+    Concurrent identical calls share one computation. Failed attempts are never cached.
+    """
+    def __init__(self,max_entries=1024,max_bytes=None,ttl=None,path=None,max_disk_rows=None):
+        self.max_entries,self.max_bytes,self.ttl=max_entries,max_bytes,ttl
+        self.disk=SqliteStore(path,max_disk_rows) if path else None
+        self.entries,self.size,self.lock=OrderedDict(),0,threading.Lock()
+        self.inflight,self.ainflight={},{}  # key -> _Call; (loop, key) -> future on that loop
+        self.hits=self.misses=self.evictions=0
+    def key(self,node,prep_res): return stable_hash(f"{type(node).__module__}.{type(node).__qualname__}",getattr(node,"cache_version",None),node.params,prep_res)
+    def get(self,key,default=_MISSING):
+        with self.lock:
+            e=self.entries.get(key)
+            if e is not None:
+                if e[2] is None or e[2]>time.time(): self.entries.move_to_end(key); self.hits+=1; return e[0]
+                self._drop(key)
+        row=self.disk.get(key) if self.disk else _MISSING
+        with self.lock:
+            if row is _MISSING: self.misses+=1
+            else: self.hits+=1
+        if row is _MISSING: return default
+        self._put(key,row[0],None,row[1],keep_expiry=True); return row[0]
+    def set(self,key,value):
+        blob=pickle.dumps(value,4) if self.disk or self.max_bytes else None
+        expires=time.time()+self.ttl if self.ttl is not None else None
+        self._put(key,value,blob,expires)
+        if self.disk: self.disk.set(key,blob,expires)
+    def _put(self,key,value,blob,expires=None,keep_expiry=False):
+        size=len(blob if blob is not None else pickle.dumps(value,4)) if self.max_bytes else 0
+        if expires is None and self.ttl is not None and not keep_expiry: expires=time.time()+self.ttl
+        with self.lock:
+            if key in self.entries: self._drop(key)
+            self.entries[key]=(value,size,expires); self.size+=size
+            while self.entries and (len(self.entries)>self.max_entries or (self.max_bytes and self.size>self.max_bytes)):
+                self._drop(next(iter(self.entries))); self.evictions+=1
+    def _drop(self,key): self.size-=self.entries.pop(key)[1]
+    def clear(self):
+        with self.lock: self.entries.clear(); self.size=0
+        if self.disk: self.disk.clear()
+    def get_or_compute(self,key,fn):
+        if (v:=self.get(key)) is not _MISSING: return v
+        with self.lock:
+            call=self.inflight.get(key); leader=call is None
+            if leader: call=self.inflight[key]=_Call()
+        if not leader:
+            call.event.wait()
+            if call.error is not None: raise call.error
+            return call.value
+        try: call.value=v=fn(); self.set(key,v); return v
+        except BaseException as e: call.error=e; raise
+        finally:
+            with self.lock: del self.inflight[key]
+            call.event.set()
+    async def aget_or_compute(self,key,fn):
+        loop=asyncio.get_running_loop()
+        while True:
+            if (v:=self.get(key)) is not _MISSING: return v
+            with self.lock:
+                fut=self.ainflight.get((loop,key)); leader=fut is None
+                if leader: fut=self.ainflight[(loop,key)]=loop.create_future()
+            if leader: break
+            try: return await asyncio.shield(fut)
+            except asyncio.CancelledError:
+                if not fut.cancelled() or getattr(asyncio.current_task(),"cancelling",int)(): raise
+                # The leader was cancelled, not this caller: go round again and take over
+        try: v=await fn(); self.set(key,v); fut.set_result(v); return v
+        except asyncio.CancelledError: fut.cancel(); raise
+        except BaseException as e: fut.set_exception(e); fut.exception(); raise
+        finally:
+            with self.lock: self.ainflight.pop((loop,key),None)
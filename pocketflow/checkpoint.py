@@ -0,0 +1,194 @@
+import copy, json, os, pickle, sqlite3, threading
+from pocketflow import Flow, BatchFlow, AsyncNode, AsyncFlow, AsyncBatchFlow, AsyncParallelBatchFlow, _DeadlineScope, _BudgetScope, _HookScope, _hook_state, _run_sync, _reach, _bounded_gather, _aiter
+
+_SCALARS=(str,bytes,int,float,complex,bool,type(None))
+
+class TrackedDict(dict):
+    """Shared store that remembers which keys were written, deleted, or read as mutable values since the last delta."""
+    def __init__(self,*args,**kwargs): super().__init__(*args,**kwargs); self.dirty,self.deleted=set(self),set()
+    def _touch(self,key,value):
+        if not isinstance(value,_SCALARS): self.dirty.add(key)
+        return value
+    def __getitem__(self,key): return self._touch(key,super().__getitem__(key))
+    def get(self,key,default=None): return self[key] if key in self else default
+    def __setitem__(self,key,value): super().__setitem__(key,value); self.dirty.add(key); self.deleted.discard(key)
+    def __delitem__(self,key): super().__delitem__(key); self.dirty.discard(key); self.deleted.add(key)
+    def setdefault(self,key,default=None):
+        if key not in self: self[key]=default
+        return self[key]
+    def pop(self,key,*default):
+        if key not in self:
+            if default: return default[0]
+            raise KeyError(key)
+        value=self[key]; del self[key]; return value
+    def popitem(self): key,value=super().popitem(); self.dirty.discard(key); self.deleted.add(key); return key,value
+    def update(self,*args,**kwargs):
+        for key,value in dict(*args,**kwargs).items(): self[key]=value
+    def clear(self): self.deleted.update(self); self.dirty.clear(); super().clear()
+    def values(self): return [self[k] for k in self]
+    def items(self): return [(k,self[k]) for k in self]
+    def take_delta(self):
+        changed={k:dict.__getitem__(self,k) for k in self.dirty}; deleted=self.deleted
+        self.dirty,self.deleted=set(),set(); return changed,deleted
+
+class SqliteCheckpointStore:
+    """Default store: frame records as JSON and one pickled row per shared-store key."""
+    def __init__(self,path="checkpoints.db"):
+        self.db,self.lock=sqlite3.connect(path,check_same_thread=False),threading.Lock()
+        self.db.execute("CREATE TABLE IF NOT EXISTS frames (run_id TEXT, key TEXT, value TEXT, PRIMARY KEY (run_id, key))")
+        self.db.execute("CREATE TABLE IF NOT EXISTS shared (run_id TEXT, key BLOB, value BLOB, PRIMARY KEY (run_id, key))")
+    def load(self,run_id):
+        with self.lock:
+            frames={k:json.loads(v) for k,v in self.db.execute("SELECT key, value FROM frames WHERE run_id=?",(run_id,))}
+            shared={pickle.loads(k):pickle.loads(v) for k,v in self.db.execute("SELECT key, value FROM shared WHERE run_id=?",(run_id,))}
+        return (frames,shared) if frames else None
+    def save(self,run_id,frames,dropped_frames,changed,deleted):
+        with self.lock, self.db:
+            self.db.executemany("INSERT OR REPLACE INTO frames VALUES (?,?,?)",[(run_id,k,json.dumps(v)) for k,v in frames.items()])
+            self.db.executemany("DELETE FROM frames WHERE run_id=? AND key=?",[(run_id,k) for k in dropped_frames])
+            self.db.executemany("INSERT OR REPLACE INTO shared VALUES (?,?,?)",[(run_id,pickle.dumps(k,4),pickle.dumps(v,4)) for k,v in changed.items()])
+            self.db.executemany("DELETE FROM shared WHERE run_id=? AND key=?",[(run_id,pickle.dumps(k,4)) for k in deleted])
+    def clear(self,run_id):
+        with self.lock, self.db: self.db.execute("DELETE FROM frames WHERE run_id=?",(run_id,)); self.db.execute("DELETE FROM shared WHERE run_id=?",(run_id,))
+
+class FileCheckpointStore:
+    """Directory store: frames.json per run plus one pickle file per shared-store key."""
+    def __init__(self,root="checkpoints"): self.root=root
+    def _dir(self,run_id): return os.path.join(self.root,run_id)
+    def _key_file(self,run_id,key): return os.path.join(self._dir(run_id),"shared",pickle.dumps(key,4).hex()+".pkl")
+    def _frames(self,run_id):
+        path=os.path.join(self._dir(run_id),"frames.json")
+        if not os.path.exists(path): return None
+        with open(path) as f: return json.load(f)
+    def load(self,run_id):
+        if (frames:=self._frames(run_id)) is None: return None
+        shared,sdir={},os.path.join(self._dir(run_id),"shared")
+        for name in os.listdir(sdir):
+            with open(os.path.join(sdir,name),"rb") as f: shared[pickle.loads(bytes.fromhex(name[:-4]))]=pickle.load(f)
+        return frames,shared
+    def _write(self,path,data,mode="wb"):
+        with open(path+".tmp",mode) as f: f.write(data)
+        os.replace(path+".tmp",path)
+    def save(self,run_id,frames,dropped_frames,changed,deleted):
+        os.makedirs(os.path.join(self._dir(run_id),"shared"),exist_ok=True)
+        for k,v in changed.items(): self._write(self._key_file(run_id,k),pickle.dumps(v,4))
+        for k in deleted:
+            if os.path.exists(p:=self._key_file(run_id,k)): os.remove(p)
+        current=self._frames(run_id) or {}; current.update(frames)
+        for k in dropped_frames: current.pop(k,None)
+        self._write(os.path.join(self._dir(run_id),"frames.json"),json.dumps(current),"w")
+    def clear(self,run_id):
+        import shutil; shutil.rmtree(self._dir(run_id),ignore_errors=True)
+
+def _body(node):
+    """The flow class whose run a checkpointed step replays for node, or None if node runs as a single step."""
+    t=type(node)
+    if isinstance(node,AsyncFlow): return next((c for c in (AsyncParallelBatchFlow,AsyncBatchFlow,AsyncFlow) if isinstance(node,c) and t._run_async is c._run_async),None)
+    return next((c for c in (BatchFlow,Flow) if isinstance(node,c) and t._run is c._run),None)
+
+class _Run:
+    def __init__(self,store,run_id,frames,shared): self.store,self.run_id,self.frames,self.shared,self.plans=store,run_id,frames,shared,{}
+    def commit(self,frames,child):
+        dropped=[k for k in self.frames if k==child or k.startswith(child+"/") or k.startswith(child+"#")]
+        for k in dropped: del self.frames[k]
+        self.frames.update(frames); changed,deleted=self.shared.take_delta()
+        self.store.save(self.run_id,frames,dropped,changed,deleted)
+    def plan(self,flow):
+        if (plan:=self.plans.get(id(flow))) is None:
+            nodes=[] if flow.start_node is None else _reach(flow.start_node,lambda n: [s for s in n.successors.values() if s is not None])
+            plan=self.plans[id(flow)]=(nodes,{id(n):i for i,n in enumerate(nodes)})
+        return plan
+    def start(self,flow,key,params):
+        nodes,idx=self.plan(flow); rec=self.frames.get(key)
+        return nodes,idx,*((rec["next"],rec["action"]) if rec and "next" in rec else ((0 if nodes else None),None)),(params or {**flow.params})
+    def visit(self,nodes,i,p,key):
+        curr=copy.copy(nodes[i]); curr.set_params(p); child=f"{key}/{i}"; body=_body(curr)
+        if body in (Flow,BatchFlow): curr._run=lambda shared: self.step(curr,child)
+        elif body is not None: curr._run_async=lambda shared: self.step_async(curr,child)
+        return curr,child
+    def advance(self,flow,idx,curr,child,key,last):
+        i=None if (nxt:=flow.get_next_node(curr,last)) is None else idx[id(nxt)]
+        self.commit({key:{"next":i,"action":last}},child); return i
+    def orch(self,flow,key,params):
+        def walk(shared,params,run):
+            nodes,idx,i,last,p=self.start(flow,key,params)
+            while i is not None: curr,child=self.visit(nodes,i,p,key); last=run(curr,shared); i=self.advance(flow,idx,curr,child,key,last)
+            return last
+        return _HookScope(flow,hs,params).orch(self.shared,walk) if (hs:=_hook_state.get()) is not None or flow.hooks else walk(self.shared,params,_run_sync)
+    def step(self,node,key):
+        body=_body(node)
+        if body is BatchFlow:
+            with _BudgetScope(node.retry_budget):
+                pr,done=node.prep(self.shared) or [],self.frames.get(key,{}).get("done",0)
+                for j,bp in enumerate(pr):
+                    if j<done: continue
+                    self.orch(node,f"{key}#{j}",{**node.params,**bp}); self.commit({key:{"done":j+1}},f"{key}#{j}")
+                return node.post(self.shared,pr,None)
+        if body is Flow:
+            with _BudgetScope(node.retry_budget): p=node.prep(self.shared); return node.post(self.shared,p,self.orch(node,key,None))
+        return node._run(self.shared)
+    async def orch_async(self,flow,key,params):
+        async def walk(shared,params,run):
+            nodes,idx,i,last,p=self.start(flow,key,params)
+            while i is not None: curr,child=self.visit(nodes,i,p,key); last=await run(curr,shared); i=self.advance(flow,idx,curr,child,key,last)
+            return last
+        return await (_HookScope(flow,hs,params).orch_async(self.shared,walk) if (hs:=_hook_state.get()) is not None or flow.hooks else walk(self.shared,params,flow._run_node_async))
+    async def step_async(self,node,key):
+        body=_body(node)
+        if body is AsyncParallelBatchFlow:
+            with _DeadlineScope(node.timeout),_BudgetScope(node.retry_budget):
+                pr,done=await node.prep_async(self.shared) or [],set(self.frames.get(key,{}).get("done",[]))
+                async def one(jbp):
+                    j,bp=jbp
+                    if j in done: return
+                    await self.orch_async(node,f"{key}#{j}",{**node.params,**bp}); done.add(j); self.commit({key:{"done":sorted(done)}},f"{key}#{j}")
+                async def numbered():
+                    j=0
+                    async for bp in _aiter(pr): yield j,bp; j+=1
+                await _bounded_gather(one,numbered(),node.max_concurrency,collect=False)
+                return await node.post_async(self.shared,pr,None)
+        if body is AsyncBatchFlow:
+            with _DeadlineScope(node.timeout),_BudgetScope(node.retry_budget):
+                pr,done,j=await node.prep_async(self.shared) or [],self.frames.get(key,{}).get("done",0),0
+                async for bp in _aiter(pr):
+                    if j>=done: await self.orch_async(node,f"{key}#{j}",{**node.params,**bp}); self.commit({key:{"done":j+1}},f"{key}#{j}")
+                    j+=1
+                return await node.post_async(self.shared,pr,None)
+        if body is AsyncFlow:
+            with _DeadlineScope(node.timeout),_BudgetScope(node.retry_budget): p=await node.prep_async(self.shared); return await node.post_async(self.shared,p,await self.orch_async(node,key,None))
+        if body is not None: return self.step(node,key)
+        return await node._run_async(self.shared) if isinstance(node,AsyncNode) else node._run(self.shared)
+
+class Checkpointer:
+    """
+    Runs a Flow while persisting progress after every step, and resumes an interrupted run with the same run_id.
+
+    Each (nested) flow records the next node to run and the last action; batch flows record finished param sets.
+    Only shared-store keys written, deleted, or read as mutable values since the previous step are re-serialized.
+    On resume, prep() of enclosing flows runs again, so it must be deterministic.
+    """
+    def __init__(self,store=None,keep=False):
+        self.store=SqliteCheckpointStore(store or "checkpoints.db") if store is None or isinstance(store,str) else store
+        self.keep=keep
+    def _begin(self,shared,run_id):
+        state=self.store.load(run_id)
+        if state: shared.clear(); shared.update(state[1])
+        run=_Run(self.store,run_id,state[0] if state else {},TrackedDict(shared))
+        if state: run.shared.dirty.clear()
+        else: run.commit({"__run__":{}},"__run__")
+        return run
+    def _finish(self,run,shared):
+        shared.clear(); shared.update(dict(dict.items(run.shared)))
+    def run(self,flow,shared,run_id):
+        run=self._begin(shared,run_id)
+        try: last=run.step(flow,"root")
+        finally: self._finish(run,shared)
+        if not self.keep: self.store.clear(run_id)
+        return last
+    async def run_async(self,flow,shared,run_id):
+        run=self._begin(shared,run_id)
+        try: last=await run.step_async(flow,"root")
+        finally: self._finish(run,shared)
+        if not self.keep: self.store.clear(run_id)
+        return last
+    def clear(self,run_id): self.store.clear(run_id)
@@ -0,0 +1,49 @@
+import asyncio, inspect, time, weakref
+
+class _Window:
+    def __init__(self): self.pending,self.inflight,self.handle,self.tasks=[],0,None,set()  # tasks: strong refs to running _dispatch tasks
+
+class Coalescer:
+    """
+    Merges concurrent single-item calls into batched calls. `fn(items)` returns one result per item (sync or async).
+
+    When no batch is in flight, waiting calls are dispatched on the next loop iteration, so an idle
+    caller adds no delay. While a batch is in flight, new calls gather for up to `max_wait` seconds
+    (or until the batch finishes, or `max_batch` calls are waiting), so batches grow with load.
+    """
+    def __init__(self,fn,max_batch=32,max_wait=0.005):
+        self.fn,self.max_batch,self.max_wait=fn,max_batch,max_wait
+        self.windows=weakref.WeakKeyDictionary()
+        self.calls=self.batches=0; self.waited=0.0
+    async def __call__(self,item):
+        loop=asyncio.get_running_loop(); w=self.windows.get(loop)
+        if w is None: w=self.windows[loop]=_Window()
+        fut=loop.create_future(); w.pending.append((item,fut,time.monotonic())); self.calls+=1
+        if len(w.pending)>=self.max_batch: self._flush(loop,w)
+        elif w.handle is None: w.handle=loop.call_soon(self._flush,loop,w) if not w.inflight else loop.call_later(self.max_wait,self._flush,loop,w)
+        return await fut
+    def _flush(self,loop,w):
+        if w.handle is not None: w.handle.cancel(); w.handle=None
+        while w.pending:
+            batch,w.pending=w.pending[:self.max_batch],w.pending[self.max_batch:]
+            batch=[c for c in batch if not c[1].done()]
+            if batch:
+                w.inflight+=1; self.batches+=1
+                t=loop.create_task(self._dispatch(loop,w,batch)); w.tasks.add(t); t.add_done_callback(w.tasks.discard)
+    async def _dispatch(self,loop,w,batch):
+        now=time.monotonic(); self.waited+=sum(now-t for _,_,t in batch)
+        try:
+            res=self.fn([i for i,_,_ in batch])
+            if inspect.isawaitable(res): res=await res
+            res=list(res)
+            if len(res)!=len(batch): raise ValueError(f"Coalesced call returned {len(res)} results for {len(batch)} items")
+        except BaseException as e:
+            for _,f,_ in batch:
+                if not f.done(): f.cancel() if isinstance(e,asyncio.CancelledError) else f.set_exception(e)
+            if not isinstance(e,Exception): raise
+        else:
+            for (_,f,_),r in zip(batch,res):
+                if not f.done(): f.set_result(r)
+        finally:
+            w.inflight-=1
+            if w.pending and not w.inflight: self._flush(loop,w)
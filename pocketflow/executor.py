@@ -0,0 +1,73 @@
+import asyncio, collections, contextvars, functools, time
+from pocketflow import AsyncNode
+
+class Overloaded(RuntimeError): pass
+
+class _Job:
+    def __init__(self,tenant,priority): self.tenant,self.priority,self.fut,self.t,self.granted=tenant,priority,asyncio.get_running_loop().create_future(),time.monotonic(),False
+
+class _TenantStats:
+    def __init__(self): self.submitted=self.rejected=self.completed=self.failed=self.cancelled=self.started=0; self.queue_time=self.max_queue_time=0.0
+    def as_dict(self): return {**vars(self),"avg_queue_time":self.queue_time/self.started if self.started else 0.0}
+
+class FlowExecutor:
+    """
+    Runs submitted flows with global and per-tenant concurrency caps. Waiting runs are started by highest
+    `priority` first, then by weighted fair share between tenants. Submissions beyond the queue limits,
+    or that wait longer than `queue_timeout`, raise `Overloaded`. A tenant with nothing queued or running
+    loses its scheduling state; stats are kept for the `max_idle_tenants` most recently active idle tenants.
+    """
+    def __init__(self,max_running=16,max_per_tenant=None,max_queued=1000,max_queued_per_tenant=None,queue_timeout=None,weights=None,max_idle_tenants=1000):
+        self.max_running,self.max_per_tenant,self.max_queued,self.max_queued_per_tenant=max_running,max_per_tenant,max_queued,max_queued_per_tenant
+        self.queue_timeout,self.weights=queue_timeout,weights or {}
+        self.levels,self.passes,self.vtime={},{},0.0
+        self.running,self.queued,self.running_by,self.queued_by=0,0,collections.Counter(),collections.Counter()
+        self.tenants,self.idle,self.max_idle_tenants=collections.defaultdict(_TenantStats),collections.OrderedDict(),max_idle_tenants
+    async def submit(self,flow,shared,tenant=None,priority=0):
+        await self._admit(tenant,priority); s=self.tenants[tenant]
+        try:
+            if isinstance(flow,AsyncNode): r=await flow.run_async(shared)
+            else: r=await asyncio.get_running_loop().run_in_executor(None,functools.partial(contextvars.copy_context().run,flow.run,shared))
+        except asyncio.CancelledError: s.cancelled+=1; raise
+        except BaseException: s.failed+=1; raise
+        else: s.completed+=1; return r
+        finally: self._release(tenant)
+    async def _admit(self,tenant,priority):
+        self.idle.pop(tenant,None); s=self.tenants[tenant]; s.submitted+=1
+        if self.queued>=self.max_queued: s.rejected+=1; self._settle(tenant); raise Overloaded(f"Executor queue is full ({self.queued} waiting)")
+        if self.max_queued_per_tenant is not None and self.queued_by[tenant]>=self.max_queued_per_tenant: s.rejected+=1; raise Overloaded(f"Tenant {tenant!r} has {self.queued_by[tenant]} runs waiting")
+        job=_Job(tenant,priority); q=self.levels.setdefault(priority,{})
+        if tenant not in q: q[tenant]=collections.deque(); self.passes[tenant]=max(self.passes.get(tenant,0.0),self.vtime)
+        q[tenant].append(job); self.queued+=1; self.queued_by[tenant]+=1
+        self._dispatch()
+        try: await (job.fut if self.queue_timeout is None else asyncio.wait_for(asyncio.shield(job.fut),self.queue_timeout))
+        except (asyncio.CancelledError,asyncio.TimeoutError) as e:
+            if job.granted:
+                if isinstance(e,asyncio.TimeoutError): return
+                s.cancelled+=1; self._release(tenant); raise
+            if job in self.levels.get(priority,{}).get(tenant,()): self._dequeue(job)
+            self._settle(tenant)
+            if isinstance(e,asyncio.CancelledError): s.cancelled+=1; raise
+            s.rejected+=1; raise Overloaded(f"Run for tenant {tenant!r} waited longer than {self.queue_timeout}s to start") from None
+    def _eligible(self,tenant): return self.max_per_tenant is None or self.running_by[tenant]<self.max_per_tenant
+    def _dequeue(self,job):
+        q=self.levels[job.priority]; q[job.tenant].remove(job); self.queued-=1; self.queued_by[job.tenant]-=1
+        if not q[job.tenant]: del q[job.tenant]
+        if not q: del self.levels[job.priority]
+    def _pick(self):
+        for p in sorted(self.levels,reverse=True):
+            ts=[t for t in self.levels[p] if self._eligible(t)]
+            if ts: t=min(ts,key=self.passes.__getitem__); self.vtime=self.passes[t]; self.passes[t]+=1/self.weights.get(t,1); return self.levels[p][t][0]
+    def _dispatch(self):
+        while self.running<self.max_running and (job:=self._pick()) is not None:
+            self._dequeue(job)
+            if job.fut.done(): continue
+            job.granted=True; self.running+=1; self.running_by[job.tenant]+=1
+            s=self.tenants[job.tenant]; w=time.monotonic()-job.t; s.started+=1; s.queue_time+=w; s.max_queue_time=max(s.max_queue_time,w)
+            job.fut.set_result(None)
+    def _release(self,tenant): self.running-=1; self.running_by[tenant]-=1; self._dispatch(); self._settle(tenant)
+    def _settle(self,tenant):
+        if self.queued_by[tenant] or self.running_by[tenant]: return
+        del self.queued_by[tenant],self.running_by[tenant]; self.passes.pop(tenant,None); self.idle[tenant]=None
+        while len(self.idle)>self.max_idle_tenants: self.tenants.pop(self.idle.popitem(last=False)[0],None)
+    def stats(self): return {"running":self.running,"queued":self.queued,"tenants":{t:s.as_dict() for t,s in self.tenants.items()}}
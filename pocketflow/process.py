@@ -0,0 +1,63 @@
+import copy, pickle
+from concurrent.futures import ProcessPoolExecutor
+from pocketflow import BatchFlow, _same
+from pocketflow.checkpoint import TrackedDict
+from pocketflow.spec import to_spec, load_flow
+
+_worker=None
+
+def _init_worker(flow,blob):
+    global _worker
+    if isinstance(flow,dict): flow=load_flow(flow,registry={},allow_import=True)
+    _worker=(flow,blob,pickle.loads(blob))
+
+def _portable(exc):
+    try: pickle.loads(pickle.dumps(exc)); return exc
+    except Exception: return RuntimeError(f"{type(exc).__name__}: {exc}")
+
+def _run_chunk(chunk):
+    flow,blob,base=_worker; out=[]
+    for i,bp in chunk:
+        local=TrackedDict(pickle.loads(blob)); local.dirty.clear()
+        try: flow._orch(local,{**flow.params,**bp})
+        except Exception as e: out.append((i,None,_portable(e))); continue
+        changed,deleted=local.take_delta()
+        out.append((i,({k:v for k,v in changed.items() if k not in base or not _same(base[k],v)},deleted),None))
+    return out
+
+def _merge_value(base,cur,new):
+    if isinstance(base,dict) and isinstance(cur,dict) and isinstance(new,dict):
+        for k in base.keys()-new.keys(): cur.pop(k,None)
+        for k,v in new.items():
+            if k not in base or not _same(base[k],v): cur[k]=_merge_value(base.get(k),cur.get(k),v)
+        return cur
+    if isinstance(base,list) and isinstance(cur,list) and isinstance(new,list) and new[:len(base)]==base: cur.extend(new[len(base):]); return cur
+    return new
+
+class ProcessBatchFlow(BatchFlow):
+    """
+    BatchFlow that runs each param set in a worker process, starting from a snapshot of the shared store.
+    Each run's changes come back as a delta and are merged in param-set order.
+    """
+    def __init__(self,start=None,max_workers=None,chunk_size=1): super().__init__(start); self.max_workers,self.chunk_size=max_workers,chunk_size
+    def merge(self,shared,base,params,changed,deleted):
+        for k in deleted: shared.pop(k,None)
+        for k,v in changed.items(): shared[k]=_merge_value(base.get(k,type(v)() if type(v) in (list,dict) else None),shared[k],v) if k in shared else v
+    def on_error(self,shared,params,exc): raise exc
+    def _shipped(self):
+        f=copy.copy(self); f.successors={}
+        try: return to_spec(f,registry={})
+        except TypeError: return f
+    def _run(self,shared):
+        pr=list(self.prep(shared) or []); blob=pickle.dumps(dict(shared),4); base=pickle.loads(blob); n=max(1,self.chunk_size)
+        items=list(enumerate(pr)); chunks,errors=[items[i:i+n] for i in range(0,len(items),n)],[]
+        with ProcessPoolExecutor(self.max_workers,initializer=_init_worker,initargs=(self._shipped(),blob)) as ex:
+            futures=[(c,ex.submit(_run_chunk,c)) for c in chunks]
+            for c,f in futures:
+                try: rs=f.result()
+                except Exception as e: rs=[(i,None,e) for i,_ in c]
+                for i,delta,err in rs:
+                    if err is None: self.merge(shared,base,pr[i],*delta)
+                    else: errors.append((pr[i],err))
+        for bp,err in errors: self.on_error(shared,bp,err)
+        return self.post(shared,pr,None)
@@ -0,0 +1,88 @@
+import asyncio, collections, contextlib, threading, time
+
+class _Bucket:
+    def __init__(self,rate,capacity): self.rate,self.capacity,self.level,self.stamp=rate,capacity,capacity,time.monotonic()
+    def wait(self,cost,now):
+        self.level=min(self.capacity,self.level+(now-self.stamp)*self.rate); self.stamp=now
+        return max(0,(min(cost,self.capacity)-self.level)/self.rate)
+    def take(self,cost): self.level-=min(cost,self.capacity)
+
+class _Waiter:
+    def __init__(self,cost,loop): self.cost,self.loop,self.fut,self.t,self.granted=cost,loop,loop.create_future(),time.monotonic(),False
+
+def _wake(fut):
+    if not fut.done(): fut.set_result(None)
+
+class RateLimiter:
+    """
+    Token buckets for requests per second (`rps`, bursting up to `burst`) and tokens per minute (`tpm`),
+    plus a cap on calls in flight. Waiters are served in order within a tenant and round-robin across tenants.
+    """
+    def __init__(self,rps=None,tpm=None,max_inflight=None,burst=None):
+        self.config=dict(rps=rps,tpm=tpm,max_inflight=max_inflight,burst=burst)
+        self.requests=_Bucket(rps,burst or max(1,rps)) if rps else None
+        self.tokens=_Bucket(tpm/60,tpm) if tpm else None
+        self.max_inflight,self.inflight=max_inflight,0
+        self.queues,self.lock,self.timer_at,self.last=collections.OrderedDict(),threading.Lock(),None,None
+        self.acquired=self.waited=0; self.wait_time=self.max_wait_time=0.0
+    @property
+    def queue_depth(self): return sum(len(q) for q in self.queues.values())
+    def _delay(self,cost,now):
+        if self.max_inflight is not None and self.inflight>=self.max_inflight: return None
+        return max([b.wait(c,now) for b,c in ((self.requests,1),(self.tokens,cost)) if b] or [0])
+    def _take(self,cost):
+        if self.requests: self.requests.take(1)
+        if self.tokens: self.tokens.take(cost)
+        self.inflight+=1; self.acquired+=1
+    async def acquire(self,cost=0,tenant=None):
+        with self.lock:
+            if not self.queues and self._delay(cost,time.monotonic())==0: self._take(cost); self.last=tenant; return
+            w=_Waiter(cost,asyncio.get_running_loop()); self.queues.setdefault(tenant,collections.deque()).append(w)
+        self._dispatch()
+        try: await w.fut
+        except asyncio.CancelledError:
+            with self.lock:
+                if not w.granted:
+                    q=self.queues.get(tenant)
+                    if q is not None and w in q: q.remove(w)
+                    if q is not None and not q: del self.queues[tenant]
+            if w.granted: self.release()
+            else: self._dispatch()
+            raise
+    def release(self):
+        with self.lock: self.inflight-=1
+        self._dispatch()
+    def _dispatch(self):
+        with self.lock:
+            now,d=time.monotonic(),None
+            while self.queues:
+                tenant=next(iter(self.queues))
+                if tenant==self.last and len(self.queues)>1: self.queues.move_to_end(tenant); continue
+                q=self.queues[tenant]; w=q[0]
+                if (d:=self._delay(w.cost,now))!=0: break
+                q.popleft(); self._take(w.cost); w.granted=True; self.last=tenant
+                self.waited+=1; self.wait_time+=now-w.t; self.max_wait_time=max(self.max_wait_time,now-w.t)
+                if q: self.queues.move_to_end(tenant)
+                else: del self.queues[tenant]
+                w.loop.call_soon_threadsafe(_wake,w.fut)
+            if not self.queues or d is None or (self.timer_at is not None and self.timer_at<=now+d): return
+            self.timer_at=now+d; loop=w.loop
+        loop.call_soon_threadsafe(loop.call_later,d,self._fire)
+    def _fire(self):
+        with self.lock: self.timer_at=None
+        self._dispatch()
+    @contextlib.asynccontextmanager
+    async def slot(self,cost=0,tenant=None):
+        await self.acquire(cost,tenant)
+        try: yield
+        finally: self.release()
+
+_registry,_registry_lock={},threading.Lock()
+
+def get_limiter(name,**config):
+    """Return the process-wide limiter called `name`, creating it from `config` on first use."""
+    with _registry_lock:
+        lim=_registry.get(name)
+        if lim is None: lim=_registry[name]=RateLimiter(**config)
+        elif config and {**lim.config,**config}!=lim.config: raise ValueError(f"Rate limiter '{name}' is already configured as {lim.config}")
+    return lim
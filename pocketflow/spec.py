@@ -0,0 +1,111 @@
+import functools, importlib, json, os
+import pocketflow
+from pocketflow import BaseNode, Flow
+
+VERSION=1
+registry={}
+_SKIP={"successors","start_node","_plan","hooks","cur_retry","_pool"}
+
+def register(cls=None,name=None,registry=registry):
+    """Make a node class loadable by `name` (default: its class name). Usable as a decorator."""
+    def add(c): registry[name or c.__name__]=c; return c
+    return add(cls) if cls is not None else add
+
+for _name in pocketflow.__dict__:
+    _obj=getattr(pocketflow,_name)
+    if isinstance(_obj,type) and issubclass(_obj,BaseNode) and not _name.startswith("_"): register(_obj)
+
+def _refs(v):
+    if isinstance(v,BaseNode): yield v
+    elif isinstance(v,dict):
+        for x in v.values(): yield from _refs(x)
+    elif isinstance(v,(list,tuple)):
+        for x in v: yield from _refs(x)
+
+def to_spec(flow,registry=registry):
+    """Describe `flow` and everything it reaches as JSON-compatible data."""
+    names,ids,order,stack,counts={c:k for k,c in registry.items()},{},[],[flow],{}
+    while stack:
+        n=stack.pop()
+        if id(n) in ids: continue
+        base=type(n).__name__; counts[base]=counts.get(base,0)+1
+        ids[id(n)]=base if counts[base]==1 else f"{base}_{counts[base]}"; order.append(n)
+        stack.extend(reversed(list(_refs(vars(n)))))
+    def enc(v,where):
+        if v is None or isinstance(v,(str,int,float,bool)): return v
+        if isinstance(v,BaseNode): return {"$node":ids[id(v)]}
+        if isinstance(v,list): return [enc(x,where) for x in v]
+        if isinstance(v,tuple): return {"$tuple":[enc(x,where) for x in v]}
+        if isinstance(v,dict) and all(isinstance(k,str) for k in v): return {k:enc(x,f"{where}.{k}") for k,x in v.items()}
+        raise TypeError(f"Can't export {where}: {type(v).__name__} is not JSON-serializable")
+    nodes={}
+    for n in order:
+        k,t=ids[id(n)],type(n); e={"type":names.get(t,f"{t.__module__}:{t.__qualname__}")}
+        if isinstance(n,Flow): e["start"]=None if n.start_node is None else ids[id(n.start_node)]
+        attrs={a:enc(v,f"{k}.{a}") for a,v in vars(n).items() if a not in _SKIP}
+        if attrs: e["attrs"]=attrs
+        if n.successors: e["next"]={a:ids[id(s)] for a,s in n.successors.items() if s is not None}
+        nodes[k]=e
+    return {"version":VERSION,"root":ids[id(flow)],"nodes":nodes}
+
+def dump_spec(flow,path=None,fmt=None,registry=registry):
+    """Return the spec as JSON or YAML text, or write it to `path` (format from the extension)."""
+    fmt=fmt or ("yaml" if path and path.endswith((".yaml",".yml")) else "json"); spec=to_spec(flow,registry)
+    if fmt=="yaml": import yaml; text=yaml.safe_dump(spec,sort_keys=False)
+    else: text=json.dumps(spec,indent=2)
+    if path is None: return text
+    with open(path,"w") as f: f.write(text)
+
+def _parse(text):
+    if text.lstrip().startswith("{"): return json.loads(text)
+    import yaml; return yaml.safe_load(text)
+
+def _resolve(name,registry,allow_import):
+    if name in registry: return registry[name]
+    if allow_import and ":" in name:
+        mod,_,qual=name.partition(":"); obj=importlib.import_module(mod)
+        for part in qual.split("."): obj=getattr(obj,part)
+        if isinstance(obj,type) and issubclass(obj,BaseNode): return obj
+    raise KeyError(f"Unknown node type '{name}'; register it with pocketflow.spec.register" + ("" if allow_import else " or pass allow_import=True"))
+
+@functools.lru_cache(maxsize=256)
+def _constructible(cls):
+    try: cls(); return True
+    except TypeError: return False
+
+def _check(spec):
+    if spec.get("version")!=VERSION: raise ValueError(f"Unsupported flow spec version {spec.get('version')!r}")
+    nodes=spec["nodes"]
+    for k,e in nodes.items():
+        for t in list((e.get("next") or {}).values())+([e["start"]] if e.get("start") else []):
+            if t not in nodes: raise ValueError(f"Node '{k}' refers to unknown node '{t}'")
+    return spec["root"],list(nodes.items())
+
+@functools.lru_cache(maxsize=64)
+def _cached_check(text): return _check(_parse(text))
+
+def _build(root,entries,registry,allow_import):
+    plan=[(k,_resolve(e["type"],registry,allow_import),e) for k,e in entries]
+    objs={k:(cls() if _constructible(cls) else cls.__new__(cls)) for k,cls,_ in plan}
+    def dec(v):
+        if isinstance(v,list): return [dec(x) for x in v]
+        if isinstance(v,dict):
+            if len(v)==1 and "$node" in v: return objs[v["$node"]]
+            if len(v)==1 and "$tuple" in v: return tuple(dec(x) for x in v["$tuple"])
+            return {k:dec(x) for k,x in v.items()}
+        return v
+    for k,cls,e in plan:
+        o=objs[k]; o.__dict__.update({a:dec(v) for a,v in (e.get("attrs") or {}).items()})
+        o.__dict__.setdefault("params",{}); o.successors={a:objs[t] for a,t in (e.get("next") or {}).items()}
+        if isinstance(o,Flow): o.start_node=objs[e["start"]] if e.get("start") else None
+    return objs[root]
+
+def load_flow(source,registry=registry,allow_import=False):
+    """
+    Build a flow from a spec dict, JSON/YAML text, or a file path. Each call returns new node objects.
+    Parsed text is cached, so loading the same spec again only resolves types and instantiates the nodes.
+    """
+    if isinstance(source,dict): return _build(*_check(source),registry,allow_import)
+    if os.path.exists(source):
+        with open(source) as f: source=f.read()
+    return _build(*_cached_check(source),registry,allow_import)
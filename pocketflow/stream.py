@@ -0,0 +1,66 @@
+import asyncio, collections, copy
+from pocketflow import AsyncNode, _gather, _run_cancellable
+
+class Channel:
+    """
+    Bounded async channel between two stream stages. `put` waits while `maxsize` chunks are unread.
+    The reader iterates with `async for`; iteration ends once the writer has called `close()`.
+    After the reader calls `detach()`, `put` drops the chunk and returns False.
+    """
+    def __init__(self,maxsize=64): self.maxsize,self.items,self.closed,self.detached,self.taken,self._event=maxsize,collections.deque(),False,False,0,asyncio.Event()
+    def _notify(self): self._event.set(); self._event=asyncio.Event()
+    async def put(self,item):
+        while not self.detached and len(self.items)>=self.maxsize: await self._event.wait()
+        if self.detached: return False
+        self.items.append(item); self._notify(); return True
+    def close(self): self.closed=True; self._notify()
+    def detach(self): self.detached=True; self.items.clear(); self._notify()
+    def __aiter__(self): return self
+    async def __anext__(self):
+        while not self.items and not self.closed: await self._event.wait()
+        if not self.items: raise StopAsyncIteration
+        x=self.items.popleft(); self.taken+=1; self._notify(); return x
+
+class AsyncStreamNode(AsyncNode):
+    """
+    AsyncNode whose `exec_async` may be an async generator. Each chunk it yields is written to `self.output`
+    (when the node is a StreamPipeline stage) as soon as it is produced, and `post_async` gets the list of chunks.
+    In a pipeline, `self.input` is the Channel of chunks from the previous stage.
+    Retries only happen before the node has sent a chunk or read one from `self.input` (a retry could not
+    replay them); after that a failure goes to `exec_fallback_async`.
+    """
+    input=output=None
+    sent=0
+    def _retry_delay(self,exc,attempt,t0): return None if self.sent or (self.input is not None and self.input.taken) else super()._retry_delay(exc,attempt,t0)
+    def _exec_call(self,prep_res): return self._pump(self.exec_async(prep_res))
+    async def _pump(self,res):
+        if not hasattr(res,"__aiter__"): return await res
+        chunks=[]
+        try:
+            async for c in res:
+                chunks.append(c); self.sent+=1
+                if self.output is not None and not await self.output.put(c): break
+        finally:
+            if hasattr(res,"aclose"): await res.aclose()
+        return chunks
+    async def _run_async(self,shared): self.sent=0; return await super()._run_async(shared)
+
+class StreamPipeline(AsyncNode):
+    """
+    Runs AsyncStreamNode stages concurrently, each stage reading the chunks of the one before through
+    a Channel of `buffer` chunks. All stages share the store. Returns the last stage's action.
+    When a stage finishes, its output is closed and its input detached, so a stage that is a plain
+    AsyncNode just ends the stream. If a stage fails, the others are cancelled.
+    """
+    def __init__(self,*stages,buffer=64): super().__init__(); self.stages,self.buffer=list(stages),buffer
+    async def _run_async(self,shared):
+        p=await self.prep_async(shared); stages=[copy.copy(s) for s in self.stages]; chans=[Channel(self.buffer) for _ in stages[1:]]
+        for i,s in enumerate(stages): s.set_params({**self.params}); s.input=chans[i-1] if i else None; s.output=chans[i] if i<len(chans) else None
+        async def run(i,s):
+            try: return await _run_cancellable(s,shared)
+            finally:
+                if i<len(chans): chans[i].close()
+                if i: chans[i-1].detach()
+        rs=await _gather(*(run(i,s) for i,s in enumerate(stages)))
+        return await self.post_async(shared,p,rs)
+    async def post_async(self,shared,prep_res,exec_res): return exec_res[-1] if exec_res else None
@@ -0,0 +1,97 @@
+import unittest
+import asyncio
+import sys
+import threading
+import time
+import warnings
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import Node, AsyncNode, AsyncFlow
+
+class BlockingNode(Node):
+    def __init__(self, delay=0.05):
+        super().__init__()
+        self.delay = delay
+    def exec(self, prep_res):
+        time.sleep(self.delay)
+        return threading.get_ident()
+    def post(self, shared_storage, prep_result, exec_result):
+        shared_storage.setdefault('threads', []).append(exec_result)
+
+class TickNode(AsyncNode):
+    async def exec_async(self, prep_res):
+        await asyncio.sleep(0)
+
+class TestAsyncFlowOffload(unittest.TestCase):
+    async def run_with_ticker(self, flow, shared):
+        # Counts how often the loop gets control while the flow runs
+        ticks = 0
+        done = False
+        async def ticker():
+            nonlocal ticks
+            while not done:
+                ticks += 1
+                await asyncio.sleep(0.005)
+        task = asyncio.ensure_future(ticker())
+        await flow.run_async(shared)
+        done = True
+        await task
+        return ticks
+
+    def test_no_lag_warning_by_default(self):
+        flow = AsyncFlow(start=BlockingNode(0.05))
+        with warnings.catch_warnings(record=True) as w:
+            warnings.simplefilter("always")
+            asyncio.run(flow.run_async({}))
+        self.assertFalse(any("blocked the event loop" in str(x.message) for x in w))
+
+    def test_inline_by_default_and_warns_on_lag(self):
+        flow = AsyncFlow(start=BlockingNode(0.05))
+        flow.lag_threshold = 0.01
+        shared = {}
+        with warnings.catch_warnings(record=True) as w:
+            warnings.simplefilter("always")
+            ticks = asyncio.run(self.run_with_ticker(flow, shared))
+        self.assertEqual(shared['threads'], [threading.get_ident()])
+        self.assertLessEqual(ticks, 2)
+        self.assertTrue(any("BlockingNode blocked the event loop" in str(x.message) for x in w))
+
+    def test_flow_level_offload(self):
+        start = BlockingNode(0.05)
+        start >> TickNode() >> BlockingNode(0.05)
+        flow = AsyncFlow(start=start)
+        flow.offload_sync = True
+        shared = {}
+        with warnings.catch_warnings(record=True) as w:
+            warnings.simplefilter("always")
+            ticks = asyncio.run(self.run_with_ticker(flow, shared))
+        self.assertEqual(len(w), 0)
+        self.assertNotIn(threading.get_ident(), shared['threads'])
+        self.assertGreater(ticks, 5)
+
+    def test_per_node_override(self):
+        offloaded, inline = BlockingNode(0.0), BlockingNode(0.0)
+        offloaded.offload = True
+        offloaded >> inline
+        shared = {}
+        asyncio.run(AsyncFlow(start=offloaded).run_async(shared))
+        self.assertNotEqual(shared['threads'][0], threading.get_ident())
+        self.assertEqual(shared['threads'][1], threading.get_ident())
+
+        inline.offload = False
+        flow = AsyncFlow(start=inline)
+        flow.offload_sync = True
+        shared = {}
+        asyncio.run(flow.run_async(shared))
+        self.assertEqual(shared['threads'], [threading.get_ident()])
+
+    def test_compiled_flow_offloads(self):
+        flow = AsyncFlow(start=BlockingNode(0.0)).compile()
+        flow.offload_sync = True
+        shared = {}
+        asyncio.run(flow.run_async(shared))
+        self.assertNotEqual(shared['threads'][0], threading.get_ident())
+
+if __name__ == '__main__':
+    unittest.main()
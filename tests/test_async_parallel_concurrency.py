@@ -0,0 +1,134 @@
+import unittest
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import AsyncNode, AsyncFlow, AsyncParallelBatchNode, AsyncParallelBatchFlow, AsyncStreamingBatchNode, AsyncVectorizedBatchNode
+
+class TrackingProcessor(AsyncParallelBatchNode):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.in_flight = 0
+        self.peak = 0
+        self.completed = []
+
+    async def prep_async(self, shared_storage):
+        return shared_storage['input_numbers']
+
+    async def exec_async(self, number):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        # Later items finish first, so completion order differs from input order
+        await asyncio.sleep(0.001 * (10 - number % 10))
+        self.in_flight -= 1
+        if number < 0:
+            raise ValueError("negative")
+        return number * 2
+
+    async def post_item_async(self, shared_storage, item, exec_res):
+        self.completed.append(item)
+        shared_storage.setdefault('streamed', {})[item] = exec_res
+
+    async def post_async(self, shared_storage, prep_result, exec_result):
+        shared_storage['processed_numbers'] = exec_result
+
+class TrackingSubNode(AsyncNode):
+    state = {'in_flight': 0, 'peak': 0}
+
+    async def prep_async(self, shared_storage):
+        state = TrackingSubNode.state
+        state['in_flight'] += 1
+        state['peak'] = max(state['peak'], state['in_flight'])
+        await asyncio.sleep(0.005)
+        state['in_flight'] -= 1
+        shared_storage.setdefault('results', {})[self.params['key']] = self.params['key'] * 3
+
+class TestBoundedConcurrency(unittest.TestCase):
+    def test_node_respects_limit_and_order(self):
+        shared = {'input_numbers': list(range(50))}
+        processor = TrackingProcessor(max_concurrency=4)
+        asyncio.run(processor.run_async(shared))
+        self.assertEqual(shared['processed_numbers'], [n * 2 for n in range(50)])
+        self.assertLessEqual(processor.peak, 4)
+        self.assertEqual(sorted(processor.completed), list(range(50)))
+        self.assertNotEqual(processor.completed, list(range(50)))
+        self.assertEqual(shared['streamed'], {n: n * 2 for n in range(50)})
+
+    def test_unbounded_still_calls_post_item(self):
+        shared = {'input_numbers': list(range(5))}
+        processor = TrackingProcessor()
+        asyncio.run(processor.run_async(shared))
+        self.assertEqual(processor.peak, 5)
+        self.assertEqual(sorted(processor.completed), list(range(5)))
+
+    def test_error_propagates_and_stops_workers(self):
+        shared = {'input_numbers': [1, 2, -1] + list(range(3, 40))}
+        processor = TrackingProcessor(max_concurrency=2)
+        with self.assertRaises(ValueError):
+            asyncio.run(processor.run_async(shared))
+        self.assertLess(len(processor.completed), 40)
+
+    def test_empty_input(self):
+        shared = {'input_numbers': []}
+        asyncio.run(TrackingProcessor(max_concurrency=3).run_async(shared))
+        self.assertEqual(shared['processed_numbers'], [])
+
+    def test_non_positive_limit_raises(self):
+        for limit in (0, -1):
+            for cls in (TrackingProcessor, AsyncParallelBatchFlow, AsyncStreamingBatchNode, AsyncVectorizedBatchNode):
+                with self.assertRaises(ValueError):
+                    cls(max_concurrency=limit)
+        processor = TrackingProcessor()
+        processor.max_concurrency = 0
+        with self.assertRaises(ValueError):
+            asyncio.run(processor.run_async({'input_numbers': [1, 2]}))
+
+    def test_flow_respects_limit(self):
+        class KeyFlow(AsyncParallelBatchFlow):
+            async def prep_async(self, shared_storage):
+                return [{'key': k} for k in range(12)]
+        TrackingSubNode.state = {'in_flight': 0, 'peak': 0}
+        shared = {}
+        flow = KeyFlow(start=AsyncFlow(start=TrackingSubNode()), max_concurrency=3)
+        asyncio.run(flow.run_async(shared))
+        self.assertEqual(shared['results'], {k: k * 3 for k in range(12)})
+        self.assertLessEqual(TrackingSubNode.state['peak'], 3)
+
+    def test_unbounded_async_iterator_is_pulled_lazily(self):
+        log = []
+        class Recorder(AsyncNode):
+            async def prep_async(self, shared_storage):
+                log.append(f"run{self.params['key']}")
+        class KeyFlow(AsyncParallelBatchFlow):
+            async def prep_async(self, shared_storage):
+                async def keys():
+                    for k in range(3):
+                        log.append(f"pull{k}")
+                        yield {'key': k}
+                        await asyncio.sleep(0)
+                return keys()
+        asyncio.run(KeyFlow(start=Recorder()).run_async({}))
+        self.assertLess(log.index("run0"), log.index("pull2"))
+        self.assertEqual(sorted(log), ["pull0", "pull1", "pull2", "run0", "run1", "run2"])
+
+    def test_unbounded_async_iterator_error_stops_pulling(self):
+        pulled = []
+        class Failing(AsyncParallelBatchNode):
+            async def prep_async(self, shared_storage):
+                async def items():
+                    for n in range(100):
+                        pulled.append(n)
+                        yield n
+                        await asyncio.sleep(0)
+                return items()
+            async def exec_async(self, n):
+                if n == 1:
+                    raise ValueError("bad")
+                await asyncio.sleep(1)
+        with self.assertRaises(ValueError):
+            asyncio.run(Failing().run_async({}))
+        self.assertLess(len(pulled), 100)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import unittest
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import (Node, AsyncNode, AsyncFlow, AsyncParallelBatchNode, AsyncParallelBatchFlow,
+                        RetryPolicy, DeadlineExceeded, time_left)
+
+class SlowNode(AsyncNode):
+    def __init__(self, delays, **kwargs):
+        super().__init__(**kwargs)
+        self.delays = list(delays)
+        self.attempts = 0
+
+    async def exec_async(self, prep_res):
+        self.attempts += 1
+        await asyncio.sleep(self.delays.pop(0) if self.delays else 0)
+        return "ok"
+
+    async def exec_fallback_async(self, prep_res, exc):
+        return f"fallback:{type(exc).__name__}"
+
+    async def post_async(self, shared_storage, prep_res, exec_res):
+        shared_storage.setdefault('results', []).append(exec_res)
+
+class RecordTimeLeft(Node):
+    def prep(self, shared_storage):
+        shared_storage.setdefault('time_left', []).append(time_left())
+
+class SlowItems(AsyncParallelBatchNode):
+    timeout = 0.05
+
+    async def prep_async(self, shared_storage):
+        return [0.0, 1.0, 0.0]
+
+    async def exec_async(self, delay):
+        await asyncio.sleep(delay)
+        return delay
+
+    async def exec_fallback_async(self, prep_res, exc):
+        return "timeout"
+
+    async def post_async(self, shared_storage, prep_res, exec_res):
+        shared_storage['items'] = exec_res
+
+class TestAsyncTimeout(unittest.TestCase):
+    def test_node_timeout_retries_then_succeeds(self):
+        node = SlowNode([1.0, 0.0], max_retries=2)
+        node.timeout = 0.05
+        shared = {}
+        start = time.monotonic()
+        asyncio.run(node.run_async(shared))
+        self.assertLess(time.monotonic() - start, 0.5)
+        self.assertEqual(shared['results'], ["ok"])
+        self.assertEqual(node.attempts, 2)
+
+    def test_node_timeout_falls_back(self):
+        node = SlowNode([1.0], max_retries=1)
+        node.timeout = 0.02
+        shared = {}
+        asyncio.run(node.run_async(shared))
+        self.assertEqual(shared['results'], ["fallback:TimeoutError"])
+
+    def test_timeout_is_retryable_by_policy(self):
+        node = SlowNode([1.0, 1.0], max_retries=3)
+        node.timeout = 0.02
+        node.retry_policy = RetryPolicy(retry_on=(ValueError,))
+        shared = {}
+        asyncio.run(node.run_async(shared))
+        self.assertEqual(node.attempts, 1)
+
+    def test_parallel_items_time_out_independently(self):
+        shared = {}
+        asyncio.run(SlowItems().run_async(shared))
+        self.assertEqual(shared['items'], [0.0, "timeout", 0.0])
+
+    def test_flow_deadline_caps_node_and_fails_fast(self):
+        first = SlowNode([1.0], max_retries=3, wait=0.01)
+        second = SlowNode([])
+        first >> second
+        flow = AsyncFlow(start=first)
+        flow.timeout = 0.05
+        shared = {}
+        start = time.monotonic()
+        with self.assertRaises(DeadlineExceeded):
+            asyncio.run(flow.run_async(shared))
+        self.assertLess(time.monotonic() - start, 0.5)
+        self.assertEqual(shared['results'], ["fallback:TimeoutError"])
+        self.assertEqual(second.attempts, 0)
+
+    def test_deadline_propagates_to_nested_and_batch_children(self):
+        class Params(AsyncParallelBatchFlow):
+            async def prep_async(self, shared_storage):
+                return [{'k': k} for k in range(3)]
+        inner = AsyncFlow(start=RecordTimeLeft())
+        inner.timeout = 100  # looser than the outer deadline; must not extend it
+        outer = Params(start=inner)
+        outer.timeout = 5
+        shared = {}
+        asyncio.run(outer.run_async(shared))
+        self.assertEqual(len(shared['time_left']), 3)
+        self.assertTrue(all(0 < t <= 5 for t in shared['time_left']))
+        self.assertIsNone(time_left())
+
+    def test_no_deadline_by_default(self):
+        shared = {}
+        asyncio.run(AsyncFlow(start=RecordTimeLeft()).run_async(shared))
+        self.assertEqual(shared['time_left'], [None])
+
+if __name__ == '__main__':
+    unittest.main()
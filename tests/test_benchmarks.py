@@ -0,0 +1,43 @@
+import unittest
+import json
+import platform
+import sys
+import warnings
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "benchmarks"))
+from bench_core import compare, bench_copy, bench_transitions, bench_memory_per_item
+
+BASELINE = Path(__file__).parent.parent / "benchmarks" / "baseline.json"
+
+class TestBenchmarks(unittest.TestCase):
+    def test_compare_direction(self):
+        baseline = {"metrics": {"loop_transitions_per_sec": 100.0, "copy_per_step_us": 2.0}}
+        ok = {"metrics": {"loop_transitions_per_sec": 90.0, "copy_per_step_us": 2.2}}
+        bad = {"metrics": {"loop_transitions_per_sec": 50.0, "copy_per_step_us": 4.0}}
+        self.assertEqual(compare(ok, baseline, 0.25), [])
+        regressions = compare(bad, baseline, 0.25)
+        self.assertEqual(len(regressions), 2)
+        self.assertTrue(regressions[0].startswith("loop_transitions_per_sec"))
+
+    def test_benchmarks_produce_metrics(self):
+        results = bench_transitions(50, 1)
+        self.assertEqual(set(results), {
+            "linear_transitions_per_sec", "loop_transitions_per_sec",
+            "linear_compiled_transitions_per_sec", "loop_compiled_transitions_per_sec"})
+        self.assertGreater(bench_copy(50, 1)["copy_per_step_us"], 0)
+
+    def test_memory_against_baseline(self):
+        # Peak memory per item is stable across runs (unlike timings), so it is checked on every test run
+        baseline = json.loads(BASELINE.read_text())
+        if baseline["python"].rsplit(".", 1)[0] != platform.python_version().rsplit(".", 1)[0]:
+            self.skipTest(f"baseline recorded on Python {baseline['python']}")
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            results = {**bench_memory_per_item(20_000), **bench_memory_per_item(20_000, max_concurrency=64)}
+        memory = {"metrics": {k: v for k, v in baseline["metrics"].items() if k in results}}
+        self.assertEqual(len(memory["metrics"]), 2)
+        self.assertEqual(compare({"metrics": results}, memory, 0.25), [])
+
+if __name__ == '__main__':
+    unittest.main()
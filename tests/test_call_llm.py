@@ -0,0 +1,214 @@
+import unittest
+import asyncio
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from utils.llm_cache import LLMCache, normalize_prompt
+
+try:
+    import httpx
+    from openai import OpenAI, AsyncOpenAI
+    from utils import call_llm as llm
+except ImportError:
+    llm = None
+
+class FakeAPI:
+    # httpx transport handler answering chat completions; the reply echoes the prompt and a request count
+    def __init__(self):
+        self.requests = 0
+
+    def reply(self, body):
+        return f"{body['messages'][-1]['content']}#{self.requests}"
+
+    def __call__(self, request):
+        self.requests += 1
+        body = json.loads(request.content)
+        text = self.reply(body)
+        if body.get("stream"):
+            chunks = [text[i:i + 3] for i in range(0, len(text), 3)]
+            events = "".join("data: " + json.dumps({
+                "id": "c", "object": "chat.completion.chunk", "created": 0, "model": body["model"],
+                "choices": [{"index": 0, "delta": {"content": c}, "finish_reason": None}],
+            }) + "\n\n" for c in chunks) + "data: [DONE]\n\n"
+            return self.response(events.encode(), "text/event-stream")
+        return self.response(json.dumps({
+            "id": "c", "object": "chat.completion", "created": 0, "model": body["model"],
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+        }).encode(), "application/json")
+
+    def response(self, data, content_type):
+        # A streamed body, so bytes are counted as downloaded the way a real transport reports them
+        return httpx.Response(200, headers={"content-type": content_type}, stream=httpx.ByteStream(data))
+
+class TestLLMCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "llm.db")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_normalized_keys(self):
+        cache = LLMCache(path=self.path)
+        self.assertEqual(cache.prompt_key("m", {"t": 0}, "a  b\n"), cache.prompt_key("m", {"t": 0}, " a b"))
+        self.assertNotEqual(cache.prompt_key("m", {"t": 0}, "a"), cache.prompt_key("m", {"t": 1}, "a"))
+        self.assertNotEqual(cache.prompt_key("m", {}, "a"), cache.prompt_key("n", {}, "a"))
+        self.assertNotEqual(cache.prompt_key("m", {}, "a"), cache.prompt_key("m", {}, "a", stream=True))
+        exact = LLMCache(path=self.path, normalize=False)
+        self.assertNotEqual(exact.prompt_key("m", {}, "a  b"), exact.prompt_key("m", {}, "a b"))
+        self.assertEqual(normalize_prompt([{"role": "user", "content": " hi  there "}, {"role": "tool", "content": None}]),
+                         [{"role": "user", "content": "hi there"}, {"role": "tool", "content": None}])
+
+    def test_persists_across_instances(self):
+        cache = LLMCache(path=self.path)
+        key = cache.prompt_key("m", {}, "q")
+        cache.set(key, "answer")
+        again = LLMCache(path=self.path)
+        self.assertEqual(again.get(key, None), "answer")
+        self.assertEqual((again.hits, again.misses), (1, 0))
+
+    def test_ttl(self):
+        cache = LLMCache(path=self.path, ttl=-1)
+        key = cache.prompt_key("m", {}, "q")
+        cache.set(key, "answer")
+        self.assertIsNone(LLMCache(path=self.path).get(key, None))
+
+@unittest.skipIf(llm is None, "openai/httpx not installed")
+class TestCallLLMCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.api = FakeAPI()
+        self.saved = llm._client
+        llm._client = OpenAI(api_key="test", http_client=httpx.Client(transport=httpx.MockTransport(self.api)))
+        self.cache = llm.enable_cache(path=os.path.join(self.tmp.name, "llm.db"))
+
+    def tearDown(self):
+        llm.disable_cache()
+        llm._client.close()
+        llm._client = self.saved
+        self.tmp.cleanup()
+
+    def test_hit_after_miss(self):
+        self.assertEqual(llm.call_llm("What is  2+2?"), "What is  2+2?#1")
+        self.assertEqual(llm.call_llm(" What is 2+2?"), "What is  2+2?#1")
+        self.assertEqual(self.api.requests, 1)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+        llm.call_llm("What is 2+2?", temperature=0)
+        self.assertEqual(self.api.requests, 2)
+
+    def test_bypass_and_refresh(self):
+        self.assertEqual(llm.call_llm("q"), "q#1")
+        self.assertEqual(llm.call_llm("q", use_cache=False), "q#2")
+        self.assertEqual(llm.call_llm("q"), "q#1")
+        self.assertEqual(llm.call_llm("q", use_cache="refresh"), "q#3")
+        self.assertEqual(llm.call_llm("q"), "q#3")
+        self.assertEqual(self.api.requests, 3)
+
+    def test_stream_replay(self):
+        first = list(llm.stream_llm("hello"))
+        self.assertEqual("".join(first), "hello#1")
+        self.assertGreater(len(first), 1)
+        self.assertEqual(list(llm.stream_llm("hello")), first)
+        self.assertEqual(self.api.requests, 1)
+
+    def test_partial_stream_is_not_cached(self):
+        stream = llm.stream_llm("hello")
+        next(stream)
+        stream.close()
+        self.assertEqual("".join(llm.stream_llm("hello")), "hello#2")
+        self.assertEqual("".join(llm.stream_llm("hello")), "hello#2")
+
+    def test_async(self):
+        async def main():
+            llm._async_clients[asyncio.get_running_loop()] = AsyncOpenAI(
+                api_key="test", http_client=httpx.AsyncClient(transport=httpx.MockTransport(self.api)))
+            a = await llm.call_llm_async("q")
+            b = await llm.call_llm_async("q")
+            chunks = [c async for c in llm.stream_llm_async("s")]
+            replay = [c async for c in llm.stream_llm_async("s")]
+            return a, b, chunks, replay
+        a, b, chunks, replay = asyncio.run(main())
+        self.assertEqual((a, b), ("q#1", "q#1"))
+        self.assertEqual(chunks, replay)
+        self.assertEqual(self.api.requests, 2)
+
+@unittest.skipIf(llm is None, "openai/httpx not installed")
+class TestClientPool(unittest.TestCase):
+    def setUp(self):
+        self.api = FakeAPI()
+        self.saved = (llm._client, dict(llm.POOL))
+        llm._client = self.client()
+        llm.metrics.reset()
+        env = mock.patch.dict(os.environ, {"OPENAI_API_KEY": "test"})
+        env.start()
+        self.addCleanup(env.stop)
+
+    def tearDown(self):
+        llm.close()
+        llm._client = self.saved[0]
+        llm.POOL.update(self.saved[1])
+
+    def client(self):
+        return OpenAI(api_key="test", http_client=httpx.Client(transport=httpx.MockTransport(self.api)))
+
+    def test_one_client_and_metrics(self):
+        client = llm.get_client()
+        self.assertIs(llm.get_client(), client)
+        llm.call_llm("a")
+        llm.call_llm("b", use_cache=False)
+        snap = llm.metrics.snapshot()
+        self.assertEqual((snap["calls"], snap["errors"]), (2, 0))
+        self.assertGreater(snap["bytes_sent"], 0)
+        self.assertGreater(snap["bytes_received"], 0)
+
+    def test_configure_closes_old_client(self):
+        old = llm.get_client()
+        llm.configure(max_connections=5)
+        self.assertTrue(old.is_closed())
+        self.assertIsNone(llm._client)
+        self.assertEqual(llm.POOL["max_connections"], 5)
+        with self.assertRaises(ValueError):
+            llm.configure(pool_size=5)
+
+    def test_stream_stopped_early_is_recorded(self):
+        stream = llm.stream_llm("a long enough prompt", use_cache=False)
+        next(stream)
+        stream.close()
+        snap = llm.metrics.snapshot()
+        self.assertEqual((snap["calls"], snap["errors"]), (1, 0))
+
+    def test_failed_call_is_recorded(self):
+        llm._client = OpenAI(api_key="test", max_retries=0, http_client=httpx.Client(
+            transport=httpx.MockTransport(lambda request: httpx.Response(400, json={"error": {"message": "bad"}}))))
+        with self.assertRaises(Exception):
+            llm.call_llm("a", use_cache=False)
+        self.assertEqual(llm.metrics.snapshot()["errors"], 1)
+
+    def test_async_clients_are_per_loop_and_closed(self):
+        async def main():
+            client = llm.get_async_client()
+            self.assertIs(llm.get_async_client(), client)
+            await llm.aclose()
+            self.assertTrue(client.is_closed())
+            self.assertIsNot(llm.get_async_client(), client)
+            second = llm.get_async_client()
+            llm.close()
+            await asyncio.sleep(0)
+            return client, second
+        first, second = asyncio.run(main())
+        self.assertTrue(second.is_closed())
+        other = asyncio.run(self.new_loop_client())
+        self.assertIsNot(other, first)
+
+    async def new_loop_client(self):
+        client = llm.get_async_client()
+        await llm.aclose()
+        return client
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+import unittest
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import AsyncNode, AsyncFlow, AsyncParallelBatchNode, AsyncParallelBatchFlow, AsyncParallelNode
+
+class Slow(AsyncNode):
+    def __init__(self, name, delay=10, **kwargs):
+        super().__init__(**kwargs)
+        self.name, self.delay = name, delay
+    async def exec_async(self, prep_res):
+        await asyncio.sleep(self.delay)
+    async def post_async(self, shared, prep_res, exec_res):
+        shared.setdefault("done", []).append(self.name)
+    async def on_cancel_async(self, shared):
+        shared.setdefault("cancelled", []).append(self.name)
+
+class Boom(AsyncNode):
+    async def exec_async(self, prep_res):
+        await asyncio.sleep(0.01)
+        raise ValueError("fatal")
+
+async def cancel_after(coro, delay):
+    task = asyncio.ensure_future(coro)
+    await asyncio.sleep(delay)
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        return "cancelled"
+
+class TestCancellation(unittest.TestCase):
+    def test_cancel_runs_hooks_up_the_tree(self):
+        class Outer(AsyncFlow):
+            async def on_cancel_async(self, shared):
+                shared.setdefault("cancelled", []).append("outer")
+        first = Slow("first", delay=0)
+        first >> AsyncFlow(start=Slow("inner"))
+        outer = Outer(start=first)
+        shared = {}
+        result = asyncio.run(cancel_after(outer.run_async(shared), 0.05))
+        self.assertEqual(result, "cancelled")
+        self.assertEqual(shared["done"], ["first"])
+        self.assertEqual(shared["cancelled"], ["inner", "outer"])
+
+    def test_failure_cancels_parallel_batch_siblings(self):
+        class Jobs(AsyncParallelBatchFlow):
+            async def prep_async(self, shared):
+                return [{"i": i} for i in range(3)]
+        class Item(AsyncNode):
+            async def exec_async(self, prep_res):
+                if self.params["i"] == 1:
+                    await asyncio.sleep(0.01)
+                    raise ValueError("fatal")
+                await asyncio.sleep(10)
+            async def on_cancel_async(self, shared):
+                shared.setdefault("cancelled", []).append(self.params["i"])
+        shared = {}
+        async def main():
+            with self.assertRaises(ValueError):
+                await asyncio.wait_for(Jobs(start=Item()).run_async(shared), 2)
+        asyncio.run(main())
+        self.assertEqual(sorted(shared["cancelled"]), [0, 2])
+
+    def test_failure_cancels_bounded_siblings(self):
+        started = []
+        class Items(AsyncParallelBatchNode):
+            async def prep_async(self, shared):
+                return range(6)
+            async def exec_async(self, item):
+                started.append(item)
+                if item == 0:
+                    await asyncio.sleep(0.01)
+                    raise ValueError("fatal")
+                await asyncio.sleep(10)
+        async def main():
+            with self.assertRaises(ValueError):
+                await asyncio.wait_for(Items(max_concurrency=2).run_async({}), 2)
+        asyncio.run(main())
+        self.assertEqual(started, [0, 1])
+
+    def test_parallel_node_cancels_other_branches(self):
+        cancelled = []
+        class Branch(Slow):
+            async def on_cancel_async(self, shared):
+                cancelled.append(self.name)
+        node = AsyncParallelNode(Boom(), Branch("slow"))
+        async def main():
+            with self.assertRaises(ValueError):
+                await asyncio.wait_for(node.run_async({}), 2)
+        asyncio.run(main())
+        self.assertEqual(cancelled, ["slow"])
+
+    def test_fallback_is_not_fatal(self):
+        class Soft(Boom):
+            async def exec_fallback_async(self, prep_res, exc):
+                return "recovered"
+            async def post_async(self, shared, prep_res, exec_res):
+                shared["soft"] = exec_res
+        shared = {}
+        asyncio.run(AsyncParallelNode(Soft(), Slow("quick", delay=0.02)).run_async(shared))
+        self.assertEqual(shared["done"], ["quick"])
+        self.assertEqual(shared["soft"], "recovered")
+
+    def test_outer_cancel_reaches_parallel_children(self):
+        class Jobs(AsyncParallelBatchFlow):
+            async def prep_async(self, shared):
+                return [{"i": i} for i in range(3)]
+        class Item(Slow):
+            async def on_cancel_async(self, shared):
+                shared.setdefault("cancelled", []).append(self.params["i"])
+        shared = {}
+        asyncio.run(cancel_after(Jobs(start=Item("item")).run_async(shared), 0.02))
+        self.assertEqual(sorted(shared["cancelled"]), [0, 1, 2])
+
+if __name__ == '__main__':
+    unittest.main()
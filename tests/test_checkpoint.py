@@ -0,0 +1,188 @@
+import unittest
+import asyncio
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import Node, Flow, BatchFlow, AsyncNode, AsyncFlow, AsyncParallelBatchFlow, Hooks
+from pocketflow.checkpoint import Checkpointer, FileCheckpointStore, SqliteCheckpointStore, TrackedDict
+
+class Crash(Exception):
+    pass
+
+# Labels that crash once; kept outside the shared store, like a process dying
+CRASH_ON = set()
+
+class Recorder(Node):
+    # Appends its label to shared['log']; raises once when the label is in CRASH_ON
+    def __init__(self, name, action=None):
+        super().__init__()
+        self.name, self.action = name, action
+    def prep(self, shared_storage):
+        label = f"{self.name}{self.params.get('i', '')}"
+        if label in CRASH_ON:
+            CRASH_ON.remove(label)
+            raise Crash(label)
+        shared_storage['log'].append(label)
+    def post(self, shared_storage, prep_res, exec_res):
+        return self.action
+
+class AsyncRecorder(AsyncNode):
+    def __init__(self, name):
+        super().__init__()
+        self.name = name
+    async def prep_async(self, shared_storage):
+        await asyncio.sleep(0)
+        label = f"{self.name}{self.params.get('i', '')}"
+        if label in CRASH_ON:
+            CRASH_ON.remove(label)
+            raise Crash(label)
+        shared_storage['log'].append(label)
+
+class Items(BatchFlow):
+    def prep(self, shared_storage):
+        return [{'i': i} for i in range(4)]
+
+class AsyncItems(AsyncParallelBatchFlow):
+    async def prep_async(self, shared_storage):
+        return [{'i': i} for i in range(4)]
+
+def build_flow():
+    # a -> Items(b -> c) -> d
+    a, d = Recorder("a"), Recorder("d", "end")
+    b = Recorder("b")
+    b >> Recorder("c")
+    items = Items(start=b)
+    a >> items >> d
+    return Flow(start=a)
+
+class TestCheckpoint(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = os.path.join(self.tmp.name, "cp.db")
+        CRASH_ON.clear()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_resume_skips_finished_steps_and_batch_items(self):
+        shared = {'log': []}
+        CRASH_ON.update(['b2', 'd'])
+        checkpointer = Checkpointer(self.db)
+        with self.assertRaises(Crash):
+            checkpointer.run(build_flow(), shared, "job")
+        self.assertEqual(shared['log'], ['a', 'b0', 'c0', 'b1', 'c1'])
+        with self.assertRaises(Crash):
+            checkpointer.run(build_flow(), {'log': []}, "job")
+        resumed = {'log': ['ignored']}
+        action = checkpointer.run(build_flow(), resumed, "job")
+        self.assertEqual(action, "end")
+        self.assertEqual(resumed['log'], ['a', 'b0', 'c0', 'b1', 'c1', 'b2', 'c2', 'b3', 'c3', 'd'])
+        self.assertIsNone(checkpointer.store.load("job"))
+
+    def test_resume_mid_subflow(self):
+        shared = {'log': []}
+        CRASH_ON.add('c1')
+        checkpointer = Checkpointer(self.db)
+        with self.assertRaises(Crash):
+            checkpointer.run(build_flow(), shared, "job")
+        resumed = {}
+        checkpointer.run(build_flow(), resumed, "job")
+        self.assertEqual(resumed['log'], ['a', 'b0', 'c0', 'b1', 'c1', 'b2', 'c2', 'b3', 'c3', 'd'])
+
+    def test_matches_plain_run(self):
+        plain = {'log': []}
+        build_flow().run(plain)
+        checkpointed = {'log': []}
+        Checkpointer(self.db).run(build_flow(), checkpointed, "job")
+        self.assertEqual(plain, checkpointed)
+
+    def test_file_store(self):
+        checkpointer = Checkpointer(FileCheckpointStore(os.path.join(self.tmp.name, "cps")), keep=True)
+        shared = {'log': []}
+        CRASH_ON.add('b3')
+        with self.assertRaises(Crash):
+            checkpointer.run(build_flow(), shared, "job")
+        resumed = {}
+        checkpointer.run(build_flow(), resumed, "job")
+        self.assertEqual(resumed['log'][-3:], ['b3', 'c3', 'd'])
+        self.assertIsNotNone(checkpointer.store.load("job"))
+
+    def test_only_touched_keys_are_saved(self):
+        class CountingStore(SqliteCheckpointStore):
+            saved = []
+            def save(self, run_id, frames, dropped_frames, changed, deleted):
+                self.saved.append(set(changed))
+                super().save(run_id, frames, dropped_frames, changed, deleted)
+        class Touch(Node):
+            def prep(self, shared_storage):
+                shared_storage['counter'] = shared_storage['counter'] + 1
+        start = Touch()
+        start >> Touch()
+        store = CountingStore(self.db)
+        Checkpointer(store).run(Flow(start=start), {'counter': 0, 'big': list(range(1000))}, "job")
+        self.assertEqual(store.saved[0], {'counter', 'big'})
+        self.assertEqual(store.saved[1:], [{'counter'}, {'counter'}])
+
+    def test_tracked_dict(self):
+        d = TrackedDict({'a': 1, 'b': [1]})
+        d.take_delta()
+        _ = d['a']
+        d['b'].append(2)
+        d.setdefault('c', 3)
+        d.pop('a')
+        changed, deleted = d.take_delta()
+        self.assertEqual(changed, {'b': [1, 2], 'c': 3})
+        self.assertEqual(deleted, {'a'})
+
+    def test_flow_is_not_compiled(self):
+        a, b = Recorder("a"), Recorder("b")
+        a >> b
+        flow = Flow(start=a)
+        Checkpointer(self.db).run(flow, {'log': []}, "job")
+        self.assertIsNone(flow._plan)
+        b >> Recorder("c")
+        shared = {'log': []}
+        flow.run(shared)
+        self.assertEqual(shared['log'], ['a', 'b', 'c'])
+
+    def test_hooks_see_checkpointed_run(self):
+        class Trace(Hooks):
+            def __init__(self): self.events = []
+            def on_node_end(self, node, path, action, t_start, t_end, retries, error):
+                self.events.append("/".join(path))
+        plain, checkpointed = Trace(), Trace()
+        build_flow().add_hook(plain).run({'log': []})
+        Checkpointer(self.db).run(build_flow().add_hook(checkpointed), {'log': []}, "job")
+        self.assertIn('Flow/Items/Recorder', checkpointed.events)
+        self.assertEqual(checkpointed.events, plain.events)
+
+    def test_async_hooks_see_checkpointed_run(self):
+        class Trace(Hooks):
+            def __init__(self): self.events = []
+            def on_node_end(self, node, path, action, t_start, t_end, retries, error):
+                self.events.append("/".join(path))
+        trace = Trace()
+        flow = AsyncFlow(start=AsyncRecorder("x")).add_hook(trace)
+        asyncio.run(Checkpointer(self.db).run_async(flow, {'log': []}, "job"))
+        self.assertEqual(trace.events, ['AsyncFlow/AsyncRecorder'])
+
+    def test_async_parallel_batch_resume(self):
+        def make():
+            inner = AsyncFlow(start=AsyncRecorder("x"))
+            return AsyncFlow(start=AsyncItems(start=inner))
+        checkpointer = Checkpointer(self.db)
+        shared = {'log': []}
+        CRASH_ON.add('x2')
+        with self.assertRaises(Crash):
+            asyncio.run(checkpointer.run_async(make(), shared, "job"))
+        state = checkpointer.store.load("job")
+        self.assertEqual(sorted(state[1]['log']), ['x0', 'x1', 'x3'])
+        resumed = {}
+        asyncio.run(checkpointer.run_async(make(), resumed, "job"))
+        self.assertEqual(sorted(resumed['log']), ['x0', 'x1', 'x2', 'x3'])
+
+if __name__ == '__main__':
+    unittest.main()
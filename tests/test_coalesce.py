@@ -0,0 +1,128 @@
+import unittest
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import AsyncNode, AsyncFlow, AsyncParallelBatchNode
+from pocketflow.coalesce import Coalescer
+
+class Recorder:
+    def __init__(self, delay=0, fail_on=None):
+        self.batches, self.delay, self.fail_on = [], delay, fail_on
+    async def __call__(self, items):
+        self.batches.append(list(items))
+        await asyncio.sleep(self.delay)
+        if self.fail_on in items:
+            raise ValueError("batch failed")
+        return [i * 10 for i in items]
+
+class EmbedNode(AsyncNode):
+    def __init__(self, coalescer, **kwargs):
+        super().__init__(**kwargs)
+        self.coalescer = coalescer
+    async def prep_async(self, shared):
+        return shared["query"]
+    async def exec_async(self, query):
+        return await self.coalescer(query)
+    async def post_async(self, shared, prep_res, exec_res):
+        shared["embedding"] = exec_res
+
+class TestCoalescer(unittest.TestCase):
+    def test_concurrent_flows_share_one_call(self):
+        fn = Recorder()
+        co = Coalescer(fn, max_batch=100)
+        async def main():
+            stores = [{"query": i} for i in range(50)]
+            await asyncio.gather(*(AsyncFlow(start=EmbedNode(co)).run_async(s) for s in stores))
+            return stores
+        stores = asyncio.run(main())
+        self.assertEqual([s["embedding"] for s in stores], [i * 10 for i in range(50)])
+        self.assertEqual(len(fn.batches), 1)
+        self.assertEqual((co.calls, co.batches), (50, 1))
+
+    def test_max_batch_splits_calls(self):
+        fn = Recorder()
+        co = Coalescer(fn, max_batch=8)
+        async def main():
+            return await asyncio.gather(*(co(i) for i in range(20)))
+        self.assertEqual(asyncio.run(main()), [i * 10 for i in range(20)])
+        self.assertEqual([len(b) for b in fn.batches], [8, 8, 4])
+
+    def test_single_call_is_not_delayed(self):
+        fn = Recorder()
+        co = Coalescer(fn, max_wait=10)
+        async def main():
+            return await asyncio.wait_for(co(3), 1)
+        self.assertEqual(asyncio.run(main()), 30)
+
+    def test_calls_gather_while_batch_in_flight(self):
+        fn = Recorder(delay=0.05)
+        co = Coalescer(fn, max_wait=0.02)
+        async def late(i):
+            await asyncio.sleep(0.01)
+            return await co(i)
+        async def main():
+            return await asyncio.gather(co(0), *(late(i) for i in range(1, 6)))
+        self.assertEqual(asyncio.run(main()), [0, 10, 20, 30, 40, 50])
+        self.assertEqual(fn.batches, [[0], [1, 2, 3, 4, 5]])
+
+    def test_sync_batch_function(self):
+        co = Coalescer(lambda items: [i + 1 for i in items])
+        async def main():
+            return await asyncio.gather(*(co(i) for i in range(3)))
+        self.assertEqual(asyncio.run(main()), [1, 2, 3])
+
+    def test_failure_reaches_every_caller_and_retries(self):
+        fn = Recorder(fail_on=2)
+        co = Coalescer(fn)
+        class Item(AsyncParallelBatchNode):
+            async def prep_async(self, shared):
+                return [1, 2, 3]
+            async def exec_async(self, item):
+                return await co(item)
+            async def exec_fallback_async(self, item, exc):
+                return "fallback"
+            async def post_async(self, shared, prep_res, exec_res):
+                shared["out"] = exec_res
+        shared = {}
+        asyncio.run(Item(max_retries=2).run_async(shared))
+        self.assertEqual(shared["out"], ["fallback", "fallback", "fallback"])
+        self.assertEqual(fn.batches, [[1, 2, 3], [1, 2, 3]])
+
+    def test_length_mismatch_raises(self):
+        co = Coalescer(lambda items: [])
+        with self.assertRaises(ValueError):
+            asyncio.run(co(1))
+
+    def test_cancelled_caller_is_dropped(self):
+        fn = Recorder()
+        co = Coalescer(fn)
+        async def main():
+            t = asyncio.ensure_future(co(1))
+            other = asyncio.ensure_future(co(2))
+            await asyncio.sleep(0)
+            t.cancel()
+            return await other
+        self.assertEqual(asyncio.run(main()), 20)
+        self.assertEqual(fn.batches, [[2]])
+
+    def test_dispatch_tasks_are_referenced_until_done(self):
+        co = Coalescer(Recorder(delay=0.01))
+        async def main():
+            call = asyncio.ensure_future(co(1))
+            await asyncio.sleep(0.001)
+            window = co.windows[asyncio.get_running_loop()]
+            running = len(window.tasks)
+            await call
+            await asyncio.sleep(0)
+            return running, len(window.tasks)
+        self.assertEqual(asyncio.run(main()), (1, 0))
+
+    def test_reusable_across_event_loops(self):
+        co = Coalescer(Recorder())
+        self.assertEqual(asyncio.run(co(1)), 10)
+        self.assertEqual(asyncio.run(co(2)), 20)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from utils.context_budget import ContextBudget
+
+def words(text):
+    # One token per word keeps the expected sizes easy to read
+    return len(text.split())
+
+class TestContextBudget(unittest.TestCase):
+    def setUp(self):
+        self.budget = ContextBudget(10, count=words, separator="", marker=" ...")
+
+    def test_trim(self):
+        self.assertEqual(self.budget.trim("a b c", 5), "a b c")
+        self.assertEqual(self.budget.trim("one two three four five", 3), "one two ...")
+        self.assertEqual(self.budget.trim("one two", 0), "")
+
+    def test_fit_drops_lowest_priority_oldest_first(self):
+        segments = ["old a b c d", {"text": "keep e f g h", "priority": 1}, {"text": "pinned x y z", "pinned": True}]
+        self.assertEqual(self.budget.fit(segments, max_tokens=11), ["old ...", "keep e f g h", "pinned x y z"])
+        self.assertEqual(self.budget.fit(segments, max_tokens=8), ["keep e f ...", "pinned x y z"])
+
+    def test_dedupe_keeps_the_later_copy(self):
+        segments = [{"text": "same  text", "priority": 2}, "other", "same text"]
+        self.assertEqual(self.budget.fit(segments), ["other", "same text"])
+        self.assertEqual(self.budget.fit(segments, dedupe=False), ["same  text", "other", "same text"])
+        self.assertEqual(self.budget.fit(segments, max_tokens=2), ["same text"])
+
+    def test_summarize_is_cached(self):
+        calls = []
+        def summarize(text):
+            calls.append(text)
+            return "summary"
+        budget = ContextBudget(6, count=words, separator="", summarize=summarize)
+        segments = ["a b c d e", "new f"]
+        self.assertEqual(budget.fit(segments), ["summary", "new f"])
+        budget.fit(segments)
+        self.assertEqual(calls, ["a b c d e"])
+
+    def test_fit_messages(self):
+        messages = [
+            {"role": "system", "content": "be brief"},
+            {"role": "user", "content": "first question with many words"},
+            {"role": "assistant", "content": "first answer"},
+            {"role": "user", "content": "second question"},
+            {"role": "assistant", "content": "ok"},
+        ]
+        fitted = self.budget.fit_messages(messages)
+        self.assertEqual([m["content"] for m in fitted], ["be brief", "first question ...", "first answer", "second question", "ok"])
+        self.assertIs(fitted[0], messages[0])
+        self.assertEqual(messages[1]["content"], "first question with many words")
+        self.assertEqual([m["content"] for m in self.budget.fit_messages(messages, max_tokens=6)],
+                         ["be brief", "second question", "ok"])
+
+    def test_fit_messages_keeps_non_string_content(self):
+        call = {"role": "assistant", "content": None, "tool_calls": [{"id": "1"}]}
+        image = {"role": "user", "content": [{"type": "text", "text": "look at this"}, {"type": "image_url"}]}
+        messages = [{"role": "user", "content": "old words to drop"}, call, image,
+                    {"role": "tool", "content": "result"}, {"role": "user", "content": "next"}]
+        fitted = self.budget.fit_messages(messages, max_tokens=5)
+        self.assertEqual(fitted, [call, image, messages[3], messages[4]])
+        self.assertIs(fitted[1], image)
+
+    def test_empty_content_is_kept(self):
+        call = {"role": "assistant", "content": "", "tool_calls": [{"id": "1"}]}
+        messages = [{"role": "user", "content": "old words to drop"}, call,
+                    {"role": "tool", "content": "result"}, {"role": "user", "content": "next"}]
+        self.assertEqual(self.budget.fit_messages(messages, max_tokens=2), messages[1:])
+
+    def test_pinned_empty_segment_is_kept(self):
+        segments = [{"text": "", "pinned": True}, "a b c"]
+        self.assertEqual(self.budget.fit(segments), ["", "a b c"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,194 @@
+import unittest
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import Node, BatchNode, AsyncParallelBatchNode
+from pocketflow.cache import ExecCache, stable_hash
+
+class SquareNode(Node):
+    calls = 0
+    def prep(self, shared_storage):
+        return shared_storage['x']
+    def exec(self, x):
+        type(self).calls += 1
+        return x * x
+    def post(self, shared_storage, prep_res, exec_res):
+        shared_storage['y'] = exec_res
+
+class FlakyNode(Node):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.calls = 0
+    def exec(self, prep_res):
+        self.calls += 1
+        if self.calls == 1:
+            raise ValueError("transient")
+        return "ok"
+
+class SlowBatch(BatchNode):
+    calls = 0
+    lock = threading.Lock()
+    def exec(self, x):
+        with self.lock:
+            type(self).calls += 1
+        time.sleep(0.05)
+        return x + 1
+
+class AsyncEmbed(AsyncParallelBatchNode):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.calls = 0
+    async def prep_async(self, shared_storage):
+        return shared_storage['texts']
+    async def exec_async(self, text):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return len(text)
+    async def post_async(self, shared_storage, prep_res, exec_res):
+        shared_storage['lengths'] = exec_res
+
+class TestExecCache(unittest.TestCase):
+    def setUp(self):
+        SquareNode.calls = 0
+        SlowBatch.calls = 0
+
+    def test_stable_hash(self):
+        self.assertEqual(stable_hash({'a': 1, 'b': [1, 2]}), stable_hash({'b': [1, 2], 'a': 1}))
+        self.assertNotEqual(stable_hash({'a': 1}), stable_hash({'a': 2}))
+        self.assertEqual(stable_hash({1, 2, 3}), stable_hash({3, 2, 1}))
+        self.assertEqual(stable_hash(b"abc"), stable_hash(b"abc"))
+        self.assertNotEqual(stable_hash((1, 2)), stable_hash([1, 2]))
+        self.assertNotEqual(stable_hash({'a': (1,)}), stable_hash({'a': [1]}))
+        self.assertNotEqual(stable_hash({1: 'x'}), stable_hash({'1': 'x'}))
+        self.assertEqual(stable_hash({1: 'x', 2: 'y'}), stable_hash({2: 'y', 1: 'x'}))
+
+    def test_hit_skips_exec_and_key_includes_params(self):
+        cache = ExecCache()
+        node = SquareNode()
+        node.cache = cache
+        for _ in range(3):
+            shared = {'x': 4}
+            node.run(shared)
+            self.assertEqual(shared['y'], 16)
+        self.assertEqual(SquareNode.calls, 1)
+        self.assertEqual((cache.hits, cache.misses), (2, 1))
+        node.set_params({'model': 'other'})
+        node.run({'x': 4})
+        self.assertEqual(SquareNode.calls, 2)
+
+    def test_failures_are_not_cached(self):
+        node = FlakyNode(max_retries=2)
+        node.cache = ExecCache()
+        self.assertEqual(node._exec("p"), "ok")
+        self.assertEqual(node._exec("p"), "ok")
+        self.assertEqual(node.calls, 2)
+
+    def test_lru_and_byte_eviction(self):
+        cache = ExecCache(max_entries=2)
+        for k in "abc":
+            cache.set(k, k)
+        self.assertEqual(list(cache.entries), ["b", "c"])
+        self.assertEqual(cache.evictions, 1)
+        cache = ExecCache(max_bytes=200)
+        cache.set("small", "x")
+        cache.set("big", "y" * 150)
+        cache.set("big2", "z" * 150)
+        self.assertNotIn("big", cache.entries)
+        self.assertLessEqual(cache.size, 200)
+
+    def test_ttl(self):
+        cache = ExecCache(ttl=0.02)
+        cache.set("k", 1)
+        self.assertEqual(cache.get("k"), 1)
+        time.sleep(0.03)
+        self.assertIsNot(cache.get("k"), 1)
+        self.assertIsNone(cache.get("k", None))
+
+    def test_disk_tier_survives_new_cache(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "cache.db")
+            node = SquareNode()
+            node.cache = ExecCache(path=path)
+            node.run({'x': 3})
+            node.cache = ExecCache(path=path)
+            shared = {'x': 3}
+            node.run(shared)
+            self.assertEqual(shared['y'], 9)
+            self.assertEqual(SquareNode.calls, 1)
+
+    def test_disk_hit_keeps_original_expiry(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "cache.db")
+            ExecCache(path=path, ttl=0.1).set("k", 1)
+            time.sleep(0.06)
+            cache = ExecCache(path=path, ttl=0.1)
+            self.assertEqual(cache.get("k"), 1)
+            time.sleep(0.06)
+            self.assertIsNone(cache.get("k", None))
+
+    def test_disk_tier_row_limit(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = ExecCache(path=os.path.join(tmp, "cache.db"), max_disk_rows=2)
+            for i in range(4):
+                cache.set(str(i), i)
+            rows = cache.disk.db.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+            self.assertEqual(rows, 2)
+
+    def test_threads_share_inflight_computation(self):
+        node = SlowBatch()
+        node.cache = ExecCache()
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(node._exec([7]))) for _ in range(5)]
+        for t in threads: t.start()
+        for t in threads: t.join()
+        self.assertEqual(results, [[8]] * 5)
+        self.assertEqual(SlowBatch.calls, 1)
+
+    def test_async_inflight_dedup_per_item(self):
+        node = AsyncEmbed()
+        node.cache = ExecCache()
+        shared = {'texts': ["aa", "bbb", "aa", "aa", "bbb"]}
+        asyncio.run(node.run_async(shared))
+        self.assertEqual(shared['lengths'], [2, 3, 2, 2, 3])
+        self.assertEqual(node.calls, 2)
+
+    def test_cancelled_leader_hands_over_to_a_waiter(self):
+        cache, calls = ExecCache(), []
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.02)
+            return len(calls)
+        async def main():
+            leader = asyncio.ensure_future(cache.aget_or_compute("k", compute))
+            await asyncio.sleep(0)
+            waiters = [asyncio.ensure_future(cache.aget_or_compute("k", compute)) for _ in range(3)]
+            await asyncio.sleep(0.005)
+            leader.cancel()
+            return await asyncio.gather(*waiters), leader
+        results, leader = asyncio.run(main())
+        self.assertTrue(leader.cancelled())
+        self.assertEqual(results, [2, 2, 2])
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(cache.ainflight, {})
+
+    def test_async_callers_on_different_loops(self):
+        cache, results = ExecCache(), []
+        async def compute():
+            await asyncio.sleep(0.02)
+            return "v"
+        async def two():
+            return await asyncio.gather(cache.aget_or_compute("k", compute), cache.aget_or_compute("k", compute))
+        threads = [threading.Thread(target=lambda: results.append(asyncio.run(two()))) for _ in range(3)]
+        for t in threads: t.start()
+        for t in threads: t.join()
+        self.assertEqual(results, [["v", "v"]] * 3)
+        self.assertEqual(cache.ainflight, {})
+
+if __name__ == '__main__':
+    unittest.main()
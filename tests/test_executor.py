@@ -0,0 +1,168 @@
+import unittest
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import Node, Flow, AsyncNode, AsyncFlow
+from pocketflow.executor import FlowExecutor, Overloaded
+
+class Work(AsyncNode):
+    async def prep_async(self, shared):
+        return shared
+    async def exec_async(self, shared):
+        shared["log"].append(("start", shared["name"]))
+        await asyncio.sleep(shared.get("delay", 0.01))
+        shared["log"].append(("end", shared["name"]))
+        return shared["name"]
+    async def post_async(self, shared, prep_res, exec_res):
+        shared["result"] = exec_res
+
+def job(log, name, **kwargs):
+    return AsyncFlow(start=Work()), {"log": log, "name": name, **kwargs}
+
+def started(log):
+    return [name for event, name in log if event == "start"]
+
+class TestFlowExecutor(unittest.TestCase):
+    def test_runs_flow_and_caps_concurrency(self):
+        ex = FlowExecutor(max_running=2)
+        log = []
+        async def main():
+            return await asyncio.gather(*(ex.submit(*job(log, i)) for i in range(5)))
+        asyncio.run(main())
+        active = peak = 0
+        for event, _ in log:
+            active += 1 if event == "start" else -1
+            peak = max(peak, active)
+        self.assertEqual(peak, 2)
+        self.assertEqual(ex.stats()["tenants"][None]["completed"], 5)
+        self.assertEqual((ex.running, ex.queued), (0, 0))
+
+    def test_priority_goes_first(self):
+        ex = FlowExecutor(max_running=1)
+        log = []
+        async def main():
+            tasks = [asyncio.ensure_future(ex.submit(*job(log, f"batch{i}"), tenant="jobs", priority=0)) for i in range(3)]
+            await asyncio.sleep(0)
+            tasks.append(asyncio.ensure_future(ex.submit(*job(log, "chat"), tenant="chat", priority=10)))
+            await asyncio.gather(*tasks)
+        asyncio.run(main())
+        self.assertEqual(started(log), ["batch0", "chat", "batch1", "batch2"])
+
+    def test_weighted_fair_share(self):
+        ex = FlowExecutor(max_running=1, weights={"a": 2})
+        log = []
+        async def main():
+            tasks = [asyncio.ensure_future(ex.submit(*job(log, f"{t}{i}", delay=0), tenant=t)) for t in "ab" for i in range(6)]
+            await asyncio.gather(*tasks)
+        asyncio.run(main())
+        first = started(log)[:9]
+        self.assertEqual(sum(n.startswith("a") for n in first), 6)
+        self.assertEqual(sum(n.startswith("b") for n in first), 3)
+
+    def test_per_tenant_cap_lets_others_through(self):
+        ex = FlowExecutor(max_running=4, max_per_tenant=1)
+        log = []
+        async def main():
+            tasks = [asyncio.ensure_future(ex.submit(*job(log, f"bulk{i}"), tenant="bulk")) for i in range(3)]
+            tasks.append(asyncio.ensure_future(ex.submit(*job(log, "chat"), tenant="chat")))
+            await asyncio.sleep(0.005)
+            running = ex.running
+            await asyncio.gather(*tasks)
+            return running
+        self.assertEqual(asyncio.run(main()), 2)
+        self.assertEqual(started(log)[:2], ["bulk0", "chat"])
+
+    def test_sheds_load_when_queue_full(self):
+        ex = FlowExecutor(max_running=1, max_queued=1)
+        log = []
+        async def main():
+            first = asyncio.ensure_future(ex.submit(*job(log, 0)))
+            second = asyncio.ensure_future(ex.submit(*job(log, 1)))
+            await asyncio.sleep(0)
+            with self.assertRaises(Overloaded):
+                await ex.submit(*job(log, 2))
+            await asyncio.gather(first, second)
+        asyncio.run(main())
+        self.assertEqual(ex.stats()["tenants"][None]["rejected"], 1)
+
+    def test_per_tenant_queue_limit(self):
+        ex = FlowExecutor(max_running=1, max_queued_per_tenant=1)
+        log = []
+        async def main():
+            tasks = [asyncio.ensure_future(ex.submit(*job(log, i), tenant="a")) for i in range(2)]
+            await asyncio.sleep(0)
+            with self.assertRaises(Overloaded):
+                await ex.submit(*job(log, 2), tenant="a")
+            await ex.submit(*job(log, 3), tenant="b")
+            await asyncio.gather(*tasks)
+        asyncio.run(main())
+
+    def test_queue_timeout(self):
+        ex = FlowExecutor(max_running=1, queue_timeout=0.01)
+        log = []
+        async def main():
+            first = asyncio.ensure_future(ex.submit(*job(log, "slow", delay=0.05)))
+            await asyncio.sleep(0)
+            with self.assertRaises(Overloaded):
+                await ex.submit(*job(log, "late"))
+            await first
+        asyncio.run(main())
+        self.assertEqual(started(log), ["slow"])
+        self.assertEqual(ex.queued, 0)
+
+    def test_cancelled_while_queued_or_running(self):
+        ex = FlowExecutor(max_running=1)
+        log = []
+        async def main():
+            running = asyncio.ensure_future(ex.submit(*job(log, "a", delay=1)))
+            queued = asyncio.ensure_future(ex.submit(*job(log, "b")))
+            await asyncio.sleep(0.01)
+            queued.cancel()
+            running.cancel()
+            await asyncio.gather(running, queued, return_exceptions=True)
+            await ex.submit(*job(log, "c"))
+        asyncio.run(main())
+        self.assertEqual(started(log), ["a", "c"])
+        self.assertEqual((ex.running, ex.queued), (0, 0))
+        stats = ex.stats()["tenants"][None]
+        self.assertEqual((stats["cancelled"], stats["failed"], stats["completed"]), (2, 0, 1))
+
+    def test_idle_tenants_are_forgotten(self):
+        ex = FlowExecutor(max_running=2, max_idle_tenants=3)
+        log = []
+        async def main():
+            await asyncio.gather(*(ex.submit(*job(log, n, delay=0), tenant=f"user{n}") for n in range(10)))
+        asyncio.run(main())
+        self.assertEqual(len(started(log)), 10)
+        self.assertEqual(ex.passes, {})
+        self.assertEqual((dict(ex.running_by), dict(ex.queued_by)), ({}, {}))
+        self.assertEqual(sorted(ex.stats()["tenants"]), ["user7", "user8", "user9"])
+
+    def test_queue_latency_and_failures(self):
+        class Fail(AsyncNode):
+            async def exec_async(self, prep_res):
+                raise ValueError("boom")
+        ex = FlowExecutor(max_running=1)
+        log = []
+        async def main():
+            ok = asyncio.ensure_future(ex.submit(*job(log, "a", delay=0.02), tenant="t"))
+            bad = asyncio.ensure_future(ex.submit(AsyncFlow(start=Fail()), {}, tenant="t"))
+            await asyncio.gather(ok, bad, return_exceptions=True)
+        asyncio.run(main())
+        stats = ex.stats()["tenants"]["t"]
+        self.assertEqual((stats["completed"], stats["failed"]), (1, 1))
+        self.assertGreater(stats["max_queue_time"], 0.01)
+        self.assertGreater(stats["avg_queue_time"], 0)
+
+    def test_sync_flow(self):
+        class Sync(Node):
+            def post(self, shared, prep_res, exec_res):
+                shared["ran"] = True
+        shared = {}
+        asyncio.run(FlowExecutor().submit(Flow(start=Sync()), shared))
+        self.assertTrue(shared["ran"])
+
+if __name__ == '__main__':
+    unittest.main()
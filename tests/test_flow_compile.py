@@ -0,0 +1,144 @@
+import unittest
+import asyncio
+import sys
+import warnings
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import Node, Flow, AsyncNode, AsyncFlow
+
+class NumberNode(Node):
+    def __init__(self, number):
+        super().__init__()
+        self.number = number
+    def prep(self, shared_storage):
+        shared_storage['current'] = self.number
+
+class AddNode(Node):
+    def __init__(self, number):
+        super().__init__()
+        self.number = number
+    def prep(self, shared_storage):
+        shared_storage['current'] += self.number
+
+class CheckPositiveNode(Node):
+    def post(self, shared_storage, prep_result, proc_result):
+        return 'positive' if shared_storage['current'] >= 0 else 'negative'
+
+class CountingNode(Node):
+    # Records per-visit instance state; a fresh copy must never see the previous visit's attribute
+    def prep(self, shared_storage):
+        shared_storage.setdefault('seen', []).append(getattr(self, 'visited', False))
+        self.visited = True
+        shared_storage['params'] = self.params
+    def post(self, shared_storage, prep_result, exec_result):
+        return "again" if len(shared_storage['seen']) < 3 else "done"
+
+class AsyncAddNode(AsyncNode):
+    def __init__(self, number):
+        super().__init__()
+        self.number = number
+    async def prep_async(self, shared_storage):
+        await asyncio.sleep(0)
+        shared_storage['current'] += self.number
+
+class TestFlowCompile(unittest.TestCase):
+    def build_cycle(self):
+        n1, check, sub, end = NumberNode(10), CheckPositiveNode(), AddNode(-3), AddNode(100)
+        n1 >> check
+        check - 'positive' >> sub
+        check - 'negative' >> end
+        sub >> check
+        return Flow(start=n1)
+
+    def test_compiled_matches_uncompiled(self):
+        plain, compiled = {}, {}
+        self.build_cycle().run(plain)
+        flow = self.build_cycle().compile()
+        flow.run(compiled)
+        self.assertEqual(plain, compiled)
+        self.assertEqual(compiled['current'], 98)
+
+    def test_compile_is_reusable_across_runs(self):
+        flow = self.build_cycle().compile()
+        for _ in range(3):
+            shared = {}
+            flow.run(shared)
+            self.assertEqual(shared['current'], 98)
+
+    def test_revisited_node_gets_fresh_state_and_params(self):
+        node = CountingNode()
+        node - "again" >> node
+        flow = Flow(start=node).compile()
+        flow.set_params({'k': 1})
+        shared = {}
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            last_action = flow.run(shared)
+        self.assertEqual(shared['seen'], [False, False, False])
+        self.assertEqual(shared['params'], {'k': 1})
+        self.assertEqual(last_action, "done")
+        self.assertFalse(hasattr(node, 'visited'))
+
+    def test_missing_successor_warning(self):
+        class ActionNode(Node):
+            def post(self, *args): return "specific_action"
+        start = ActionNode()
+        start >> NumberNode(1)
+        flow = Flow(start=start).compile()
+        with warnings.catch_warnings(record=True) as w:
+            warnings.simplefilter("always")
+            last_action = flow.run({})
+            self.assertEqual(len(w), 1)
+            self.assertIn("Flow ends: 'specific_action' not found in ['default']", str(w[-1].message))
+        self.assertEqual(last_action, "specific_action")
+
+    def test_nested_flows_are_compiled(self):
+        inner = Flow(start=NumberNode(5))
+        inner.start_node >> AddNode(1)
+        outer = Flow(start=inner)
+        inner >> AddNode(10)
+        outer.compile()
+        self.assertIsNotNone(inner._plan)
+        shared = {}
+        outer.run(shared)
+        self.assertEqual(shared['current'], 16)
+
+    def test_empty_flow(self):
+        self.assertIsNone(Flow().compile().run({}))
+
+    def test_start_invalidates_plan(self):
+        flow = self.build_cycle().compile()
+        flow.start(NumberNode(7))
+        shared = {}
+        flow.run(shared)
+        self.assertEqual(shared['current'], 7)
+
+    def test_rewiring_after_compile_is_picked_up(self):
+        start = NumberNode(1)
+        start >> AddNode(2)
+        flow = Flow(start=start).compile()
+        flow.run({})
+        start.successors['default'] >> AddNode(10)
+        shared = {}
+        flow.run(shared)
+        self.assertEqual(shared['current'], 13)
+
+    def test_rewiring_nested_flow_is_picked_up(self):
+        inner = Flow(start=NumberNode(5))
+        outer = Flow(start=inner).compile()
+        inner.start_node >> AddNode(1)
+        shared = {}
+        outer.run(shared)
+        self.assertEqual(shared['current'], 6)
+
+    def test_async_flow_compiled(self):
+        start = NumberNode(1)
+        start >> AsyncAddNode(2) >> AddNode(3)
+        flow = AsyncFlow(start=start).compile()
+        shared = {}
+        asyncio.run(flow.run_async(shared))
+        self.assertEqual(shared['current'], 6)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,170 @@
+import unittest
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import Node, Flow, BatchFlow, AsyncNode, AsyncFlow, ParallelNode, ThreadPoolBatchNode
+from pocketflow.spec import to_spec, dump_spec, load_flow, register, registry as spec_registry
+
+@register
+class Add(Node):
+    def __init__(self, amount):
+        super().__init__()
+        self.amount = amount
+    def post(self, shared_storage, prep_res, exec_res):
+        shared_storage['total'] = shared_storage.get('total', 0) + self.amount * self.params.get('scale', 1)
+
+@register
+class Check(Node):
+    actions = ("big", "small")
+    def post(self, shared_storage, prep_res, exec_res):
+        return "big" if shared_storage['total'] >= 10 else "small"
+
+@register(name="scales")
+class Scales(BatchFlow):
+    def prep(self, shared_storage):
+        return [{"scale": s} for s in (1, 2)]
+
+@register
+class Mark(Node):
+    def __init__(self, key="marked"):
+        super().__init__()
+        self.key = key
+    def post(self, shared_storage, prep_res, exec_res):
+        shared_storage[self.key] = True
+
+@register
+class Wait(AsyncNode):
+    async def post_async(self, shared_storage, prep_res, exec_res):
+        shared_storage['waited'] = self.timeout
+
+class Unregistered(Node):
+    pass
+
+def build():
+    add, check, big, small = Add(3), Check(), Mark("big"), Mark("small")
+    add.max_retries, add.wait = 3, 0.5
+    add >> check
+    check - "big" >> big
+    check - "small" >> small
+    inner = Scales(start=add)
+    inner.set_params({"tag": "x"})
+    return Flow(start=inner)
+
+class TestFlowSpec(unittest.TestCase):
+    def test_round_trip_runs_the_same(self):
+        original = build()
+        loaded = load_flow(json.dumps(to_spec(original)))
+        a, b = {}, {}
+        original.run(a)
+        loaded.run(b)
+        self.assertEqual(a, b)
+        self.assertEqual(a, {'total': 9, 'small': True})
+        self.assertIsNot(loaded.start_node, original.start_node)
+
+    def test_spec_contents(self):
+        spec = to_spec(build())
+        self.assertEqual(spec["root"], "Flow")
+        nodes = spec["nodes"]
+        self.assertEqual(nodes["Flow"]["start"], "Scales")
+        self.assertEqual(nodes["Scales"]["type"], "scales")
+        self.assertEqual(nodes["Scales"]["attrs"]["params"], {"tag": "x"})
+        self.assertEqual(nodes["Add"]["attrs"], {"params": {}, "max_retries": 3, "wait": 0.5, "amount": 3})
+        self.assertEqual(nodes["Check"]["next"], {"big": "Mark", "small": "Mark_2"})
+
+    def test_reload_is_stable(self):
+        spec = to_spec(build())
+        self.assertEqual(to_spec(load_flow(spec)), spec)
+
+    def test_async_timeout_and_parallel_branches(self):
+        wait = Wait()
+        wait.timeout = 5
+        flow = AsyncFlow(start=wait)
+        wait >> ParallelNode(Flow(start=Mark("left")), Mark("right"))
+        loaded = load_flow(to_spec(flow))
+        shared = {}
+        asyncio.run(loaded.run_async(shared))
+        self.assertEqual(shared, {"waited": 5, "left": True, "right": True})
+
+    def test_yaml_file(self):
+        try:
+            import yaml  # noqa: F401
+        except ImportError:
+            self.skipTest("PyYAML not installed")
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, "flow.yaml")
+            dump_spec(build(), path)
+            with open(path) as f:
+                self.assertIn("type: scales", f.read())
+            shared = {}
+            load_flow(path).run(shared)
+            self.assertEqual(shared["total"], 9)
+
+    def test_loading_is_cached(self):
+        chain = [Add(1) for _ in range(300)]
+        for a, b in zip(chain, chain[1:]):
+            a >> b
+        text = dump_spec(Flow(start=chain[0]))
+        load_flow(text)
+        start = time.perf_counter()
+        flow = load_flow(text)
+        self.assertLess(time.perf_counter() - start, 0.1)
+        shared = {}
+        flow.run(shared)
+        self.assertEqual(shared["total"], 300)
+
+    def test_reregistered_type_is_used(self):
+        registry = dict(spec_registry)
+        class Old(Node):
+            pass
+        class New(Node):
+            pass
+        register(Old, "Step", registry)
+        text = dump_spec(Flow(start=Old()), registry=registry)
+        self.assertIsInstance(load_flow(text, registry=registry).start_node, Old)
+        register(New, "Step", registry)
+        self.assertIsInstance(load_flow(text, registry=registry).start_node, New)
+
+    def test_tuples_round_trip(self):
+        node = Mark()
+        node.pair = (1, ("a", [2]))
+        text = dump_spec(Flow(start=node))
+        self.assertEqual(load_flow(text).start_node.pair, (1, ("a", [2])))
+
+    def test_pool_node_round_trip(self):
+        node = ThreadPoolBatchNode(max_workers=2, chunk_size=4)
+        node.run({})
+        spec = to_spec(Flow(start=node))
+        node.shutdown()
+        self.assertEqual(spec["nodes"]["ThreadPoolBatchNode"]["attrs"]["chunk_size"], 4)
+        loaded = load_flow(spec).start_node
+        self.assertIsNone(loaded.executor)
+        self.assertEqual(loaded.max_workers, 2)
+
+    def test_unregistered_types(self):
+        spec = to_spec(Flow(start=Unregistered()))
+        self.assertEqual(spec["nodes"]["Unregistered"]["type"], f"{__name__}:Unregistered")
+        with self.assertRaises(KeyError):
+            load_flow(spec)
+        self.assertIsInstance(load_flow(spec, allow_import=True).start_node, Unregistered)
+
+    def test_non_json_attribute_is_rejected(self):
+        node = Mark()
+        node.client = object()
+        with self.assertRaises(TypeError) as cm:
+            to_spec(Flow(start=node))
+        self.assertIn("Mark.client", str(cm.exception))
+
+    def test_bad_specs(self):
+        with self.assertRaises(ValueError):
+            load_flow({"version": 99, "root": "a", "nodes": {}})
+        with self.assertRaises(ValueError):
+            load_flow({"version": 1, "root": "a", "nodes": {"a": {"type": "Node", "next": {"default": "missing"}}}})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+import unittest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import Node, Flow, BatchFlow, AsyncNode, AsyncFlow, ParallelNode, AsyncParallelNode
+
+class Decide(Node):
+    actions = ("search", "answer")
+
+class Search(Node):
+    pass
+
+class Answer(Node):
+    pass
+
+class Fetch(AsyncNode):
+    pass
+
+def kinds(issues):
+    return sorted(kind for kind, _ in issues)
+
+class TestFlowValidate(unittest.TestCase):
+    def test_valid_agent_loop(self):
+        decide, search, answer = Decide(), Search(), Answer()
+        decide - "search" >> search
+        decide - "answer" >> answer
+        search >> decide
+        self.assertEqual(Flow(start=decide).validate(), [])
+
+    def test_missing_successor_for_declared_action(self):
+        decide, search = Decide(), Search()
+        decide - "search" >> search
+        search >> decide
+        issues = Flow(start=decide).validate()
+        self.assertEqual(kinds(issues), ["missing_successor"])
+        self.assertIn("Flow/Decide can return 'answer'", issues[0][1])
+
+    def test_unused_action_makes_node_unreachable(self):
+        decide, search, answer, orphan = Decide(), Search(), Answer(), Answer()
+        decide - "search" >> search
+        decide - "answer" >> answer
+        decide - "retry" >> orphan
+        search >> decide
+        issues = Flow(start=decide).validate()
+        self.assertEqual(kinds(issues), ["unreachable", "unused_action"])
+
+    def test_default_action_declared_as_none(self):
+        class Step(Node):
+            actions = (None,)
+        a, b = Step(), Search()
+        a >> b
+        self.assertEqual(Flow(start=a).validate(), [])
+
+    def test_cycle_without_exit(self):
+        class Ping(Node):
+            actions = ("pong",)
+        class Pong(Node):
+            actions = ("ping",)
+        ping, pong = Ping(), Pong()
+        ping - "pong" >> pong
+        pong - "ping" >> ping
+        issues = Flow(start=ping).validate()
+        self.assertEqual(kinds(issues), ["no_exit"])
+        self.assertIn("Flow/Ping, Flow/Pong", issues[0][1])
+
+    def test_cycle_with_undeclared_node_may_exit(self):
+        # Search declares no actions, so it may return one without a successor and end the flow
+        loop = Search()
+        loop >> loop
+        self.assertEqual(Flow(start=loop).validate(), [])
+        class Ping(Node):
+            actions = ("pong",)
+        ping, search = Ping(), Search()
+        ping - "pong" >> search
+        search >> ping
+        self.assertEqual(Flow(start=ping).validate(), [])
+
+    def test_nested_flows_are_checked(self):
+        inner_decide, search = Decide(), Search()
+        inner_decide - "search" >> search
+        inner = Flow(start=inner_decide)
+        outer = Flow(start=inner)
+        inner >> Answer()
+        issues = outer.validate()
+        self.assertEqual(kinds(issues), ["missing_successor"])
+        self.assertIn("Flow/Flow/Decide", issues[0][1])
+
+    def test_sync_nodes_in_async_flow(self):
+        fetch, parse = Fetch(), Search()
+        fetch >> parse
+        flow = AsyncFlow(start=fetch)
+        self.assertEqual(kinds(flow.validate()), ["sync_in_async"])
+        parse.offload = True
+        self.assertEqual(flow.validate(), [])
+        parse.offload = None
+        flow.offload_sync = True
+        self.assertEqual(flow.validate(), [])
+
+    def test_async_node_in_sync_flow(self):
+        self.assertEqual(kinds(BatchFlow(start=Fetch()).validate()), ["async_in_sync"])
+
+    def test_parallel_branches_are_checked(self):
+        decide = Decide()
+        decide - "search" >> Search()
+        self.assertEqual(kinds(Flow(start=ParallelNode(Flow(start=decide), Answer())).validate()), ["missing_successor"])
+
+    def test_async_branch_in_sync_parallel_node(self):
+        issues = Flow(start=ParallelNode(Fetch(), AsyncFlow(start=Fetch()), Answer())).validate()
+        self.assertEqual(kinds(issues), ["async_in_sync", "async_in_sync"])
+        self.assertIn("Flow/ParallelNode/Fetch", issues[0][1])
+        # An AsyncParallelNode runs sync branches in threads, so they don't block the loop
+        self.assertEqual(AsyncFlow(start=AsyncParallelNode(Fetch(), Answer())).validate(), [])
+
+    def test_strict_raises(self):
+        with self.assertRaises(ValueError) as cm:
+            Flow().validate(strict=True)
+        self.assertIn("no start node", str(cm.exception))
+
+if __name__ == '__main__':
+    unittest.main()
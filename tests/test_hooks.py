@@ -0,0 +1,153 @@
+import unittest
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import Node, Flow, BatchFlow, AsyncNode, AsyncFlow, AsyncParallelBatchFlow, ThreadPoolBatchNode, Hooks
+
+class Recorder(Hooks):
+    def __init__(self):
+        self.events = []
+    def on_flow_start(self, flow, path, params, t):
+        self.events.append(("flow_start", path, params))
+    def on_flow_end(self, flow, path, action, t_start, t_end, error):
+        self.assert_ordered(t_start, t_end)
+        self.events.append(("flow_end", path, action, type(error).__name__ if error else None))
+    def on_node_start(self, node, path, t):
+        self.events.append(("node_start", path))
+    def on_node_end(self, node, path, action, t_start, t_end, retries, error):
+        self.assert_ordered(t_start, t_end)
+        self.events.append(("node_end", path, action, retries))
+    def on_retry(self, node, path, attempt, exc, delay):
+        self.events.append(("retry", path, attempt, str(exc)))
+    def on_fallback(self, node, path, attempt, exc):
+        self.events.append(("fallback", path, attempt, str(exc)))
+    def assert_ordered(self, t_start, t_end):
+        assert t_end >= t_start
+
+class Step(Node):
+    def __init__(self, action=None, **kwargs):
+        super().__init__(**kwargs)
+        self.action = action
+    def post(self, shared_storage, prep_res, exec_res):
+        return self.action
+
+class Flaky(Node):
+    def exec(self, prep_res):
+        if self.cur_retry == 0:
+            raise ValueError("first")
+        raise ValueError("again")
+    def exec_fallback(self, prep_res, exc):
+        return "fb"
+
+class AsyncFlaky(AsyncNode):
+    async def exec_async(self, prep_res):
+        raise ValueError("boom")
+    async def exec_fallback_async(self, prep_res, exc):
+        return "fb"
+
+class PoolFlaky(ThreadPoolBatchNode):
+    def prep(self, shared_storage):
+        return [1, 2]
+    def exec(self, item):
+        raise ValueError(f"item{item}")
+    def exec_fallback(self, prep_res, exc):
+        return None
+
+class TestHooks(unittest.TestCase):
+    def test_nested_flow_events(self):
+        inner_start = Step()
+        inner_start >> Step()
+        inner = Flow(start=inner_start)
+        first = Step()
+        first >> inner >> Flaky(max_retries=2)
+        recorder = Recorder()
+        outer = Flow(start=first).add_hook(recorder)
+        outer.run({})
+        self.assertEqual(recorder.events, [
+            ("flow_start", ("Flow",), None),
+            ("node_start", ("Flow", "Step")),
+            ("node_end", ("Flow", "Step"), None, 0),
+            ("node_start", ("Flow", "Flow")),
+            ("flow_start", ("Flow", "Flow"), None),
+            ("node_start", ("Flow", "Flow", "Step")),
+            ("node_end", ("Flow", "Flow", "Step"), None, 0),
+            ("node_start", ("Flow", "Flow", "Step")),
+            ("node_end", ("Flow", "Flow", "Step"), None, 0),
+            ("flow_end", ("Flow", "Flow"), None, None),
+            ("node_end", ("Flow", "Flow"), None, None),
+            ("node_start", ("Flow", "Flaky")),
+            ("retry", ("Flow", "Flaky"), 0, "first"),
+            ("fallback", ("Flow", "Flaky"), 1, "again"),
+            ("node_end", ("Flow", "Flaky"), None, 1),
+            ("flow_end", ("Flow",), None, None),
+        ])
+
+    def test_batch_iterations_and_errors(self):
+        class Params(BatchFlow):
+            def prep(self, shared_storage):
+                return [{'i': 0}, {'i': 1}]
+        class Boom(Node):
+            def prep(self, shared_storage):
+                if self.params['i'] == 1:
+                    raise KeyError("bad")
+        recorder = Recorder()
+        flow = Params(start=Boom()).add_hook(recorder)
+        with self.assertRaises(KeyError):
+            flow.run({})
+        self.assertEqual(recorder.events[0], ("flow_start", ("Params",), {'i': 0}))
+        self.assertEqual(recorder.events[-1], ("flow_end", ("Params",), None, "KeyError"))
+
+    def test_async_and_parallel_children(self):
+        class Params(AsyncParallelBatchFlow):
+            async def prep_async(self, shared_storage):
+                return [{'i': 0}, {'i': 1}]
+        recorder = Recorder()
+        flow = AsyncFlow(start=Params(start=AsyncFlow(start=AsyncFlaky()))).add_hook(recorder)
+        asyncio.run(flow.run_async({}))
+        fallbacks = [e for e in recorder.events if e[0] == "fallback"]
+        self.assertEqual(fallbacks, [("fallback", ("AsyncFlow", "Params", "AsyncFlow", "AsyncFlaky"), 0, "boom")] * 2)
+
+    def test_async_node_reports_retries(self):
+        class AsyncRetry(AsyncNode):
+            async def exec_async(self, prep_res):
+                raise ValueError(f"try{self.cur_retry}")
+            async def exec_fallback_async(self, prep_res, exc):
+                return "fb"
+        recorder = Recorder()
+        asyncio.run(AsyncFlow(start=AsyncRetry(max_retries=3)).add_hook(recorder).run_async({}))
+        path = ("AsyncFlow", "AsyncRetry")
+        self.assertEqual(recorder.events[1:-1], [
+            ("node_start", path),
+            ("retry", path, 0, "try0"),
+            ("retry", path, 1, "try1"),
+            ("fallback", path, 2, "try2"),
+            ("node_end", path, None, 2),
+        ])
+
+    def test_thread_pool_items_report(self):
+        recorder = Recorder()
+        Flow(start=PoolFlaky()).add_hook(recorder).run({})
+        fallbacks = sorted(e[3] for e in recorder.events if e[0] == "fallback")
+        self.assertEqual(fallbacks, ["item1", "item2"])
+
+    def test_no_hooks_outside_hooked_flow(self):
+        recorder = Recorder()
+        Flow(start=Step()).add_hook(recorder).run({})
+        count = len(recorder.events)
+        Flow(start=Flaky(max_retries=2)).run({})
+        self.assertEqual(len(recorder.events), count)
+
+    def test_plain_object_with_subset_of_methods(self):
+        class OnlyEnd:
+            def __init__(self): self.actions = []
+            def on_node_end(self, node, path, action, *rest): self.actions.append(action)
+        hook = OnlyEnd()
+        first = Step("go")
+        first - "go" >> Step("stop")
+        Flow(start=first).compile().add_hook(hook).run({})
+        self.assertEqual(hook.actions, ["go", "stop"])
+
+if __name__ == '__main__':
+    unittest.main()
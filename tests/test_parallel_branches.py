@@ -0,0 +1,100 @@
+import unittest
+import asyncio
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import Node, Flow, AsyncNode, AsyncFlow, ParallelNode, AsyncParallelNode
+
+class SleepWrite(Node):
+    def __init__(self, key, value, delay=0.05, action=None):
+        super().__init__()
+        self.key, self.value, self.delay, self.action = key, value, delay, action
+    def exec(self, prep_res):
+        time.sleep(self.delay)
+        return threading.get_ident()
+    def post(self, shared_storage, prep_res, exec_res):
+        shared_storage[self.key] = (self.value, self.params.get('tag'))
+        return self.action
+
+class AsyncSleepWrite(AsyncNode):
+    def __init__(self, key, value, delay=0.05):
+        super().__init__()
+        self.key, self.value, self.delay = key, value, delay
+    async def exec_async(self, prep_res):
+        await asyncio.sleep(self.delay)
+    async def post_async(self, shared_storage, prep_res, exec_res):
+        shared_storage[self.key] = self.value
+
+class Combine(Node):
+    def prep(self, shared_storage):
+        shared_storage['answer'] = (shared_storage['schema'][0], shared_storage['docs'][0])
+
+class TestParallelBranches(unittest.TestCase):
+    def test_sync_branches_overlap_and_join(self):
+        fork = ParallelNode(SleepWrite('schema', 'S'), SleepWrite('docs', 'D'), SleepWrite('extra', 'E'))
+        fork >> Combine()
+        flow = Flow(start=fork)
+        flow.set_params({'tag': 't'})
+        shared = {'question': 'q'}
+        start = time.time()
+        flow.run(shared)
+        self.assertLess(time.time() - start, 0.12)
+        self.assertEqual(shared['answer'], ('S', 'D'))
+        self.assertEqual(shared['extra'], ('E', 't'))
+        self.assertEqual(shared['question'], 'q')
+
+    def test_chain_branch_and_actions(self):
+        first = SleepWrite('a', 1, 0, action="next")
+        first - "next" >> SleepWrite('b', 2, 0, action="chain_done")
+        class Report(ParallelNode):
+            def post(self, shared_storage, prep_res, exec_res):
+                shared_storage['actions'] = exec_res
+                return "joined"
+        fork = Report(first, SleepWrite('c', 3, 0, action="single"))
+        shared = {}
+        self.assertEqual(Flow(start=fork).run(shared), "joined")
+        self.assertEqual(shared['actions'], ["chain_done", "single"])
+        self.assertEqual(shared['b'], (2, None))
+
+    def test_conflicting_writes_raise(self):
+        fork = ParallelNode(SleepWrite('k', 1, 0), SleepWrite('k', 2, 0))
+        with self.assertRaises(ValueError):
+            Flow(start=fork).run({})
+        # identical values are not a conflict
+        shared = {}
+        Flow(start=ParallelNode(SleepWrite('k', 1, 0), SleepWrite('k', 1, 0))).run(shared)
+        self.assertEqual(shared['k'], (1, None))
+
+    def test_custom_merge_and_deletes(self):
+        class Remove(Node):
+            def prep(self, shared_storage):
+                del shared_storage['tmp']
+        class Concat(ParallelNode):
+            def merge(self, shared_storage, branch_stores):
+                shared_storage['all'] = sorted(s['k'][0] for s in branch_stores)
+        shared = {'tmp': 1}
+        Flow(start=ParallelNode(Remove(), SleepWrite('x', 1, 0))).run(shared)
+        self.assertNotIn('tmp', shared)
+        shared = {}
+        Flow(start=Concat(SleepWrite('k', 2, 0), SleepWrite('k', 1, 0))).run(shared)
+        self.assertEqual(shared['all'], [1, 2])
+
+    def test_async_branches_mixed(self):
+        fork = AsyncParallelNode(AsyncSleepWrite('schema', ('S',)), SleepWrite('docs', 'D'), AsyncFlow(start=AsyncSleepWrite('x', 1)))
+        fork >> Combine()
+        shared = {}
+        start = time.time()
+        asyncio.run(AsyncFlow(start=fork).run_async(shared))
+        self.assertLess(time.time() - start, 0.12)
+        self.assertEqual(shared['answer'], ('S', 'D'))
+        self.assertEqual(shared['x'], 1)
+
+    def test_async_parallel_requires_async_flow(self):
+        with self.assertRaises(RuntimeError):
+            Flow(start=AsyncParallelNode(AsyncSleepWrite('a', 1))).run({})
+
+if __name__ == '__main__':
+    unittest.main()
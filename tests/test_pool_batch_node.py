@@ -0,0 +1,136 @@
+import unittest
+import os
+import pickle
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from concurrent.futures import ThreadPoolExecutor
+from pocketflow import Node, Flow, ThreadPoolBatchNode, ProcessPoolBatchNode
+from pocketflow.cache import ExecCache
+
+class SleepySquare(ThreadPoolBatchNode):
+    def prep(self, shared_storage):
+        return shared_storage['input_numbers']
+
+    def exec(self, number):
+        time.sleep(0.05)
+        return number * number, threading.get_ident()
+
+    def post(self, shared_storage, prep_result, exec_result):
+        shared_storage['results'] = [r for r, _ in exec_result]
+        shared_storage['threads'] = {t for _, t in exec_result}
+
+class FlakySquare(ThreadPoolBatchNode):
+    # Fails the first attempt of every odd item, and always fails on 13
+    def prep(self, shared_storage):
+        return shared_storage['input_numbers']
+
+    def exec(self, number):
+        if number == 13 or (number % 2 and self.cur_retry == 0):
+            raise ValueError(f"failed on {number}")
+        return number * number
+
+    def exec_fallback(self, prep_res, exc):
+        return -1
+
+    def post(self, shared_storage, prep_result, exec_result):
+        shared_storage['results'] = exec_result
+
+class ProcessSquare(ProcessPoolBatchNode):
+    def prep(self, shared_storage):
+        return shared_storage['input_numbers']
+
+    def exec(self, number):
+        if number < 0 and self.cur_retry == 0:
+            raise ValueError("retry me")
+        return number * number, os.getpid()
+
+    def post(self, shared_storage, prep_result, exec_result):
+        shared_storage['results'] = [r for r, _ in exec_result]
+        shared_storage['pids'] = {p for _, p in exec_result}
+
+class TestPoolBatchNode(unittest.TestCase):
+    def test_thread_pool_runs_concurrently_in_order(self):
+        shared = {'input_numbers': list(range(8))}
+        start = time.time()
+        SleepySquare(max_workers=8).run(shared)
+        self.assertLess(time.time() - start, 0.3)
+        self.assertEqual(shared['results'], [n * n for n in range(8)])
+        self.assertGreater(len(shared['threads']), 1)
+
+    def test_thread_pool_chunking(self):
+        shared = {'input_numbers': list(range(7))}
+        SleepySquare(max_workers=2, chunk_size=3).run(shared)
+        self.assertEqual(shared['results'], [n * n for n in range(7)])
+        self.assertLessEqual(len(shared['threads']), 2)
+
+    def test_retry_and_fallback_per_item(self):
+        shared = {'input_numbers': list(range(16))}
+        FlakySquare(max_retries=2, max_workers=4).run(shared)
+        expected = [n * n for n in range(16)]
+        expected[13] = -1
+        self.assertEqual(shared['results'], expected)
+
+    def test_fallback_error_propagates(self):
+        node = FlakySquare(max_retries=1, max_workers=2)
+        node.exec_fallback = lambda prep_res, exc: (_ for _ in ()).throw(exc)
+        with self.assertRaises(ValueError):
+            node.run({'input_numbers': [2, 4, 13]})
+
+    def test_empty_input(self):
+        shared = {'input_numbers': []}
+        SleepySquare().run(shared)
+        self.assertEqual(shared['results'], [])
+
+    def test_process_pool_in_flow(self):
+        shared = {'input_numbers': [-3, 1, 2, 3, -4, 5]}
+        node = ProcessSquare(max_retries=2, max_workers=2, chunk_size=2)
+        node >> Node()  # successors are not shipped to workers
+        Flow(start=node).run(shared)
+        self.assertEqual(shared['results'], [9, 1, 4, 9, 16, 25])
+        self.assertNotIn(os.getpid(), shared['pids'])
+
+    def test_executor_is_kept_across_runs(self):
+        node = SleepySquare(max_workers=2)
+        self.assertIsNone(node.executor)  # created on first use
+        flow = Flow(start=node)
+        first, second = {'input_numbers': list(range(4))}, {'input_numbers': list(range(4))}
+        flow.run(first)
+        flow.run(second)
+        self.assertIsNotNone(node.executor)  # flow copies share the node's pool
+        self.assertEqual(first['threads'] | second['threads'], first['threads'])
+        node.shutdown()
+        self.assertIsNone(node.executor)
+        node.run(first)  # a new pool is created on demand
+        node.shutdown()
+
+    def test_shared_executor(self):
+        with ThreadPoolExecutor(2) as ex:
+            a, b = SleepySquare(executor=ex), SleepySquare(executor=ex)
+            shared = {'input_numbers': list(range(4))}
+            a.run(shared)
+            b.run(shared)
+            self.assertIs(a.executor, ex)
+            self.assertEqual(shared['results'], [n * n for n in range(4)])
+
+    def test_chunk_size_is_validated(self):
+        for size in (0, -2, 1.5):
+            with self.assertRaises(ValueError):
+                SleepySquare(chunk_size=size)
+
+    def test_process_pool_with_cache(self):
+        node = ProcessSquare(max_workers=2)
+        node.cache = ExecCache()
+        clone = pickle.loads(pickle.dumps(node))
+        self.assertIsNone(clone.executor)
+        self.assertIsNone(clone.cache)
+        shared = {'input_numbers': [1, 2, 3]}
+        node.run(shared)
+        self.assertEqual(shared['results'], [1, 4, 9])
+        node.shutdown()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import Node, Flow
+from pocketflow.process import ProcessBatchFlow
+
+class Square(Node):
+    def prep(self, shared_storage):
+        return self.params['x']
+    def exec(self, x):
+        if x == 3 and self.params.get('fail'):
+            raise ValueError("bad item")
+        return x * x, os.getpid()
+    def post(self, shared_storage, prep_res, exec_res):
+        value, pid = exec_res
+        shared_storage.setdefault('squares', {})[prep_res] = value
+        shared_storage.setdefault('order', []).append(prep_res)
+        shared_storage.setdefault('pids', []).append(pid)
+        shared_storage['last'] = prep_res
+        shared_storage['config']['seen'] = True
+
+class Cleanup(Node):
+    def post(self, shared_storage, prep_res, exec_res):
+        shared_storage.pop('scratch', None)
+
+class Numbers(ProcessBatchFlow):
+    def prep(self, shared_storage):
+        return [{"x": x, "fail": shared_storage.get('fail', False)} for x in range(6)]
+
+class Tolerant(Numbers):
+    def on_error(self, shared_storage, params, exc):
+        shared_storage.setdefault('errors', []).append((params['x'], str(exc)))
+
+def build(cls=Numbers, **kwargs):
+    square = Square()
+    square >> Cleanup()
+    return cls(start=Flow(start=square), **kwargs)
+
+class TestProcessBatchFlow(unittest.TestCase):
+    def test_runs_in_workers_and_merges_in_order(self):
+        shared = {'config': {'name': 'demo'}, 'order': ['seed'], 'scratch': 1}
+        build(max_workers=2, chunk_size=2).run(shared)
+        self.assertEqual(shared['squares'], {x: x * x for x in range(6)})
+        self.assertEqual(shared['order'], ['seed', 0, 1, 2, 3, 4, 5])
+        self.assertEqual(shared['last'], 5)
+        self.assertEqual(shared['config'], {'name': 'demo', 'seen': True})
+        self.assertNotIn('scratch', shared)
+        self.assertNotIn(os.getpid(), shared['pids'])
+        self.assertLessEqual(len(set(shared['pids'])), 2)
+
+    def test_failure_is_isolated_to_its_param_set(self):
+        shared = {'config': {}, 'fail': True}
+        with self.assertRaises(ValueError):
+            build(max_workers=2).run(shared)
+        self.assertEqual(sorted(shared['squares']), [0, 1, 2, 4, 5])
+
+    def test_on_error_can_continue(self):
+        shared = {'config': {}, 'fail': True}
+        build(Tolerant, max_workers=2, chunk_size=3).run(shared)
+        self.assertEqual(shared['errors'], [(3, 'bad item')])
+        self.assertEqual(shared['order'], [0, 1, 2, 4, 5])
+
+    def test_matches_sequential_batch_flow(self):
+        from pocketflow import BatchFlow
+        class Sequential(BatchFlow):
+            prep = Numbers.prep
+        a, b = {'config': {}}, {'config': {}}
+        build(Sequential).run(a)
+        build(max_workers=3).run(b)
+        for key in ('squares', 'order', 'last', 'config'):
+            self.assertEqual(a[key], b[key])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+import unittest
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import AsyncNode, AsyncParallelBatchNode, AsyncFlow, AsyncParallelBatchFlow
+from pocketflow.ratelimit import RateLimiter, get_limiter
+
+class Track(AsyncParallelBatchNode):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.active = self.peak = 0
+    async def prep_async(self, shared):
+        return shared["items"]
+    async def exec_async(self, item):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.02)
+        self.active -= 1
+        return item
+    async def post_async(self, shared, prep_res, exec_res):
+        shared["out"] = exec_res
+
+class TestRateLimiter(unittest.TestCase):
+    def test_requests_per_second(self):
+        node = Track()
+        node.rate_limit = RateLimiter(rps=50, burst=1)
+        shared = {"items": list(range(6))}
+        start = time.perf_counter()
+        asyncio.run(node.run_async(shared))
+        self.assertGreaterEqual(time.perf_counter() - start, 0.09)
+        self.assertEqual(shared["out"], list(range(6)))
+        self.assertEqual(node.rate_limit.acquired, 6)
+        self.assertGreater(node.rate_limit.wait_time, 0)
+
+    def test_max_inflight(self):
+        node = Track()
+        node.rate_limit = RateLimiter(max_inflight=2)
+        asyncio.run(node.run_async({"items": list(range(8))}))
+        self.assertEqual(node.peak, 2)
+        self.assertEqual(node.rate_limit.inflight, 0)
+
+    def test_tokens_per_minute_uses_rate_cost(self):
+        class Prompt(AsyncNode):
+            rate_limit = RateLimiter(tpm=6000)
+            def rate_cost(self, prep_res):
+                return prep_res
+            async def prep_async(self, shared):
+                return shared["tokens"]
+        async def main():
+            await Prompt().run_async({"tokens": 6000})
+            start = time.perf_counter()
+            await Prompt().run_async({"tokens": 10})
+            return time.perf_counter() - start
+        self.assertGreaterEqual(asyncio.run(main()), 0.08)
+
+    def test_each_retry_waits(self):
+        class Flaky(AsyncNode):
+            rate_limit = RateLimiter(rps=20, burst=1)
+            calls = 0
+            async def exec_async(self, prep_res):
+                type(self).calls += 1
+                if type(self).calls < 3:
+                    raise ValueError("429")
+                return "ok"
+            async def post_async(self, shared, prep_res, exec_res):
+                shared["out"] = exec_res
+        shared = {}
+        start = time.perf_counter()
+        asyncio.run(Flaky(max_retries=3).run_async(shared))
+        self.assertGreaterEqual(time.perf_counter() - start, 0.09)
+        self.assertEqual(shared["out"], "ok")
+        self.assertEqual(Flaky.rate_limit.acquired, 3)
+
+    def test_shared_across_concurrent_flows(self):
+        limiter = RateLimiter(max_inflight=3)
+        nodes = []
+        class Step(AsyncNode):
+            rate_limit = limiter
+            async def exec_async(self, prep_res):
+                nodes.append(limiter.inflight)
+                await asyncio.sleep(0.01)
+        async def main():
+            await asyncio.gather(*(AsyncFlow(start=Step()).run_async({}) for _ in range(10)))
+        asyncio.run(main())
+        self.assertEqual(max(nodes), 3)
+        self.assertEqual(len(nodes), 10)
+
+    def test_round_robin_between_tenants(self):
+        order = []
+        class Call(AsyncNode):
+            rate_limit = RateLimiter(max_inflight=1)
+            async def exec_async(self, prep_res):
+                order.append(self.params["tenant"])
+                await asyncio.sleep(0.005)
+        class Jobs(AsyncParallelBatchFlow):
+            async def prep_async(self, shared):
+                return [{"tenant": "batch"}] * 4 + [{"tenant": "chat"}]
+        asyncio.run(Jobs(start=Call()).run_async({}))
+        self.assertEqual(order[:3], ["batch", "chat", "batch"])
+        self.assertEqual(len(order), 5)
+
+    def test_queue_depth_and_cancellation(self):
+        limiter = RateLimiter(max_inflight=1)
+        async def main():
+            await limiter.acquire()
+            waiters = [asyncio.ensure_future(limiter.acquire(tenant=t)) for t in "ab"]
+            await asyncio.sleep(0)
+            depth = limiter.queue_depth
+            waiters[0].cancel()
+            await asyncio.sleep(0)
+            limiter.release()
+            await waiters[1]
+            limiter.release()
+            return depth
+        self.assertEqual(asyncio.run(main()), 2)
+        self.assertEqual((limiter.queue_depth, limiter.inflight), (0, 0))
+
+    def test_registry(self):
+        a = get_limiter("test-provider", rps=5)
+        self.assertIs(get_limiter("test-provider"), a)
+        self.assertIs(get_limiter("test-provider", rps=5), a)
+        with self.assertRaises(ValueError):
+            get_limiter("test-provider", rps=10)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,208 @@
+import unittest
+import asyncio
+import sys
+import time
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import Node, AsyncNode, Flow, AsyncFlow, BatchFlow, AsyncParallelBatchFlow, RetryPolicy, RetryBudget
+
+class TransientError(Exception):
+    pass
+
+class FatalError(Exception):
+    pass
+
+class ThrottledError(Exception):
+    def __init__(self, retry_after):
+        super().__init__("throttled")
+        self.retry_after = retry_after
+
+class FlakyNode(Node):
+    def __init__(self, errors, **kwargs):
+        super().__init__(**kwargs)
+        self.errors = list(errors)
+        self.attempts = 0
+
+    def exec(self, prep_res):
+        self.attempts += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+    def exec_fallback(self, prep_res, exc):
+        return f"fallback:{type(exc).__name__}"
+
+    def post(self, shared_storage, prep_res, exec_res):
+        shared_storage['result'] = exec_res
+
+class AsyncFlakyNode(AsyncNode):
+    def __init__(self, errors, **kwargs):
+        super().__init__(**kwargs)
+        self.errors = list(errors)
+
+    async def exec_async(self, prep_res):
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+    async def exec_fallback_async(self, prep_res, exc):
+        return f"fallback:{type(exc).__name__}"
+
+    async def post_async(self, shared_storage, prep_res, exec_res):
+        shared_storage['result'] = exec_res
+
+class TestRetryPolicy(unittest.TestCase):
+    def run_node(self, node, sleeps):
+        shared = {}
+        with mock.patch('pocketflow.time.sleep', side_effect=sleeps.append):
+            node.run(shared)
+        return shared['result']
+
+    def test_default_behaviour_unchanged(self):
+        sleeps = []
+        node = FlakyNode([TransientError(), TransientError()], max_retries=3, wait=0.5)
+        self.assertEqual(self.run_node(node, sleeps), "ok")
+        self.assertEqual(sleeps, [0.5, 0.5])
+
+    def test_exponential_backoff_without_jitter(self):
+        sleeps = []
+        node = FlakyNode([TransientError()] * 4, max_retries=5, wait=1)
+        node.retry_policy = RetryPolicy(factor=2, max_wait=5, jitter=False)
+        self.assertEqual(self.run_node(node, sleeps), "ok")
+        self.assertEqual(sleeps, [1, 2, 4, 5])
+
+    def test_full_jitter_stays_within_backoff(self):
+        sleeps = []
+        node = FlakyNode([TransientError()] * 3, max_retries=4, wait=1)
+        node.retry_policy = RetryPolicy(factor=3)
+        with mock.patch('pocketflow.random.uniform', side_effect=lambda a, b: b / 2):
+            self.run_node(node, sleeps)
+        self.assertEqual(sleeps, [0.5, 1.5, 4.5])
+
+    def test_retry_on_filter(self):
+        sleeps = []
+        node = FlakyNode([TransientError(), FatalError()], max_retries=5)
+        node.retry_policy = RetryPolicy(retry_on=(TransientError,))
+        self.assertEqual(self.run_node(node, sleeps), "fallback:FatalError")
+        self.assertEqual(node.attempts, 2)
+
+    def test_give_up_on(self):
+        sleeps = []
+        node = FlakyNode([FatalError()], max_retries=5)
+        node.retry_policy = RetryPolicy(give_up_on=(FatalError,))
+        self.assertEqual(self.run_node(node, sleeps), "fallback:FatalError")
+        self.assertEqual(node.attempts, 1)
+
+    def test_retry_after_attribute_and_header(self):
+        class HeaderError(Exception):
+            response = type("Response", (), {"headers": {"retry-after": "7"}})()
+        sleeps = []
+        node = FlakyNode([ThrottledError(3), HeaderError()], max_retries=3, wait=0.1)
+        node.retry_policy = RetryPolicy(jitter=False)
+        self.assertEqual(self.run_node(node, sleeps), "ok")
+        self.assertEqual(sleeps, [3.0, 7.0])
+
+    def test_max_elapsed(self):
+        # sleeps 1 and 2 fit, the next (4) would exceed the 4s budget from t0
+        with mock.patch('pocketflow.time.monotonic', side_effect=[0, 0, 1, 3]):
+            sleeps = []
+            node = FlakyNode([TransientError()] * 10, max_retries=10, wait=1)
+            node.retry_policy = RetryPolicy(jitter=False, max_elapsed=4)
+            self.assertEqual(self.run_node(node, sleeps), "fallback:TransientError")
+            self.assertEqual(sleeps, [1, 2])
+
+    def test_shared_budget(self):
+        budget = RetryBudget(3)
+        policy = RetryPolicy(jitter=False, budget=budget)
+        first = FlakyNode([TransientError()] * 2, max_retries=5)
+        second = FlakyNode([TransientError()] * 2, max_retries=5)
+        first.retry_policy = second.retry_policy = policy
+        self.assertEqual(self.run_node(first, []), "ok")
+        self.assertEqual(self.run_node(second, []), "fallback:TransientError")
+        self.assertEqual(second.attempts, 2)
+
+    def test_budget_refills(self):
+        budget = RetryBudget(1, per=0.05)
+        self.assertTrue(budget.acquire())
+        self.assertFalse(budget.acquire())
+        time.sleep(0.06)
+        self.assertTrue(budget.acquire())
+
+    def test_flow_budget_is_bound_per_run(self):
+        first, second = FlakyNode([], max_retries=5), FlakyNode([], max_retries=5)
+        first >> second
+        flow = Flow(start=first)
+        flow.retry_budget = 3
+        for _ in range(2):
+            first.errors[:] = second.errors[:] = [TransientError()] * 2
+            shared = {}
+            flow.run(shared)
+            # first spends two retries, second gets the last one and falls back
+            self.assertEqual(shared['result'], "fallback:TransientError")
+            self.assertEqual(second.errors, [])
+
+    def test_flow_budget_covers_every_param_set(self):
+        class Flaky(Node):
+            attempts = 0
+            def exec(self, prep_res):
+                Flaky.attempts += 1
+                raise TransientError()
+            def exec_fallback(self, prep_res, exc):
+                return None
+        class Sets(BatchFlow):
+            def prep(self, shared_storage):
+                return [{'i': i} for i in range(4)]
+        flow = Sets(start=Flaky(max_retries=3))
+        flow.retry_budget = 2
+        flow.run({})
+        self.assertEqual(Flaky.attempts, 4 + 2)
+
+    def test_async_parallel_flow_budget_is_shared(self):
+        class Flaky(AsyncNode):
+            attempts = 0
+            async def exec_async(self, prep_res):
+                Flaky.attempts += 1
+                raise TransientError()
+            async def exec_fallback_async(self, prep_res, exc):
+                return None
+        class Sets(AsyncParallelBatchFlow):
+            async def prep_async(self, shared_storage):
+                return [{'i': i} for i in range(50)]
+        flow = Sets(start=Flaky(max_retries=3))
+        flow.retry_budget = 5
+        asyncio.run(flow.run_async({}))
+        self.assertEqual(Flaky.attempts, 50 + 5)
+
+    def test_flow_budget_instance_is_shared_across_runs(self):
+        node = FlakyNode([], max_retries=5)
+        flow = Flow(start=node)
+        flow.retry_budget = RetryBudget(1)
+        results = []
+        for _ in range(2):
+            node.errors[:] = [TransientError()]
+            shared = {}
+            flow.run(shared)
+            results.append(shared['result'])
+        self.assertEqual(results, ["ok", "fallback:TransientError"])
+
+    def test_async_flow_budget(self):
+        first = AsyncFlakyNode([TransientError()], max_retries=3)
+        second = AsyncFlakyNode([TransientError()], max_retries=3)
+        first >> second
+        flow = AsyncFlow(start=first)
+        flow.retry_budget = 1
+        shared = {}
+        asyncio.run(flow.run_async(shared))
+        self.assertEqual(shared['result'], "fallback:TransientError")
+
+    def test_async_node_uses_policy(self):
+        shared = {}
+        node = AsyncFlakyNode([TransientError(), FatalError()], max_retries=5, wait=0.001)
+        node.retry_policy = RetryPolicy(retry_on=(TransientError,))
+        asyncio.run(node.run_async(shared))
+        self.assertEqual(shared['result'], "fallback:FatalError")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+import unittest
+import asyncio
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from utils.semantic_cache import SemanticCache
+
+WORDS = ("capital", "france", "spain", "what", "is", "the", "why", "weather")
+
+def embed(text):
+    # Bag-of-words vector over a tiny vocabulary
+    words = text.lower().replace("?", "").split()
+    return [words.count(w) for w in WORDS] + [0.01]
+
+async def embed_async(text):
+    return embed(text)
+
+class LLM:
+    def __init__(self):
+        self.calls = []
+    def __call__(self, prompt, **params):
+        self.calls.append(prompt)
+        text = prompt if isinstance(prompt, str) else prompt[-1]["content"]
+        return f"answer to {text}"
+
+def make(**kwargs):
+    return SemanticCache(embed=embed, embed_async=embed_async, **kwargs)
+
+class TestSemanticCache(unittest.TestCase):
+    def test_exact_and_similar_hits(self):
+        cache, llm = make(threshold=0.9), LLM()
+        self.assertEqual(cache.call("What is the capital of France?", llm), "answer to What is the capital of France?")
+        self.assertEqual(cache.call("what is  the capital of france", llm), "answer to What is the capital of France?")
+        self.assertEqual(cache.call("What is the capital of France?", llm), "answer to What is the capital of France?")
+        self.assertEqual(len(llm.calls), 1)
+        m = cache.metrics()
+        self.assertEqual((m["exact_hits"], m["semantic_hits"], m["misses"]), (1, 1, 1))
+
+    def test_threshold(self):
+        llm = LLM()
+        strict, loose = make(threshold=0.99), make(threshold=0.5)
+        for cache in (strict, loose):
+            cache.call("What is the capital of France?", llm)
+            cache.call("capital of France", llm)
+        self.assertEqual(strict.metrics()["misses"], 2)
+        self.assertEqual(loose.metrics()["semantic_hits"], 1)
+
+    def test_params_and_namespaces_are_isolated(self):
+        cache, llm = make(), LLM()
+        cache.call("What is the capital of France?", llm, namespace="a")
+        cache.call("What is the capital of France?", llm, namespace="b")
+        cache.call("What is the capital of France?", llm, namespace="a", model="other")
+        self.assertEqual(len(llm.calls), 3)
+        cache.clear("a")
+        self.assertIsNone(cache.exact("What is the capital of France?", "a"))
+        self.assertIsNotNone(cache.exact("What is the capital of France?", "b"))
+
+    def test_chat_history_is_part_of_the_key(self):
+        cache, llm = make(), LLM()
+        one = [{"role": "user", "content": "weather in Spain"}, {"role": "assistant", "content": "sunny"}, {"role": "user", "content": "Why?"}]
+        two = [{"role": "user", "content": "capital of France"}, {"role": "assistant", "content": "Paris"}, {"role": "user", "content": "Why?"}]
+        cache.call(one, llm)
+        cache.call(two, llm)
+        self.assertEqual(len(llm.calls), 2)
+        cache.call([*two[:2], {"role": "user", "content": "why"}], llm)
+        self.assertEqual(len(llm.calls), 2)
+
+    def test_ttl(self):
+        cache, llm = make(ttl=0.02), LLM()
+        cache.call("What is the capital of France?", llm)
+        time.sleep(0.03)
+        cache.call("What is the capital of France?", llm)
+        cache.call("what is the capital of france", llm)
+        self.assertEqual(len(llm.calls), 2)
+        self.assertEqual(cache.metrics()["entries"], 1)
+
+    def test_lru_eviction_per_namespace(self):
+        cache, llm = make(max_entries=2), LLM()
+        cache.call("capital of France", llm)
+        cache.call("capital of Spain", llm)
+        cache.call("capital of France", llm)
+        cache.call("weather", llm)
+        self.assertIsNotNone(cache.exact("capital of France"))
+        self.assertIsNone(cache.exact("capital of Spain"))
+        self.assertIsNone(cache.search("capital of Spain", embed("capital of Spain")))
+        self.assertEqual(cache.metrics()["evictions"], 1)
+
+    def test_false_hit_accounting(self):
+        cache, llm = make(threshold=0.5, shadow_rate=1.0, agree=lambda cached, fresh: cached == fresh), LLM()
+        cache.call("What is the capital of France?", llm)
+        self.assertEqual(cache.call("the capital of France", llm), "answer to the capital of France")
+        cache.call("the capital of France", llm)
+        m = cache.metrics()
+        self.assertEqual((m["semantic_hits"], m["exact_hits"], m["shadow_checks"], m["false_hits"]), (1, 1, 1, 1))
+        self.assertEqual(m["false_hit_rate"], 1.0)
+
+    def test_async_uses_async_embedding(self):
+        def sync_embed(text):
+            raise AssertionError("sync embed called on the event loop")
+        cache = SemanticCache(embed=sync_embed, embed_async=embed_async, threshold=0.5, shadow_rate=1.0)
+        async def llm(prompt, **params):
+            return "answer"
+        async def main():
+            await cache.call_async("What is the capital of France?", llm)
+            return await cache.call_async("the capital of France", llm)
+        self.assertEqual(asyncio.run(main()), "answer")
+        m = cache.metrics()
+        self.assertEqual((m["semantic_hits"], m["shadow_checks"], m["false_hits"]), (1, 1, 0))
+
+    def test_counters_are_thread_safe(self):
+        cache, llm = make(), LLM()
+        cache.call("capital of France", llm)
+        def worker():
+            for _ in range(200):
+                cache.call("capital of France", llm)
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(cache.metrics()["exact_hits"], 1600)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,182 @@
+import unittest
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import AsyncNode, AsyncFlow
+from pocketflow.stream import AsyncStreamNode, StreamPipeline, Channel
+
+class Tokens(AsyncStreamNode):
+    def __init__(self, n=5, delay=0.02, **kwargs):
+        super().__init__(**kwargs)
+        self.n, self.delay = n, delay
+    async def prep_async(self, shared_storage):
+        shared_storage.setdefault('produced', [])
+        return shared_storage
+    async def exec_async(self, shared_storage):
+        for i in range(self.n):
+            await asyncio.sleep(self.delay)
+            shared_storage['produced'].append(i)
+            yield f"t{i}"
+    async def post_async(self, shared_storage, prep_res, exec_res):
+        shared_storage['text'] = "".join(exec_res)
+        shared_storage['producer_done'] = time.perf_counter()
+
+class Upper(AsyncStreamNode):
+    async def exec_async(self, prep_res):
+        async for chunk in self.input:
+            yield chunk.upper()
+
+class Collect(AsyncStreamNode):
+    def __init__(self, delay=0, limit=None):
+        super().__init__()
+        self.delay, self.limit = delay, limit
+    async def prep_async(self, shared_storage):
+        return shared_storage
+    async def exec_async(self, shared_storage):
+        got = shared_storage.setdefault('received', [])
+        async for chunk in self.input:
+            if not got:
+                shared_storage['first_chunk'] = time.perf_counter()
+            got.append(chunk)
+            shared_storage.setdefault('lag', []).append(len(shared_storage.get('produced', [])) - len(got))
+            if chunk == "fail":
+                raise ValueError("bad chunk")
+            if self.limit and len(got) >= self.limit:
+                return "early"
+            await asyncio.sleep(self.delay)
+        return "all"
+    async def post_async(self, shared_storage, prep_res, exec_res):
+        return exec_res
+
+class TestStreamPipeline(unittest.TestCase):
+    def test_chunks_arrive_before_the_stream_ends(self):
+        shared = {}
+        action = asyncio.run(StreamPipeline(Tokens(), Collect()).run_async(shared))
+        self.assertEqual(action, "all")
+        self.assertEqual(shared['received'], ["t0", "t1", "t2", "t3", "t4"])
+        self.assertEqual(shared['text'], "t0t1t2t3t4")
+        self.assertLess(shared['first_chunk'], shared['producer_done'] - 0.05)
+
+    def test_three_stages(self):
+        shared = {}
+        asyncio.run(StreamPipeline(Tokens(3, 0), Upper(), Collect()).run_async(shared))
+        self.assertEqual(shared['received'], ["T0", "T1", "T2"])
+
+    def test_buffer_bounds_how_far_producer_runs_ahead(self):
+        shared = {}
+        asyncio.run(StreamPipeline(Tokens(20, 0), Collect(delay=0.005), buffer=2).run_async(shared))
+        self.assertEqual(len(shared['received']), 20)
+        self.assertLessEqual(max(shared['lag']), 3)
+
+    def test_consumer_stopping_early_stops_producer(self):
+        shared = {}
+        action = asyncio.run(StreamPipeline(Tokens(50, 0), Collect(limit=3), buffer=1).run_async(shared))
+        self.assertEqual(action, "early")
+        self.assertLess(len(shared['produced']), 10)
+        self.assertEqual(shared['text'], "".join(f"t{i}" for i in range(len(shared['produced']))))
+
+    def test_failure_cancels_other_stages(self):
+        class Bad(AsyncStreamNode):
+            async def exec_async(self, prep_res):
+                yield "ok"
+                yield "fail"
+        shared = {}
+        with self.assertRaises(ValueError):
+            asyncio.run(StreamPipeline(Bad(), Collect()).run_async(shared))
+        shared = {'produced': []}
+        class Boom(AsyncStreamNode):
+            async def exec_async(self, prep_res):
+                async for chunk in self.input:
+                    raise RuntimeError("sink down")
+        with self.assertRaises(RuntimeError):
+            asyncio.run(StreamPipeline(Tokens(100, 0.01), Boom()).run_async(shared))
+        self.assertLess(len(shared['produced']), 5)
+
+    def test_retry_only_before_first_chunk(self):
+        class Flaky(AsyncStreamNode):
+            attempts = 0
+            async def exec_async(self, prep_res):
+                Flaky.attempts += 1
+                if Flaky.attempts == 1:
+                    raise ConnectionError("before any chunk")
+                yield "a"
+                if Flaky.attempts == 2:
+                    raise ConnectionError("mid stream")
+                yield "b"
+            async def exec_fallback_async(self, prep_res, exc):
+                return ["fallback"]
+            async def post_async(self, shared_storage, prep_res, exec_res):
+                shared_storage['result'] = exec_res
+        shared = {}
+        asyncio.run(StreamPipeline(Flaky(max_retries=3), Collect()).run_async(shared))
+        self.assertEqual(Flaky.attempts, 2)
+        self.assertEqual(shared['received'], ["a"])
+        self.assertEqual(shared['result'], ["fallback"])
+
+    def test_no_retry_after_reading_input(self):
+        class Sum(AsyncStreamNode):
+            attempts = 0
+            async def exec_async(self, prep_res):
+                Sum.attempts += 1
+                got = []
+                async for chunk in self.input:
+                    got.append(chunk)
+                    if Sum.attempts == 1 and len(got) == 2:
+                        raise ConnectionError("lost")
+                return got
+            async def exec_fallback_async(self, prep_res, exc):
+                return "fallback"
+            async def post_async(self, shared_storage, prep_res, exec_res):
+                shared_storage['result'] = exec_res
+        shared = {}
+        asyncio.run(StreamPipeline(Tokens(5, 0), Sum(max_retries=3)).run_async(shared))
+        self.assertEqual(Sum.attempts, 1)
+        self.assertEqual(shared['result'], "fallback")
+
+    def test_plain_async_node_stage_ends_the_stream(self):
+        class Plain(AsyncNode):
+            async def post_async(self, shared_storage, prep_res, exec_res):
+                shared_storage['plain'] = True
+        shared = {}
+        action = asyncio.run(asyncio.wait_for(StreamPipeline(Plain(), Collect()).run_async(shared), 1))
+        self.assertEqual(action, "all")
+        self.assertTrue(shared['plain'])
+        self.assertEqual(shared['received'], [])
+
+    def test_in_flow(self):
+        class Start(AsyncNode):
+            async def post_async(self, shared_storage, prep_res, exec_res):
+                shared_storage['started'] = True
+        class Done(AsyncNode):
+            async def post_async(self, shared_storage, prep_res, exec_res):
+                shared_storage['done'] = True
+        start, solo = Start(), Tokens(2, 0)
+        pipeline = StreamPipeline(Tokens(2, 0), Collect())
+        start >> solo >> pipeline
+        pipeline - "all" >> Done()
+        shared = {}
+        asyncio.run(AsyncFlow(start=start).run_async(shared))
+        self.assertEqual(shared['text'], "t0t1")
+        self.assertEqual(shared['received'], ["t0", "t1"])
+        self.assertTrue(shared['done'])
+
+    def test_channel(self):
+        async def main():
+            ch = Channel(maxsize=1)
+            await ch.put(1)
+            blocked = asyncio.ensure_future(ch.put(2))
+            await asyncio.sleep(0)
+            self.assertFalse(blocked.done())
+            self.assertEqual(await ch.__anext__(), 1)
+            self.assertTrue(await blocked)
+            ch.close()
+            self.assertEqual([x async for x in ch], [2])
+            ch.detach()
+            self.assertFalse(await ch.put(3))
+        asyncio.run(main())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import unittest
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import (Node, Flow, BatchFlow, AsyncFlow, AsyncBatchFlow,
+                        AsyncParallelBatchFlow, StreamingBatchNode, AsyncStreamingBatchNode)
+
+class LazySource:
+    # Tracks how far a generator has been pulled relative to items consumed
+    def __init__(self, n):
+        self.n = n
+        self.produced = 0
+    def __iter__(self):
+        for i in range(self.n):
+            self.produced += 1
+            yield i
+
+class StreamSquares(StreamingBatchNode):
+    def prep(self, shared_storage):
+        return shared_storage['source']
+
+    def exec(self, number):
+        if number == 3 and self.cur_retry == 0:
+            raise ValueError("transient")
+        if number == 7:
+            raise ValueError("permanent")
+        return number * number
+
+    def exec_fallback(self, prep_res, exc):
+        return -1
+
+    def post_item(self, shared_storage, item, exec_res):
+        # The source must never run ahead of the consumer
+        shared_storage['lag'] = max(shared_storage.get('lag', 0), shared_storage['source'].produced - item)
+        shared_storage['total'] = shared_storage.get('total', 0) + exec_res
+
+    def post(self, shared_storage, prep_res, exec_res):
+        shared_storage['post_exec_res'] = exec_res
+        return "done"
+
+class AsyncStreamDouble(AsyncStreamingBatchNode):
+    async def prep_async(self, shared_storage):
+        async def gen():
+            for i in range(shared_storage['n']):
+                await asyncio.sleep(0)
+                yield i
+        return gen()
+
+    async def exec_async(self, number):
+        self.state['in_flight'] += 1
+        self.state['peak'] = max(self.state['peak'], self.state['in_flight'])
+        await asyncio.sleep(0.001)
+        self.state['in_flight'] -= 1
+        return number * 2
+
+    async def post_item_async(self, shared_storage, item, exec_res):
+        shared_storage.setdefault('results', {})[item] = exec_res
+
+class RecordParam(Node):
+    def prep(self, shared_storage):
+        shared_storage.setdefault('keys', []).append(self.params['key'])
+
+class TestStreamingBatch(unittest.TestCase):
+    def test_sync_streaming_node(self):
+        shared = {'source': LazySource(10)}
+        action = Flow(start=StreamSquares(max_retries=2)).run(shared)
+        self.assertEqual(shared['total'], sum(n * n for n in range(10)) - 49 - 1)
+        self.assertEqual(shared['lag'], 1)
+        self.assertIsNone(shared['post_exec_res'])
+        self.assertEqual(action, "done")
+
+    def test_async_streaming_node_bounded(self):
+        for limit in (1, 4):
+            node = AsyncStreamDouble(max_concurrency=limit)
+            node.state = {'in_flight': 0, 'peak': 0}
+            shared = {'n': 30}
+            asyncio.run(AsyncFlow(start=node).run_async(shared))
+            self.assertEqual(shared['results'], {i: i * 2 for i in range(30)})
+            self.assertLessEqual(node.state['peak'], limit)
+
+    def test_batch_flow_accepts_generator(self):
+        class GenFlow(BatchFlow):
+            def prep(self, shared_storage):
+                return ({'key': k} for k in range(3))
+        shared = {}
+        GenFlow(start=RecordParam()).run(shared)
+        self.assertEqual(shared['keys'], [0, 1, 2])
+
+    def test_async_batch_flows_accept_async_iterators(self):
+        async def params():
+            for k in range(4):
+                yield {'key': k}
+        class SeqFlow(AsyncBatchFlow):
+            async def prep_async(self, shared_storage): return params()
+        class ParFlow(AsyncParallelBatchFlow):
+            async def prep_async(self, shared_storage): return params()
+        for flow in (SeqFlow(start=RecordParam()), ParFlow(start=RecordParam()),
+                     ParFlow(start=RecordParam(), max_concurrency=2)):
+            shared = {}
+            asyncio.run(flow.run_async(shared))
+            self.assertEqual(sorted(shared['keys']), [0, 1, 2, 3])
+
+if __name__ == '__main__':
+    unittest.main()
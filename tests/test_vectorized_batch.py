@@ -0,0 +1,157 @@
+import unittest
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import VectorizedBatchNode, AsyncVectorizedBatchNode
+from pocketflow.ratelimit import RateLimiter
+from pocketflow.cache import ExecCache
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+class Lengths(VectorizedBatchNode):
+    # Fails any batch containing "bad"; fails the first attempt of batches containing "flaky"
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.batches = []
+
+    def prep(self, shared_storage):
+        return shared_storage['texts']
+
+    def exec_batch(self, texts):
+        self.batches.append(list(texts))
+        if "bad" in texts or ("flaky" in texts and self.cur_retry == 0):
+            raise ValueError("batch failed")
+        return [len(t) for t in texts]
+
+    def exec_fallback(self, text, exc):
+        return -1
+
+    def post(self, shared_storage, prep_res, exec_res):
+        shared_storage['lengths'] = exec_res
+
+class AsyncLengths(AsyncVectorizedBatchNode):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.batches = []
+
+    async def prep_async(self, shared_storage):
+        return shared_storage['texts']
+
+    async def exec_batch_async(self, texts):
+        self.batches.append(list(texts))
+        await asyncio.sleep(0)
+        if "bad" in texts:
+            raise ValueError("batch failed")
+        return [[len(t), 0] for t in texts]
+
+    async def exec_fallback_async(self, text, exc):
+        return [-1, -1]
+
+    async def post_async(self, shared_storage, prep_res, exec_res):
+        shared_storage['lengths'] = exec_res
+
+class TestVectorizedBatch(unittest.TestCase):
+    def test_groups_by_batch_size(self):
+        node = Lengths(batch_size=3)
+        shared = {'texts': ["a", "bb", "ccc", "dddd", "eeeee"]}
+        node.run(shared)
+        self.assertEqual(shared['lengths'], [1, 2, 3, 4, 5])
+        self.assertEqual(node.batches, [["a", "bb", "ccc"], ["dddd", "eeeee"]])
+
+    def test_groups_by_byte_budget(self):
+        node = Lengths(batch_size=None, max_batch_bytes=5)
+        node.run({'texts': ["aa", "bb", "cc", "dddddd", "e"]})
+        self.assertEqual(node.batches, [["aa", "bb"], ["cc"], ["dddddd"], ["e"]])
+
+    def test_retry_before_split(self):
+        node = Lengths(max_retries=2, batch_size=4)
+        shared = {'texts': ["flaky", "b", "c"]}
+        node.run(shared)
+        self.assertEqual(shared['lengths'], [5, 1, 1])
+        self.assertEqual(len(node.batches), 2)
+
+    def test_split_isolates_bad_item(self):
+        node = Lengths(batch_size=4)
+        shared = {'texts': ["a", "bad", "cc", "ddd"]}
+        node.run(shared)
+        self.assertEqual(shared['lengths'], [1, -1, 2, 3])
+        self.assertEqual(node.batches, [["a", "bad", "cc", "ddd"], ["a", "bad"], ["a"], ["bad"], ["cc", "ddd"]])
+
+    def test_wrong_result_count_is_an_error(self):
+        class Short(VectorizedBatchNode):
+            def exec_batch(self, items):
+                return items[:-1]
+        with self.assertRaises(ValueError):
+            Short()._exec([1, 2, 3])
+
+    def test_default_exec_batch_uses_exec(self):
+        class Square(VectorizedBatchNode):
+            def exec(self, item):
+                return item * item
+        self.assertEqual(Square(batch_size=2)._exec([1, 2, 3]), [1, 4, 9])
+        self.assertEqual(Square()._exec([]), [])
+
+    def test_async_concurrent_batches_and_split(self):
+        node = AsyncLengths(batch_size=2, max_concurrency=2)
+        shared = {'texts': ["a", "bb", "bad", "dddd", "e"]}
+        asyncio.run(node.run_async(shared))
+        self.assertEqual(shared['lengths'], [[1, 0], [2, 0], [-1, -1], [4, 0], [1, 0]])
+
+    def test_async_timeout_and_rate_limit_apply_per_batch(self):
+        class Slow(AsyncLengths):
+            async def exec_batch_async(self, texts):
+                await asyncio.sleep(0.5)
+                return [[len(t), 0] for t in texts]
+            async def exec_fallback_async(self, text, exc):
+                return [type(exc).__name__, 0]
+        node = Slow(batch_size=2)
+        node.timeout = 0.05
+        shared = {'texts': ["a", "bb", "ccc"]}
+        start = time.perf_counter()
+        asyncio.run(node.run_async(shared))
+        self.assertLess(time.perf_counter() - start, 0.4)
+        self.assertEqual([r[0] for r in shared['lengths']], ["TimeoutError"] * 3)
+
+        limiter = RateLimiter(max_inflight=1)
+        peak = []
+        class Limited(AsyncLengths):
+            rate_limit = limiter
+            async def exec_batch_async(self, texts):
+                peak.append(limiter.inflight)
+                await asyncio.sleep(0.01)
+                return [[len(t), 0] for t in texts]
+        node = Limited(batch_size=1, max_concurrency=4)
+        shared = {'texts': ["a", "bb", "ccc", "dddd"]}
+        asyncio.run(node.run_async(shared))
+        self.assertEqual(shared['lengths'], [[1, 0], [2, 0], [3, 0], [4, 0]])
+        self.assertEqual(max(peak), 1)
+        self.assertEqual(limiter.acquired, 4)
+
+    @unittest.skipIf(np is None, "numpy not installed")
+    def test_array_output(self):
+        node = AsyncLengths(batch_size=2)
+        node.array_output = True
+        shared = {'texts': ["a", "bb", "bad"]}
+        asyncio.run(node.run_async(shared))
+        self.assertEqual(shared['lengths'].shape, (3, 2))
+        self.assertTrue(shared['lengths'].flags['C_CONTIGUOUS'])
+
+    def test_cache_applies_per_batch(self):
+        sync, async_ = Lengths(batch_size=2), AsyncLengths(batch_size=2)
+        sync.cache, async_.cache = ExecCache(), ExecCache()
+        for _ in range(2):
+            shared = {'texts': ["a", "bb", "ccc"]}
+            sync.run(shared)
+            self.assertEqual(shared['lengths'], [1, 2, 3])
+            asyncio.run(async_.run_async({'texts': ["a", "bb", "ccc"]}))
+        self.assertEqual(sync.batches, [["a", "bb"], ["ccc"]])
+        self.assertEqual(async_.batches, [["a", "bb"], ["ccc"]])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,27 +1,332 @@
 import os
-from openai import OpenAI
+import threading
+import time
+import weakref
+import asyncio
+import httpx
+from openai import OpenAI, AsyncOpenAI
 
-def call_llm(prompt):
+# Connection pool settings shared by every call in this process
+POOL = {
+    "max_connections": int(os.getenv("LLM_MAX_CONNECTIONS", 20)),
+    "max_keepalive_connections": int(os.getenv("LLM_MAX_KEEPALIVE", 10)),
+    "keepalive_expiry": float(os.getenv("LLM_KEEPALIVE_EXPIRY", 30)),
+    "timeout": float(os.getenv("LLM_TIMEOUT", 60)),
+}
+
+DEFAULT_MODEL = "gpt-4o"
+EMBEDDING_MODEL = "text-embedding-ada-002"
+
+class LLMMetrics:
+    """Per-process counters for LLM calls: count, errors, latency and bytes on the wire."""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.calls = self.errors = 0
+            self.latency = self.max_latency = 0.0
+            self.bytes_sent = self.bytes_received = 0
+
+    def record(self, latency, sent=0, received=0, error=False):
+        with self.lock:
+            self.calls += 1
+            self.errors += int(error)
+            self.latency += latency
+            self.max_latency = max(self.max_latency, latency)
+            self.bytes_sent += sent
+            self.bytes_received += received
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "calls": self.calls,
+                "errors": self.errors,
+                "avg_latency": self.latency / self.calls if self.calls else 0.0,
+                "max_latency": self.max_latency,
+                "bytes_sent": self.bytes_sent,
+                "bytes_received": self.bytes_received,
+            }
+
+metrics = LLMMetrics()
+
+_lock = threading.Lock()
+_client = None
+cache = None  # LLMCache used by call_llm/stream_llm once enable_cache() is called
+_async_clients = weakref.WeakKeyDictionary()  # one AsyncOpenAI per event loop
+_closing = set()  # close() tasks, kept referenced until they finish
+
+def _limits():
+    return httpx.Limits(
+        max_connections=POOL["max_connections"],
+        max_keepalive_connections=POOL["max_keepalive_connections"],
+        keepalive_expiry=POOL["keepalive_expiry"],
+    )
+
+def configure(**settings):
+    """
+    Change pool settings (keys of POOL) for clients created after this call.
+
+    Existing clients are closed so the next call picks up the new limits.
     """
-    Call OpenAI's GPT model with the given prompt.
-    
+    unknown = set(settings) - set(POOL)
+    if unknown:
+        raise ValueError(f"Unknown pool settings: {sorted(unknown)}")
+    with _lock:
+        POOL.update(settings)
+    close()
+
+def close():
+    """Close every pooled client. Async clients are closed on their own event loop, if it is still open."""
+    global _client
+    with _lock:
+        client, _client = _client, None
+        async_clients = list(_async_clients.items())
+        _async_clients.clear()
+    if client is not None:
+        client.close()
+    for loop, async_client in async_clients:
+        if loop.is_closed():
+            continue
+        if loop is _running_loop():
+            task = loop.create_task(async_client.close())
+            _closing.add(task)
+            task.add_done_callback(_closing.discard)
+        else:
+            asyncio.run_coroutine_threadsafe(async_client.close(), loop)
+
+async def aclose():
+    """Close the async client of the running event loop; call it before the loop shuts down."""
+    with _lock:
+        client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.close()
+
+def _running_loop():
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+def enable_cache(**settings):
+    """
+    Cache responses on disk (see utils.llm_cache.LLMCache for settings such as path, ttl and max_disk_rows).
+
+    Returns:
+        LLMCache: The active cache, whose hits and misses counters can be monitored
+    """
+    global cache
+    from utils.llm_cache import LLMCache
+    cache = LLMCache(**settings)
+    return cache
+
+def disable_cache():
+    global cache
+    cache = None
+
+def get_client():
+    """Return the process-wide OpenAI client, whose HTTP connections are kept alive and reused."""
+    global _client
+    with _lock:
+        if _client is None:
+            _client = OpenAI(
+                api_key=os.getenv("OPENAI_API_KEY"),
+                http_client=httpx.Client(limits=_limits(), timeout=POOL["timeout"]),
+            )
+        return _client
+
+def get_async_client():
+    """Return the AsyncOpenAI client for the running event loop (httpx async pools can't cross loops)."""
+    loop = asyncio.get_running_loop()
+    with _lock:
+        client = _async_clients.get(loop)
+        if client is None:
+            client = _async_clients[loop] = AsyncOpenAI(
+                api_key=os.getenv("OPENAI_API_KEY"),
+                http_client=httpx.AsyncClient(limits=_limits(), timeout=POOL["timeout"]),
+            )
+        return client
+
+def _messages(prompt):
+    return [{"role": "user", "content": prompt}] if isinstance(prompt, str) else prompt
+
+def _record(start, raw=None, error=False):
+    sent = received = 0
+    if raw is not None:
+        response = raw.http_response
+        sent = len(response.request.content or b"")
+        received = response.num_bytes_downloaded
+    metrics.record(time.perf_counter() - start, sent, received, error)
+
+def _complete(prompt, model, params):
+    start = time.perf_counter()
+    try:
+        raw = get_client().chat.completions.with_raw_response.create(model=model, messages=_messages(prompt), **params)
+        response = raw.parse()
+    except Exception:
+        _record(start, error=True)
+        raise
+    _record(start, raw)
+    return response.choices[0].message.content
+
+async def _complete_async(prompt, model, params):
+    start = time.perf_counter()
+    try:
+        raw = await get_async_client().chat.completions.with_raw_response.create(model=model, messages=_messages(prompt), **params)
+        response = raw.parse()
+    except Exception:
+        _record(start, error=True)
+        raise
+    _record(start, raw)
+    return response.choices[0].message.content
+
+def _stream(prompt, model, params):
+    # Recorded in finally, so a consumer that stops early still counts; closing the stream frees the connection
+    start, raw, stream, error = time.perf_counter(), None, None, False
+    try:
+        raw = get_client().chat.completions.with_raw_response.create(model=model, messages=_messages(prompt), stream=True, **params)
+        stream = raw.parse()
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    except Exception:
+        error = True
+        raise
+    finally:
+        if stream is not None:
+            stream.close()
+        _record(start, raw, error)
+
+async def _stream_async(prompt, model, params):
+    start, raw, stream, error = time.perf_counter(), None, None, False
+    try:
+        raw = await get_async_client().chat.completions.with_raw_response.create(model=model, messages=_messages(prompt), stream=True, **params)
+        stream = raw.parse()
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    except Exception:
+        error = True
+        raise
+    finally:
+        if stream is not None:
+            await stream.close()
+        _record(start, raw, error)
+
+def _cache_key(prompt, model, params, use_cache, stream=False):
+    if cache is None or not use_cache:
+        return None
+    return cache.prompt_key(model, params, prompt, stream)
+
+def call_llm(prompt, model=DEFAULT_MODEL, temperature=0.7, max_tokens=1000, use_cache=True, **params):
+    """
+    Call the chat completion API through the pooled client.
+
     Args:
-        prompt (str): The prompt to send to the LLM
-        
+        prompt (str | list): A user prompt, or a full list of chat messages
+        model (str): Model name
+        temperature (float): Sampling temperature
+        max_tokens (int): Maximum tokens in the response
+        use_cache (bool | str): Read and write the response cache, if one is enabled.
+            "refresh" skips the cached response and overwrites it with a new one (use it on retries)
+        **params: Extra completion parameters passed to the API
+
     Returns:
         str: The response from the LLM
     """
-    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-    response = client.chat.completions.create(
-        model="gpt-4o",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.7,
-        max_tokens=1000
-    )
-    return response.choices[0].message.content
+    params = {"temperature": temperature, "max_tokens": max_tokens, **params}
+    key = _cache_key(prompt, model, params, use_cache)
+    if key is None:
+        return _complete(prompt, model, params)
+    if use_cache == "refresh":
+        response = _complete(prompt, model, params)
+        cache.set(key, response)
+        return response
+    return cache.get_or_compute(key, lambda: _complete(prompt, model, params))
+
+async def call_llm_async(prompt, model=DEFAULT_MODEL, temperature=0.7, max_tokens=1000, use_cache=True, **params):
+    """Async version of call_llm with the same arguments and return value."""
+    params = {"temperature": temperature, "max_tokens": max_tokens, **params}
+    key = _cache_key(prompt, model, params, use_cache)
+    if key is None:
+        return await _complete_async(prompt, model, params)
+    if use_cache == "refresh":
+        response = await _complete_async(prompt, model, params)
+        cache.set(key, response)
+        return response
+    return await cache.aget_or_compute(key, lambda: _complete_async(prompt, model, params))
+
+def stream_llm(prompt, model=DEFAULT_MODEL, temperature=0.7, use_cache=True, **params):
+    """
+    Stream a chat completion through the pooled client.
+
+    A cached response is replayed chunk by chunk. A live stream is cached only if it is read to the end.
+
+    Yields:
+        str: Text chunks as they arrive
+    """
+    params = {"temperature": temperature, **params}
+    key = _cache_key(prompt, model, params, use_cache, stream=True)
+    if key is None:
+        yield from _stream(prompt, model, params)
+        return
+    chunks = cache.get(key, None) if use_cache != "refresh" else None
+    if chunks is not None:
+        yield from chunks
+        return
+    chunks = []
+    for chunk in _stream(prompt, model, params):
+        chunks.append(chunk)
+        yield chunk
+    cache.set(key, chunks)
+
+async def stream_llm_async(prompt, model=DEFAULT_MODEL, temperature=0.7, use_cache=True, **params):
+    """Async version of stream_llm."""
+    params = {"temperature": temperature, **params}
+    key = _cache_key(prompt, model, params, use_cache, stream=True)
+    chunks = cache.get(key, None) if key is not None and use_cache != "refresh" else None
+    if chunks is not None:
+        for chunk in chunks:
+            yield chunk
+        return
+    chunks = []
+    async for chunk in _stream_async(prompt, model, params):
+        chunks.append(chunk)
+        yield chunk
+    if key is not None:
+        cache.set(key, chunks)
+
+def get_embedding(text, model=EMBEDDING_MODEL):
+    """Embed one string (returns a list of floats) or a list of strings (returns a list of vectors)."""
+    start = time.perf_counter()
+    try:
+        raw = get_client().embeddings.with_raw_response.create(model=model, input=text)
+        response = raw.parse()
+    except Exception:
+        _record(start, error=True)
+        raise
+    _record(start, raw)
+    vectors = [d.embedding for d in response.data]
+    return vectors[0] if isinstance(text, str) else vectors
+
+async def get_embedding_async(text, model=EMBEDDING_MODEL):
+    """Async version of get_embedding."""
+    start = time.perf_counter()
+    try:
+        raw = await get_async_client().embeddings.with_raw_response.create(model=model, input=text)
+        response = raw.parse()
+    except Exception:
+        _record(start, error=True)
+        raise
+    _record(start, raw)
+    vectors = [d.embedding for d in response.data]
+    return vectors[0] if isinstance(text, str) else vectors
 
 if __name__ == "__main__":
     # Test the function
     test_prompt = "What is the capital of France?"
     print(f"Prompt: {test_prompt}")
-    print(f"Response: {call_llm(test_prompt)}")
\ No newline at end of file
+    print(f"Response: {call_llm(test_prompt)}")
+    print(f"Second call reuses the connection: {call_llm('And of Spain?')}")
+    print(f"Metrics: {metrics.snapshot()}")
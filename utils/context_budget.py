@@ -0,0 +1,127 @@
+import re
+from functools import lru_cache
+
+def estimate_tokens(text):
+    """Rough token count with no tokenizer: about 4 bytes of UTF-8 per token."""
+    return (len(text.encode("utf-8")) + 3) // 4
+
+def tiktoken_counter(model="gpt-4o"):
+    """Token counter using tiktoken for `model`, or estimate_tokens if tiktoken is not installed."""
+    try:
+        import tiktoken
+    except ImportError:
+        return estimate_tokens
+    try:
+        encoding = tiktoken.encoding_for_model(model)
+    except KeyError:
+        encoding = tiktoken.get_encoding("cl100k_base")
+    return lambda text: len(encoding.encode(text, disallowed_special=()))
+
+def _norm(text):
+    return re.sub(r"\s+", " ", text).strip()
+
+def _text(content):
+    """Text of message content: the string itself, or the text parts of a content-part list."""
+    if isinstance(content, str):
+        return content
+    return "\n".join(p.get("text", "") for p in content or () if isinstance(p, dict) and p.get("type") == "text")
+
+class ContextBudget:
+    """
+    Fit prompt segments (history, search results, documents) into a token budget.
+
+    Segments are dicts with "text" and optional "priority" (higher is kept longer) and "pinned"
+    (never changed). Exact duplicates are dropped first. Then, lowest priority and oldest first,
+    segments are summarized (if `summarize(text)` is given), trimmed to fit, or dropped until the total fits.
+
+    Token counts and summaries are cached per segment text, so a history that grows by one segment a
+    turn only counts (and summarizes) the new one.
+    """
+    def __init__(self, max_tokens, count=None, summarize=None, separator="\n\n", cache_size=4096, marker=" ..."):
+        self.max_tokens, self.summarize, self.separator, self.marker = max_tokens, summarize, separator, marker
+        self.count = lru_cache(maxsize=cache_size)(count or tiktoken_counter())
+        if summarize:
+            self.summarize = lru_cache(maxsize=cache_size)(summarize)
+
+    def total(self, texts):
+        texts = list(texts)
+        return sum(self.count(t) for t in texts) + self.count(self.separator) * max(0, len(texts) - 1)
+
+    def trim(self, text, tokens):
+        """Longest prefix of `text` (plus the marker) that fits in `tokens`, or "" if none does."""
+        if self.count(text) <= tokens:
+            return text
+        lo, hi = 0, len(text)
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if self.count(text[:mid] + self.marker) <= tokens:
+                lo = mid
+            else:
+                hi = mid - 1
+        return text[:lo].rstrip() + self.marker if lo else ""
+
+    def fit(self, segments, max_tokens=None, dedupe=True):
+        """
+        Args:
+            segments (list): Strings or dicts {"text", "priority"=0, "pinned"=False}, in prompt order
+            max_tokens (int): Budget for this call (defaults to the instance budget)
+            dedupe (bool): Drop segments repeating a later one (ignoring whitespace)
+
+        Returns:
+            list: The texts that fit, in their original order
+        """
+        return [text for _, text in self._fit(segments, max_tokens, dedupe)]
+
+    def _fit(self, segments, max_tokens, dedupe):
+        budget = self.max_tokens if max_tokens is None else max_tokens
+        segs = [{"text": s} if isinstance(s, str) else dict(s) for s in segments]
+        for i, s in enumerate(segs):
+            s["index"] = i
+        seen = {}
+        for i, s in enumerate(segs if dedupe else ()):
+            key = _norm(s["text"])
+            if key in seen:
+                j = seen[key]
+                s["priority"] = max(s.get("priority", 0), segs[j].get("priority", 0))
+                s["pinned"] = s.get("pinned") or segs[j].get("pinned")
+                segs[j] = None
+            seen[key] = i
+        segs = [s for s in segs if s is not None]
+        over = self.total(s["text"] for s in segs) - budget
+        victims = sorted((s for s in segs if not s.get("pinned")), key=lambda s: (s.get("priority", 0), s["index"]))
+        for s in victims:
+            if over <= 0:
+                break
+            text = s["text"]
+            size = self.count(text)
+            if self.summarize:
+                summary = self.summarize(text)
+                if self.count(summary) < size:
+                    text = summary
+            if self.count(text) > size - over:
+                text = self.trim(text, size - over)
+            s["text"] = text or None
+            over = self.total(s["text"] for s in segs if s["text"] is not None) - budget
+        return [(s["index"], s["text"]) for s in segs if s["text"] is not None]
+
+    def fit_messages(self, messages, max_tokens=None, keep_last=2):
+        """
+        Fit chat messages into the budget. System messages and the last `keep_last` messages are pinned;
+        older messages are trimmed or dropped oldest first. Messages whose content is not a non-empty string
+        (a list of content parts, or None or "" next to tool calls) are kept unchanged; their text parts still count.
+
+        Returns:
+            list: The messages that fit, in order (messages are copied when their content changes)
+        """
+        pinned = len(messages) - keep_last
+        segments = [
+            {"text": _text(m.get("content")), "priority": i,
+             "pinned": m.get("role") == "system" or i >= pinned or not isinstance(m.get("content"), str) or not m["content"]}
+            for i, m in enumerate(messages)
+        ]
+        kept = dict(self._fit(segments, max_tokens, dedupe=False))
+        return [
+            m if not isinstance(m.get("content"), str) or kept[i] == m["content"] else {**m, "content": kept[i]}
+            for i, m in enumerate(messages)
+            if i in kept or not isinstance(m.get("content"), str)
+        ]
@@ -0,0 +1,39 @@
+import os
+import re
+from pocketflow.cache import ExecCache, stable_hash
+
+def normalize_prompt(prompt):
+    """
+    Collapse runs of whitespace and strip the ends, so prompts that differ only in formatting share a key.
+
+    Args:
+        prompt (str | list): A prompt string, or a list of chat messages
+
+    Returns:
+        The normalized prompt, in the same shape
+    """
+    if isinstance(prompt, str):
+        return re.sub(r"\s+", " ", prompt).strip()
+    return [
+        {**m, "content": normalize_prompt(m["content"])} if isinstance(m.get("content"), str) else m
+        for m in prompt
+    ]
+
+class LLMCache(ExecCache):
+    """
+    Persistent cache of LLM responses, keyed by model, call parameters and the (normalized) prompt.
+
+    Memory entries are LRU-bounded by `max_entries`; the sqlite file at `path` keeps responses across
+    runs and processes, bounded by `max_disk_rows` and expired after `ttl` seconds.
+    Hit and miss counts are on `hits` and `misses`.
+    """
+    def __init__(self, path=os.getenv("LLM_CACHE_PATH", "llm_cache.db"), ttl=7 * 86400, max_entries=1024,
+                 max_disk_rows=100_000, normalize=True):
+        super().__init__(max_entries=max_entries, ttl=ttl, path=path, max_disk_rows=max_disk_rows)
+        self.normalize = normalize
+
+    def prompt_key(self, model, params, prompt, stream=False):
+        """Stable key for one call; `stream=True` keys the recorded chunk list of a streamed response."""
+        if self.normalize:
+            prompt = normalize_prompt(prompt)
+        return stable_hash("llm", model, params, prompt, stream)
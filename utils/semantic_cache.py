@@ -0,0 +1,249 @@
+import asyncio
+import inspect
+import math
+import random
+import threading
+import time
+from collections import OrderedDict
+from pocketflow.cache import stable_hash
+from utils.llm_cache import normalize_prompt
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+def _split(prompt):
+    """(context, final turn): a chat's earlier messages and its last message, or () and the prompt string."""
+    if isinstance(prompt, str):
+        return (), normalize_prompt(prompt)
+    prompt = normalize_prompt(prompt)
+    last = prompt[-1] if prompt else {}
+    text = last.get("content") if isinstance(last.get("content"), str) else ""
+    return prompt[:-1], text
+
+def _unit(vector):
+    if np is not None:
+        v = np.asarray(vector, dtype=np.float32)
+        return v / (np.linalg.norm(v) or 1.0)
+    norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+    return tuple(x / norm for x in vector)
+
+def _dot(a, b):
+    return float(np.dot(a, b)) if np is not None else sum(x * y for x, y in zip(a, b))
+
+class _Index:
+    """
+    Unit vectors of one scope as rows of a matrix. Updates copy it, so a search can run on a
+    snapshot without holding the cache lock (stores are rare next to the LLM calls they follow).
+    """
+    def __init__(self):
+        self.keys, self.rows = (), None
+
+    def add(self, key, vector):
+        keys = [k for k in self.keys if k != key]
+        rows = [r for k, r in zip(self.keys, self._rows()) if k != key] + [vector]
+        self._set(keys + [key], rows)
+
+    def remove(self, key):
+        self._set([k for k in self.keys if k != key], [r for k, r in zip(self.keys, self._rows()) if k != key])
+
+    def _rows(self):
+        return [] if self.rows is None else list(self.rows)
+
+    def _set(self, keys, rows):
+        self.keys = tuple(keys)
+        self.rows = (np.vstack(rows) if np is not None else tuple(rows)) if rows else None
+
+    @staticmethod
+    def best(snapshot, vector):
+        keys, rows = snapshot
+        if rows is None:
+            return None
+        if np is not None:
+            scores = rows @ vector
+            i = int(scores.argmax())
+            return float(scores[i]), keys[i]
+        return max(((_dot(vector, r), k) for k, r in zip(keys, rows)), key=lambda t: t[0])
+
+class SemanticCache:
+    """
+    LLM response cache that also answers prompts worded differently from one already seen.
+
+    Entries are scoped by namespace, model/params and, for chats, every message before the last one,
+    so only the final turn is compared: "Why?" in one conversation never matches another conversation.
+    Within a scope the final turn is embedded and compared (cosine similarity) against past ones; the
+    best match at or above `threshold` is a hit. Each namespace keeps at most `max_entries` entries
+    (least recently used are evicted) and entries expire after `ttl` seconds.
+
+    An exact-match shadow measures how often the similarity match is wrong: identical prompts are
+    answered from the exact key, and a `shadow_rate` fraction of similarity hits also call the LLM and
+    compare its answer with the cached one using `agree(cached, fresh)` (sync or async). Disagreements
+    count as false hits. Vectors are searched with numpy when it is installed.
+    """
+    def __init__(self, embed=None, threshold=0.92, max_entries=1000, ttl=None, shadow_rate=0.0,
+                 agree=None, embed_async=None):
+        if embed is None or embed_async is None:
+            from utils.call_llm import get_embedding, get_embedding_async
+            embed, embed_async = embed or get_embedding, embed_async or get_embedding_async
+        self.embed, self.embed_async, self.agree = embed, embed_async, agree
+        self.threshold, self.max_entries, self.ttl, self.shadow_rate = threshold, max_entries, ttl, shadow_rate
+        self.namespaces = {}  # namespace -> OrderedDict((scope, text) -> [answer, expires])
+        self.indexes = {}     # (namespace, scope) -> _Index of final-turn vectors
+        self.lock = threading.Lock()
+        self.reset_metrics()
+
+    def reset_metrics(self):
+        with self.lock:
+            self.exact_hits = self.semantic_hits = self.misses = 0
+            self.shadow_checks = self.false_hits = self.evictions = 0
+
+    def metrics(self):
+        with self.lock:
+            lookups = self.exact_hits + self.semantic_hits + self.misses
+            return {
+                "lookups": lookups,
+                "exact_hits": self.exact_hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "hit_rate": (self.exact_hits + self.semantic_hits) / lookups if lookups else 0.0,
+                "shadow_checks": self.shadow_checks,
+                "false_hits": self.false_hits,
+                "false_hit_rate": self.false_hits / self.shadow_checks if self.shadow_checks else 0.0,
+                "evictions": self.evictions,
+                "entries": sum(len(e) for e in self.namespaces.values()),
+            }
+
+    def _count(self, name):
+        with self.lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def _key(self, prompt, params):
+        context, text = _split(prompt)
+        return stable_hash(params, context), text
+
+    def _drop(self, namespace, key):
+        del self.namespaces[namespace][key]
+        index = self.indexes[(namespace, key[0])]
+        index.remove(key[1])
+        if not index.keys:
+            del self.indexes[(namespace, key[0])]
+
+    def _live(self, namespace, key):
+        entries = self.namespaces.get(namespace, {})
+        entry = entries.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= time.time():
+            self._drop(namespace, key)
+            return None
+        if entry is not None:
+            entries.move_to_end(key)
+        return entry
+
+    def exact(self, prompt, namespace="default", **params):
+        """Cached answer for this exact (normalized) prompt and params, or None."""
+        key = self._key(prompt, params)
+        with self.lock:
+            entry = self._live(namespace, key)
+            return None if entry is None else entry[0]
+
+    def search(self, prompt, vector, namespace="default", **params):
+        """Best (similarity, final turn, answer) in the prompt's scope at or above the threshold, or None."""
+        scope, _ = self._key(prompt, params)
+        vector = _unit(vector)
+        while True:
+            with self.lock:
+                index = self.indexes.get((namespace, scope))
+                snapshot = (index.keys, index.rows) if index else ((), None)
+            best = _Index.best(snapshot, vector)
+            if best is None or best[0] < self.threshold:
+                return None
+            with self.lock:
+                entry = self._live(namespace, (scope, best[1]))
+            if entry is not None:
+                return best[0], best[1], entry[0]
+
+    def store(self, prompt, answer, vector, namespace="default", **params):
+        key = self._key(prompt, params)
+        vector = _unit(vector)
+        now = time.time()
+        with self.lock:
+            entries = self.namespaces.setdefault(namespace, OrderedDict())
+            for k in [k for k, e in entries.items() if e[1] is not None and e[1] <= now]:
+                self._drop(namespace, k)
+            entries[key] = [answer, now + self.ttl if self.ttl else None]
+            entries.move_to_end(key)
+            self.indexes.setdefault((namespace, key[0]), _Index()).add(key[1], vector)
+            while len(entries) > self.max_entries:
+                self._drop(namespace, next(iter(entries)))
+                self.evictions += 1
+
+    def clear(self, namespace=None):
+        with self.lock:
+            for ns in [namespace] if namespace is not None else list(self.namespaces):
+                self.namespaces.pop(ns, None)
+                for k in [k for k in self.indexes if k[0] == ns]:
+                    del self.indexes[k]
+
+    def _similar_answers(self, cached, fresh):
+        return _dot(_unit(self.embed(cached)), _unit(self.embed(fresh))) >= self.threshold
+
+    async def _similar_answers_async(self, cached, fresh):
+        a, b = await asyncio.gather(self.embed_async(cached), self.embed_async(fresh))
+        return _dot(_unit(a), _unit(b)) >= self.threshold
+
+    def _record_shadow(self, agreed):
+        with self.lock:
+            self.shadow_checks += 1
+            self.false_hits += not agreed
+
+    def _lookup(self, prompt, namespace, params):
+        answer = self.exact(prompt, namespace, **params)
+        if answer is not None:
+            self._count("exact_hits")
+        return answer
+
+    def _matched(self, match):
+        self._count("misses" if match is None else "semantic_hits")
+        return match is not None and random.random() >= self.shadow_rate
+
+    def call(self, prompt, fn, namespace="default", **params):
+        """
+        Answer `prompt` from the cache, or call `fn(prompt, **params)` and cache its answer.
+
+        Args:
+            prompt (str | list): A prompt, or chat messages (earlier messages must match exactly, the last one by similarity)
+            fn (callable): The LLM call, e.g. utils.call_llm.call_llm
+            namespace (str): Entries are only matched within the same namespace (user, tenant...)
+            **params: Passed to `fn` (model, temperature...) and part of the key
+
+        Returns:
+            str: The cached or fresh answer
+        """
+        answer = self._lookup(prompt, namespace, params)
+        if answer is not None:
+            return answer
+        vector = self.embed(_split(prompt)[1])
+        match = self.search(prompt, vector, namespace, **params)
+        if self._matched(match):
+            return match[2]
+        answer = fn(prompt, **params)
+        if match is not None:
+            self._record_shadow((self.agree or self._similar_answers)(match[2], answer))
+        self.store(prompt, answer, vector, namespace, **params)
+        return answer
+
+    async def call_async(self, prompt, fn, namespace="default", **params):
+        """Async version of call; `fn` is a coroutine function such as call_llm_async. The vector search runs in a thread."""
+        answer = self._lookup(prompt, namespace, params)
+        if answer is not None:
+            return answer
+        vector = await self.embed_async(_split(prompt)[1])
+        match = await asyncio.to_thread(self.search, prompt, vector, namespace, **params)
+        if self._matched(match):
+            return match[2]
+        answer = await fn(prompt, **params)
+        if match is not None:
+            agreed = (self.agree or self._similar_answers_async)(match[2], answer)
+            self._record_shadow(await agreed if inspect.isawaitable(agreed) else agreed)
+        self.store(prompt, answer, vector, namespace, **params)
+        return answer